@@ -4,8 +4,42 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import psycopg2
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
+import json
+import functools
+import threading
+import time
+import io
+from collections import deque, OrderedDict
+from spatial_index import StationIndex
+from cube import OlapCube
+from notifications import CACHE_TTL, NOTIFICATIONS_ENABLED, listen_changes, notify_change, register_dependencies, pop_dependents
+from quality import QUERY_QUALITY_VIOLATIONS, QUALITY_LABELS, quality_scores
+from warehouse import (
+    make_db_config, backend_for, timeout_for, read_query, normalize_query, QUERY_DASHBOARD_BREAKDOWN, QUERY_GEO_DETAIL, QUERY_TEMPORAL, QUERY_SOURCES_DETAIL,
+    QUERY_ANALYSE_DATA, QUERY_GEO_GRID, QUERY_GEO_DIMENSION_VERSION, QUERY_STATIONS,
+    QUERY_CUBE_SOURCE, QUERY_CUBE_INCREMENT, MEASURE_COLUMNS, EXACT_METRIC_QUERIES, APPROX_METRIC_QUERIES, DETAIL_COLUMNS, DETAIL_PAGE_SIZE,
+    DOMAIN_MEASURES, DOMAIN_FLAGS, QUERY_GROUP_PARTIALS, build_detail_query, build_group_latest_query,
+    TEMPORAL_GRANULARITIES, TEMPORAL_DEFAULT_GRANULARITY, QUERY_CLIMATOLOGY, QUERY_REGION_MONTHLY, build_temporal_query,
+    monthly_region_means, compute_anomalies, build_correlation_query, correlation_matrix,
+    split_dashboard_breakdown, split_temporal_levels, add_validity_columns, has_measures, build_inverted_index, active_index_filters, index_positions,
+    merge_region_stats, merge_region_latest, DIMENSION_QUERIES, build_dimension_lookup, decode_fact_keys,
+    dimension_dependencies, query_tables
+)
+import duckdb_backend
+import figures
+
+# Export Parquet optionnel (pyarrow est installé avec Streamlit)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Début de l'exécution complète du script (mesure du temps de rerun)
+rerun_start = time.perf_counter()
 
 # Configuration de la page
 st.set_page_config(
@@ -23,13 +57,7 @@ USERS = {
 }
 
 # Configuration de connexion PostgreSQL
-DB_CONFIG = {
-    "host": "wascal-datawarehouse.ce5k6qqm8o1c.us-east-1.rds.amazonaws.com",
-    "port": "5432",
-    "database": "postgres",
-    "user": "wascal_admin",
-    "password": st.secrets["postgres_password"]
-}
+DB_CONFIG = make_db_config(st.secrets["postgres_password"])
 
 # CSS personnalisé complet - Thème Bleu et Blanc
 st.markdown("""
@@ -537,33 +565,482 @@ st.markdown("""
 def check_login(username, password):
     return username in USERS and USERS[username] == password
 
-# Fonction pour exécuter des requêtes avec gestion d'erreur améliorée
-@st.cache_data(ttl=600)
-def run_query(query):
-    conn = None
+# Appels en vol partagés entre sessions : clé normalisée (moteur, requête, paramètres) -> appel en cours.
+# "termines" garde le résultat d'une exécution en arrière-plan jusqu'à son adoption par le cache.
+@st.cache_resource
+def get_inflight_queries():
+    return {"lock": threading.Lock(), "en_vol": {}, "termines": {}, "executions": 0, "partagees": 0, "annulees": 0}
+
+# Durée de conservation d'un résultat d'arrière-plan non adopté (secondes)
+BACKGROUND_RESULT_TTL = 300
+
+# Intervalle de rafraîchissement de l'indicateur de progression d'une requête en arrière-plan (secondes)
+BACKGROUND_POLL_INTERVAL = 0.5
+
+# Exécution réelle par le thread courant : un appel single-flight qui n'a lu que le cache n'a rien fait économiser
+query_flight = threading.local()
+
+# Fonction pour construire la clé single-flight d'une requête (extra : variante du résultat, ex. résultat partagé)
+def inflight_key(query, params=None, query_class=None, *extra):
+    return (backend_for(query_class), normalize_query(query), json.dumps(params, sort_keys=True, default=str)) + extra
+
+# Fonction pour créer un appel en vol (abonnes : appelants en attente, dont les pages en arrière-plan ;
+# execute : l'appel a exécuté la requête au lieu de lire le cache)
+def new_inflight_call():
+    return {
+        "fini": threading.Event(), "resultat": None, "erreur": None, "connexion": None, "pid": None,
+        "abonnes": 0, "annule": False, "execute": False
+    }
+
+# Fonction pour exécuter une requête en arrière-plan et conserver son résultat dans "termines",
+# adopté par le cache au rerun suivant de la page
+def execute_inflight_call(state, key, call, query, params, query_class):
+    def on_connect(conn):
+        with state["lock"]:
+            # Annulée avant l'ouverture de la connexion : la requête n'est pas envoyée
+            if call["annule"]:
+                raise RuntimeError("Requête annulée")
+            call["connexion"] = conn
+            call["pid"] = conn.get_backend_pid() if hasattr(conn, "get_backend_pid") else None
+
     try:
-        # Créer une nouvelle connexion pour chaque requête
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.set_session(autocommit=True)
-        
-        df = pd.read_sql_query(query, conn)
-        return df
-        
-    except psycopg2.OperationalError as e:
+        # Une nouvelle connexion par requête (PostgreSQL) ou la base DuckDB locale selon WASCAL_QUERY_ROUTES
+        call["resultat"] = read_query(query, params, db_config=DB_CONFIG, query_class=query_class, on_connect=on_connect)
+    except Exception as e:
+        call["erreur"] = e
+    finally:
+        with state["lock"]:
+            state["en_vol"].pop(key, None)
+            call["connexion"] = None
+            if not call["annule"]:
+                state["termines"][key] = (call, time.time())
+        call["fini"].set()
+
+# Fonction pour oublier les résultats d'arrière-plan que plus aucune page n'est venue chercher
+def purge_background_results(state):
+    expired = [key for key, (_, finished_at) in state["termines"].items() if time.time() - finished_at > BACKGROUND_RESULT_TTL]
+    for key in expired:
+        state["termines"].pop(key)
+
+# Fonction pour exécuter une requête sur un cache vide (appelée depuis les fonctions en cache) : adoption du
+# résultat terminé en arrière-plan s'il existe, sinon lecture sur le moteur de la classe (erreurs remontées)
+def fetch_query(query, params=None, query_class=None):
+    state = get_inflight_queries()
+    with state["lock"]:
+        purge_background_results(state)
+        finished = state["termines"].pop(inflight_key(query, params, query_class), None)
+        if finished is None:
+            state["executions"] += 1
+    query_flight.executed = True
+    if finished is None:
+        return read_query(query, params, db_config=DB_CONFIG, query_class=query_class)
+    call = finished[0]
+    if call["erreur"] is not None:
+        raise call["erreur"]
+    return call["resultat"]
+
+# Fonction pour calculer un résultat une seule fois pour tous les appels simultanés identiques (single-flight),
+# en amont du cache : le premier appel lit le cache (compute), les suivants attendent son résultat ; les erreurs
+# sont remontées à chaque appelant. Un appel qui rejoint une exécution réelle compte comme une exécution évitée.
+def run_single_flight(key, compute):
+    state = get_inflight_queries()
+    with state["lock"]:
+        call = state["en_vol"].get(key)
+        leader = call is None
+        if leader:
+            call = new_inflight_call()
+            state["en_vol"][key] = call
+        call["abonnes"] += 1
+
+    start = time.perf_counter()
+    if leader:
+        query_flight.executed = False
+        try:
+            call["resultat"] = compute()
+        except Exception as e:
+            call["erreur"] = e
+        finally:
+            call["execute"] = query_flight.executed
+            with state["lock"]:
+                state["en_vol"].pop(key, None)
+                call["abonnes"] -= 1
+            call["fini"].set()
+    else:
+        call["fini"].wait()
+        with state["lock"]:
+            call["abonnes"] -= 1
+            if call["execute"]:
+                state["partagees"] += 1
+        record_perf("requetes.attente_partagee_ms", (time.perf_counter() - start) * 1000)
+
+    if call["erreur"] is not None:
+        raise call["erreur"]
+    # Copie pour les sessions en attente : un appelant qui modifie son résultat n'affecte pas les autres
+    result = call["resultat"]
+    return result.copy() if not leader and isinstance(result, pd.DataFrame) else result
+
+# Fonction pour lancer (ou rejoindre) l'exécution en arrière-plan d'une requête lourde
+def start_background_query(query, params=None, query_class=None):
+    key = inflight_key(query, params, query_class)
+    state = get_inflight_queries()
+    with state["lock"]:
+        purge_background_results(state)
+        if key in state["termines"]:
+            return key, state["termines"][key][0]
+        call = state["en_vol"].get(key)
+        if call is None:
+            call = new_inflight_call()
+            call["execute"] = True
+            state["en_vol"][key] = call
+            state["executions"] += 1
+            threading.Thread(
+                target=execute_inflight_call, args=(state, key, call, query, params, query_class), daemon=True
+            ).start()
+        # Exécution d'arrière-plan déjà lancée par une autre page : une exécution évitée
+        # (un appel de premier plan en cours ne lit peut-être que le cache)
+        elif call["execute"]:
+            state["partagees"] += 1
+    return key, call
+
+# Fonction pour attendre une requête lourde exécutée en arrière-plan en affichant sa progression.
+# Un rerun (changement de page, widget) interrompt l'attente sans arrêter la requête : la page qui
+# revient adopte le résultat, cancel_stale_queries annule la requête si plus personne ne l'attend.
+def wait_in_background(query, params=None, query_class=None, label="Chargement"):
+    state = get_inflight_queries()
+    key, call = start_background_query(query, params, query_class)
+    jobs = st.session_state.setdefault("requetes_en_cours", {})
+    previous = jobs.get(key)
+    if previous is None or previous[0] is not call:
+        with state["lock"]:
+            call["abonnes"] += 1
+            if previous is not None:
+                previous[0]["abonnes"] -= 1
+        jobs[key] = (call, st.session_state.page)
+
+    start = time.perf_counter()
+    placeholder = st.empty()
+    while not call["fini"].wait(BACKGROUND_POLL_INTERVAL):
+        placeholder.info(
+            f"⏳ {label} : requête en cours depuis {time.perf_counter() - start:.0f} s "
+            f"(délai maximal {timeout_for(query_class):.0f} s)"
+        )
+    placeholder.empty()
+    record_perf(f"{query_class}.attente_arriere_plan_ms", (time.perf_counter() - start) * 1000)
+
+    jobs.pop(key, None)
+    with state["lock"]:
+        call["abonnes"] -= 1
+
+# Fonction pour annuler une requête en cours sur le serveur (connexion psycopg2 ou DuckDB)
+def cancel_inflight_call(call):
+    state = get_inflight_queries()
+    with state["lock"]:
+        if call["fini"].is_set() or call["abonnes"] > 0:
+            return False
+        call["annule"] = True
+        state["annulees"] += 1
+        conn, pid = call["connexion"], call["pid"]
+    if conn is None:
+        return True
+    try:
+        # psycopg2 : annulation par le protocole ; DuckDB : interruption de la connexion locale
+        if hasattr(conn, "cancel"):
+            conn.cancel()
+        else:
+            conn.interrupt()
+    except Exception:
+        if pid is None:
+            raise
+        # Repli : annulation par pg_cancel_backend depuis une autre connexion
+        admin = psycopg2.connect(**DB_CONFIG)
+        try:
+            admin.set_session(autocommit=True)
+            with admin.cursor() as cur:
+                cur.execute("SELECT pg_cancel_backend(%s)", (pid,))
+        finally:
+            admin.close()
+    return True
+
+# Fonction pour abandonner les requêtes d'arrière-plan lancées depuis une autre page de la session
+# (la requête n'est annulée que si aucune autre session ne l'attend)
+def cancel_stale_queries(page):
+    jobs = st.session_state.get("requetes_en_cours", {})
+    state = get_inflight_queries()
+    for key, (call, job_page) in list(jobs.items()):
+        if job_page == page:
+            continue
+        jobs.pop(key)
+        with state["lock"]:
+            call["abonnes"] -= 1
+        try:
+            cancel_inflight_call(call)
+        except Exception as e:
+            st.warning(f"Annulation de la requête impossible : {e}")
+
+# Fonction pour afficher l'erreur d'une requête (gestion d'erreur améliorée)
+def report_query_error(e, query_class=None):
+    if isinstance(e, (psycopg2.extensions.QueryCanceledError, TimeoutError)):
+        st.error(f"⏱️ Requête interrompue (délai de {timeout_for(query_class):.0f} s dépassé ou annulation) : {e}")
+    elif isinstance(e, psycopg2.OperationalError):
         st.error(f"Erreur de connexion PostgreSQL: {e}")
-        return pd.DataFrame()
-    except psycopg2.Error as e:
+    elif isinstance(e, psycopg2.Error):
         st.error(f"Erreur PostgreSQL: {e}")
-        return pd.DataFrame()
-    except Exception as e:
+    # Classes routées vers la base DuckDB locale (WASCAL_QUERY_ROUTES)
+    elif backend_for(query_class) == "duckdb":
+        st.error(f"Erreur DuckDB: {e}")
+    else:
         st.error(f"Erreur générale: {e}")
+
+# Fonction pour exécuter des requêtes avec cache (copie désérialisée à chaque appel).
+# Les erreurs sont levées hors du cache : un échec ou une annulation n'est jamais mis en cache.
+@st.cache_data(ttl=CACHE_TTL)
+def cached_query(query, params=None, query_class=None):
+    df = fetch_query(query, params, query_class)
+    mark_cache_entry_filled(cached_query, query, params, query_class)
+    return df
+
+# Registre des entrées de cache (fonction en cache et arguments), pour n'invalider que celles qui lisent une table modifiée
+# ("remplies" : date de calcul des entrées, pour ne passer en arrière-plan que sur un cache froid)
+@st.cache_resource
+def get_cache_registry():
+    return {"lock": threading.Lock(), "entrees": {}, "dependances": {}, "remplies": {}}
+
+# Fonction pour construire la clé d'une entrée de cache du registre
+def cache_entry_key(cached_func, query, *args):
+    return (cached_func.__name__, query, json.dumps(args, sort_keys=True, default=str))
+
+# Fonction pour enregistrer une entrée de cache et les tables dont elle dépend : tables lues par la requête
+# et depends_on (tables supplémentaires, par exemple les dimensions de décodage)
+def register_cache_entry(cached_func, query, *args, depends_on=()):
+    registry = get_cache_registry()
+    key = cache_entry_key(cached_func, query, *args)
+    with registry["lock"]:
+        registry["entrees"][key] = (cached_func, (query,) + args)
+        register_dependencies(registry["dependances"], key, query_tables(query) | set(depends_on))
+
+# Fonction pour noter qu'une entrée de cache vient d'être calculée (appelée depuis la fonction en cache)
+def mark_cache_entry_filled(cached_func, query, *args):
+    registry = get_cache_registry()
+    key = cache_entry_key(cached_func, query, *args)
+    with registry["lock"]:
+        registry["remplies"][key] = time.time()
+
+# Fonction pour savoir si une entrée de cache est encore chaude (calculée depuis moins de CACHE_TTL et non invalidée)
+def cache_entry_fresh(cached_func, query, *args):
+    registry = get_cache_registry()
+    key = cache_entry_key(cached_func, query, *args)
+    with registry["lock"]:
+        filled_at = registry["remplies"].get(key)
+        if filled_at is not None and time.time() - filled_at > CACHE_TTL:
+            registry["remplies"].pop(key)
+            filled_at = None
+    return filled_at is not None
+
+# Fonction pour exécuter une requête avec cache ; en cas d'erreur, message et résultat vide non mis en cache
+def run_query(query, params=None, query_class=None):
+    register_cache_entry(cached_query, query, params, query_class)
+    try:
+        # Single-flight en amont du cache : les appels simultanés d'une même requête attendent une seule lecture
+        return run_single_flight(inflight_key(query, params, query_class), lambda: cached_query(query, params, query_class))
+    except Exception as e:
+        report_query_error(e, query_class)
         return pd.DataFrame()
+
+# Fonction pour libérer le résultat d'arrière-plan d'une requête une fois la page servie
+# (il n'est pas adopté quand une autre session a déjà rempli le cache entre-temps)
+def release_background_result(query, params=None, query_class=None):
+    state = get_inflight_queries()
+    with state["lock"]:
+        state["termines"].pop(inflight_key(query, params, query_class), None)
+
+# Fonction pour lire une requête lourde : sur un cache froid, exécution en arrière-plan avec progression,
+# puis adoption du résultat par le cache
+def run_heavy_query(query, params=None, query_class=None, label="Chargement"):
+    if cache_entry_fresh(cached_query, query, params, query_class):
+        return run_query(query, params, query_class)
+    wait_in_background(query, params, query_class, label)
+    try:
+        return run_query(query, params, query_class)
     finally:
-        if conn:
+        release_background_result(query, params, query_class)
+
+# Dimension préparée pour le décodage des clés, chargée une fois par processus et invalidée à chaque modification
+@st.cache_resource(ttl=CACHE_TTL)
+def load_dimension_lookup(query, key, query_class=None):
+    return build_dimension_lookup(fetch_query(query, query_class=query_class), key)
+
+# Fonction pour obtenir les quatre dimensions en mémoire (clé entière -> attributs)
+def get_dimension_lookups(query_class=None):
+    lookups = {}
+    for key, query in DIMENSION_QUERIES.items():
+        register_cache_entry(load_dimension_lookup, query, key, query_class)
+        lookups[key] = load_dimension_lookup(query, key, query_class)
+    return lookups
+
+# Fonction pour décoder les clés d'un résultat de faits : une clé absente des dimensions en cache signale une
+# dimension périmée, rechargée une seule fois (reloaded) avant un second décodage
+def decode_with_current_dimensions(df, query_class=None, lookups=None, reloaded=None):
+    lookups = get_dimension_lookups(query_class) if lookups is None else lookups
+    reloaded = set() if reloaded is None else reloaded
+    missing = set()
+    decoded = decode_fact_keys(df, lookups, missing=missing)
+    stale = missing - reloaded
+    if stale:
+        for key in stale:
+            load_dimension_lookup.clear(DIMENSION_QUERIES[key], key, query_class)
+        reloaded.update(stale)
+        lookups.update(get_dimension_lookups(query_class))
+        decoded = decode_fact_keys(df, lookups)
+    return decoded
+
+# Fonction pour exécuter une requête de faits sans jointure (clés entières en cache) et décoder ses clés en catégories
+def run_fact_query(query, params=None, query_class=None):
+    df = run_query(query, params, query_class)
+    if df.empty:
+        return df
+    start = time.perf_counter()
+    try:
+        df = decode_with_current_dimensions(df, query_class)
+    except Exception as e:
+        report_query_error(e, query_class)
+        return pd.DataFrame()
+    record_perf(f"{query_class}.decodage_cles_ms", (time.perf_counter() - start) * 1000)
+    return df
+
+# Mesures de performance partagées entre sessions (nom -> dernières valeurs)
+PERF_HISTORY = 50
+
+@st.cache_resource
+def get_perf_stats():
+    return {"lock": threading.Lock(), "mesures": {}}
+
+# Fonction pour enregistrer une mesure de performance
+def record_perf(name, value):
+    stats = get_perf_stats()
+    with stats["lock"]:
+        stats["mesures"].setdefault(name, deque(maxlen=PERF_HISTORY)).append(value)
+
+# Fonction pour résumer les mesures de performance enregistrées
+def perf_summary():
+    stats = get_perf_stats()
+    with stats["lock"]:
+        rows = [
+            {
+                "mesure": name,
+                "n": len(values),
+                "dernière": values[-1],
+                "médiane": float(np.median(values)),
+                "max": max(values)
+            }
+            for name, values in sorted(stats["mesures"].items())
+        ]
+    return pd.DataFrame(rows)
+
+# Fonction pour déclarer un fragment Streamlit (réexécuté seul quand ses widgets changent) et chronométrer ses exécutions
+def timed_fragment(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
             try:
-                conn.close()
-            except:
-                pass
+                return func(*args, **kwargs)
+            finally:
+                record_perf(f"fragment.{name}_ms", (time.perf_counter() - start) * 1000)
+        return st.fragment(wrapper)
+    return decorator
+
+# Fonction pour verrouiller un DataFrame en écriture (une copie à la construction, tableaux numpy en lecture seule).
+# Les colonnes catégorielles gardent leur type : ce sont leurs codes qui sont verrouillés.
+def freeze_frame(df, copy=True):
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            codes = df[col].cat.codes.to_numpy(copy=copy)
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=df[col].dtype)
+            continue
+        values = df[col].to_numpy(copy=copy)
+        values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+# Nombre de sélections filtrées gardées en mémoire par résultat partagé
+SHARED_SELECTIONS_MAX = 8
+
+# Fonction pour construire un résultat partagé : faits verrouillés, index inversés et sélections mémorisées
+def shared_result(df, query_class=None, index_columns=()):
+    return {
+        "df": df,
+        "query_class": query_class,
+        "index": {col: build_inverted_index(df[col]) for col in index_columns if col in df.columns},
+        "selections": OrderedDict(),
+        "lock": threading.Lock()
+    }
+
+# Fonction pour charger un grand résultat partagé par toutes les sessions, sans désérialisation à chaque rerun.
+# Les erreurs sont levées hors du cache : un échec ou une annulation n'est jamais partagé.
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4)
+def load_shared_result(query, query_class=None, with_validity=False, index_columns=(), decode_keys=False):
+    df = fetch_query(query, query_class=query_class)
+    # Clés entières décodées une seule fois (catégories), faits les plus récents en tête
+    if decode_keys and not df.empty:
+        df = decode_with_current_dimensions(df, query_class)
+        if "date" in df.columns:
+            df = df.sort_values("date", ascending=False, kind="stable", ignore_index=True)
+    # Masque de validité des mesures calculé une seule fois au chargement
+    if with_validity and not df.empty:
+        df = add_validity_columns(df)
+    # Taille mesurée avant le verrouillage (memory_usage(deep=True) refuse les tableaux objet en lecture seule)
+    memory_mb = df.memory_usage(deep=True).sum() / 1e6
+    df = freeze_frame(df)
+    record_perf(f"{query_class}.memoire_partagee_mo", memory_mb)
+    mark_cache_entry_filled(load_shared_result, query, query_class, with_validity, index_columns, decode_keys)
+    return shared_result(df, query_class, index_columns)
+
+# Fonction pour obtenir un résultat partagé en mesurant le temps d'accès par rerun
+# (background_label : sur un cache froid, la requête s'exécute en arrière-plan avec ce libellé de progression)
+def get_shared_result(query, query_class=None, with_validity=False, index_columns=(), decode_keys=False, background_label=None):
+    args = (query_class, with_validity, tuple(index_columns), decode_keys)
+    background = background_label and not cache_entry_fresh(load_shared_result, query, *args)
+    if background:
+        wait_in_background(query, None, query_class, background_label)
+    start = time.perf_counter()
+    register_cache_entry(load_shared_result, query, *args, depends_on=query_tables(dimension_dependencies(query)) if decode_keys else ())
+    try:
+        shared = run_single_flight(inflight_key(query, None, query_class, *args), lambda: load_shared_result(query, *args))
+    except Exception as e:
+        report_query_error(e, query_class)
+        shared = shared_result(pd.DataFrame(), query_class)
+    finally:
+        if background:
+            release_background_result(query, None, query_class)
+    record_perf(f"{query_class}.acces_partage_ms", (time.perf_counter() - start) * 1000)
+    return shared
+
+# Fonction pour filtrer un résultat partagé par union/intersection des positions de l'index inversé.
+# filters : colonne -> valeurs retenues (None = pas de filtre) ; la sélection est mémorisée par signature.
+def select_shared_rows(shared, filters):
+    start = time.perf_counter()
+    df = shared["df"]
+    active = active_index_filters(shared["index"], filters, len(df))
+    if not active:
+        return df
+    signature = tuple(sorted(active))
+
+    with shared["lock"]:
+        if signature in shared["selections"]:
+            shared["selections"].move_to_end(signature)
+            record_perf(f"{shared['query_class']}.filtrage_ms", (time.perf_counter() - start) * 1000)
+            return shared["selections"][signature]
+
+    selection = freeze_frame(df.iloc[index_positions(shared["index"], active)], copy=False)
+
+    with shared["lock"]:
+        shared["selections"][signature] = selection
+        while len(shared["selections"]) > SHARED_SELECTIONS_MAX:
+            shared["selections"].popitem(last=False)
+    record_perf(f"{shared['query_class']}.filtrage_ms", (time.perf_counter() - start) * 1000)
+    return selection
 
 # Test de connexion initial
 def test_connection():
@@ -574,6 +1051,11 @@ def test_connection():
     except Exception as e:
         return False
 
+# Statut de connexion de la barre latérale, vérifié au plus une fois par minute
+@st.cache_data(ttl=60, show_spinner=False)
+def connection_status():
+    return test_connection()
+
 # PAGE DE CONNEXION COMPACTE - TOUT DANS UN SEUL CADRE
 def show_login_page():
     # Centrer le formulaire
@@ -646,20 +1128,137 @@ def show_connection_info():
         st.metric("Serveur", "AWS RDS")
         st.metric("Base", "postgres")
         st.metric("Région", "us-east-1")
+    
+    # Mesures par rerun (accès aux résultats partagés, désérialisation et mémoire évitées)
+    with st.expander("⏱️ Performances"):
+        df_perf = perf_summary()
+        if not df_perf.empty:
+            st.dataframe(df_perf.round(3), use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucune mesure enregistrée pour le moment")
+        
+        # Requêtes identiques simultanées servies par une seule exécution
+        inflight = get_inflight_queries()
+        with inflight["lock"]:
+            executions, partagees, en_vol = inflight["executions"], inflight["partagees"], len(inflight["en_vol"])
+            annulees = inflight["annulees"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Requêtes exécutées", f"{executions:,}")
+        col2.metric("Exécutions évitées", f"{partagees:,}")
+        col3.metric("En cours", en_vol)
+        col4.metric("Annulées", f"{annulees:,}")
+
+    with st.expander("🔔 Notifications de modification"):
+        if not NOTIFICATIONS_ENABLED:
+            st.info(f"Notifications désactivées (WASCAL_NOTIFICATIONS=1 pour les activer) : les caches expirent après {CACHE_TTL} s")
+        else:
+            listener = get_change_listener()
+            with listener["lock"]:
+                connecte = listener["connecte"]
+                erreur = listener["erreur"]
+                invalidations = listener["invalidations"]
+                derniere = listener["derniere_notification"]
+                tables = dict(listener["tables"])
+            if connecte:
+                st.success(f"✅ Écoute active (TTL de secours : {CACHE_TTL} s)")
+            else:
+                st.error(f"❌ Écoute interrompue : {erreur or 'connexion en cours'}")
+            st.write(f"**Entrées invalidées :** {invalidations:,}")
+            st.write(f"**Dernière notification :** {derniere.strftime('%d/%m/%Y %H:%M:%S') if derniere else 'aucune'}")
+            if tables:
+                st.dataframe(
+                    pd.DataFrame({"table": list(tables), "notifications": list(tables.values())}),
+                    use_container_width=True, hide_index=True
+                )
+
+# Délai avant de rouvrir la connexion d'écoute des notifications après une erreur (secondes)
+CHANGE_RECONNECT_DELAY = 30
+
+# Fonction pour invalider les entrées de cache qui dépendent des tables modifiées.
+# changes : table -> opérations reçues ; des insertions de faits seules complètent le cube au lieu de le reconstruire.
+def invalidate_changes(state, changes):
+    registry = state["registre"]
+    with registry["lock"]:
+        stale = pop_dependents(registry["dependances"], changes)
+        entries = [registry["entrees"].pop(key) for key in stale if key in registry["entrees"]]
+        for key in stale:
+            registry["remplies"].pop(key, None)
+    for cached_func, args in entries:
+        cached_func.clear(*args)
+
+    # Une insertion dans une dimension ne modifie aucun fait existant ; des insertions de faits seules complètent le cube
+    cube_sources = query_tables(QUERY_CUBE_SOURCE) | query_tables(dimension_dependencies(QUERY_CUBE_SOURCE))
+    cube_tables = [table for table in changes if table in cube_sources]
+    rebuild_cube = any(changes[table] != {"INSERT"} for table in cube_tables)
+    append_cube = "table_des_faits" in changes and not rebuild_cube
+    if rebuild_cube:
+        build_olap_cube.clear()
+
+    with state["lock"]:
+        if append_cube:
+            state["cube_a_completer"] = True
+        state["invalidations"] += len(entries)
+        state["derniere_notification"] = datetime.now()
+        for table in changes:
+            state["tables"][table] = state["tables"].get(table, 0) + 1
+
+# Fonction exécutée en arrière-plan : écoute du canal de notifications, reconnexion après une erreur
+def listen_changes_loop(state):
+    while True:
+        try:
+            with state["lock"]:
+                state["connecte"] = True
+                state["erreur"] = None
+            listen_changes(DB_CONFIG, lambda changes: invalidate_changes(state, changes))
+        except Exception as e:
+            with state["lock"]:
+                state["erreur"] = str(e)
+        with state["lock"]:
+            state["connecte"] = False
+        time.sleep(CHANGE_RECONNECT_DELAY)
+
+# État partagé de l'écoute des notifications (un seul thread pour tout le serveur)
+@st.cache_resource
+def get_change_listener():
+    state = {
+        "lock": threading.Lock(),
+        "registre": get_cache_registry(),
+        "connecte": False,
+        "erreur": None,
+        "invalidations": 0,
+        "derniere_notification": None,
+        "tables": {},
+        "cube_a_completer": False
+    }
+    threading.Thread(target=listen_changes_loop, args=(state,), daemon=True).start()
+    return state
+
+# Précision théorique des sketches HyperLogLog (log2m = 11, paramètre par défaut de l'extension hll)
+HLL_LOG2M = 11
+HLL_STANDARD_ERROR = 1.04 / np.sqrt(2 ** HLL_LOG2M)
+
+# Intervalle de réconciliation des KPI approximatifs avec les valeurs exactes (secondes)
+KPI_RECONCILE_INTERVAL = 3600
+
+# Disponibilité du mode approximatif (extension hll et sketches de sql/02_kpi_hll.sql, catalogue PostgreSQL),
+# vérifiée une fois par intervalle de réconciliation pour tout le serveur
+@st.cache_resource(ttl=KPI_RECONCILE_INTERVAL)
+def approximate_kpi_available():
+    try:
+        read_query(APPROX_METRIC_QUERIES["sources_actives"], db_config=DB_CONFIG, query_class="catalogue")
+        return True
+    except Exception:
+        return False
 
 # Fonction pour obtenir les métriques principales
-def get_main_metrics():
-    queries = {
-        "total_mesures": "SELECT COUNT(*) FROM wascal.table_des_faits;",
-        "sources_actives": "SELECT COUNT(DISTINCT id_source) FROM wascal.table_des_faits;",
-        "regions_couvertes": "SELECT COUNT(DISTINCT id_geographique) FROM wascal.table_des_faits;",
-        "derniere_maj": "SELECT MAX(date) FROM wascal.dim_temps dt JOIN wascal.table_des_faits tf ON dt.id_temps = tf.id_temps;"
-    }
+def get_main_metrics(approximate=False, skip=()):
+    queries = APPROX_METRIC_QUERIES if approximate else EXACT_METRIC_QUERIES
+    queries = {key: query for key, query in queries.items() if key not in skip}
     
     metrics = {}
     for key, query in queries.items():
         try:
-            result = run_query(query)
+            result = run_query(query, query_class="catalogue" if approximate else "kpi")
             if not result.empty and len(result.columns) > 0:
                 metrics[key] = result.iloc[0, 0]
             else:
@@ -668,34 +1267,483 @@ def get_main_metrics():
             metrics[key] = 0
     return metrics
 
-# Initialiser l'état de session
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
+# Fonction pour exécuter une requête scalaire hors du cache Streamlit (tâches de fond)
+def fetch_scalar(cursor, query):
+    cursor.execute(query)
+    row = cursor.fetchone()
+    return row[0] if row else None
 
-if "page" not in st.session_state:
-    st.session_state.page = "dashboard"
+# Tâche de fond : rafraîchit les sketches HLL et mesure l'écart avec les valeurs exactes
+def reconcile_kpi_loop(state):
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute("SELECT wascal.refresh_kpi_hll();")
+                # Sketches recalculés : les KPI approximatifs en cache sont invalidés (WASCAL_NOTIFICATIONS=1)
+                notify_change(cur, "kpi_hll_mensuel")
+                ecarts = {}
+                for key in ("total_mesures", "sources_actives", "regions_couvertes"):
+                    exact = fetch_scalar(cur, EXACT_METRIC_QUERIES[key]) or 0
+                    approx = fetch_scalar(cur, APPROX_METRIC_QUERIES[key]) or 0
+                    ecarts[key] = abs(approx - exact) / exact if exact else 0.0
+            with state["lock"]:
+                state["ecarts"] = ecarts
+                state["derniere_verification"] = datetime.now()
+                state["erreur"] = None
+        except Exception as e:
+            with state["lock"]:
+                state["erreur"] = str(e)
+        finally:
+            if conn:
+                try:
+                    conn.close()
+                except:
+                    pass
+        time.sleep(KPI_RECONCILE_INTERVAL)
 
-# LOGIQUE PRINCIPALE
-if not st.session_state.logged_in:
-    show_login_page()
-else:
-    # SIDEBAR AVEC NAVIGATION
-    # Test de connexion au démarrage
-    if test_connection():
-        st.sidebar.markdown("""
+# État partagé de la réconciliation (un seul thread pour tout le serveur)
+@st.cache_resource
+def get_kpi_reconciliation():
+    state = {"lock": threading.Lock(), "ecarts": {}, "derniere_verification": None, "erreur": None}
+    threading.Thread(target=reconcile_kpi_loop, args=(state,), daemon=True).start()
+    return state
+
+# Fonction pour construire l'indicateur de précision d'une tuile KPI
+def kpi_accuracy_label(key, approximate):
+    if not approximate:
+        return "Valeur exacte"
+    # Date la plus récente lue dans les sketches : exacte à leur dernier rafraîchissement
+    if key == "derniere_maj":
+        return f"≈ sketches rafraîchis toutes les {KPI_RECONCILE_INTERVAL // 60} min"
+    state = get_kpi_reconciliation()
+    with state["lock"]:
+        ecart = state["ecarts"].get(key)
+    base = "≈ statistiques catalogue" if key == "total_mesures" else f"≈ ±{HLL_STANDARD_ERROR:.1%} (HLL)"
+    if ecart is None:
+        return f"{base} · non vérifié"
+    return f"{base} · écart mesuré {ecart:.1%}"
+
+# Fonction pour calculer des agrégats d'une mesure par région.
+# Les partiels station × source sont lus une fois (sans filtre) ; un changement de filtre ne fait que les refusionner.
+def query_region_stats(measure, aggregates, regions=None, sources=None, geo_ids=None):
+    df_partials = run_fact_query(QUERY_GROUP_PARTIALS, query_class="analyse")
+    start = time.perf_counter()
+    df_stats = merge_region_stats(df_partials, measure, aggregates, regions, sources, geo_ids)
+    record_perf("analyse.fusion_partiels_ms", (time.perf_counter() - start) * 1000)
+    return df_stats
+
+# Fonction pour obtenir la valeur la plus récente d'une mesure par région (date puis id_fait)
+def query_region_latest(measure, regions=None, sources=None, geo_ids=None):
+    query, params = build_group_latest_query(measure)
+    df_latest = run_fact_query(query, params, query_class="analyse")
+    start = time.perf_counter()
+    df_recent = merge_region_latest(df_latest, measure, regions, sources, geo_ids)
+    record_perf("analyse.fusion_partiels_ms", (time.perf_counter() - start) * 1000)
+    return df_recent
+
+# Résolutions de la grille spatiale (niveau -> taille de cellule en degrés), cf. sql/03_geo_grille.sql
+GEO_GRID_LEVELS = {
+    1: 2.0,
+    2: 1.0,
+    3: 0.5,
+    4: 0.25,
+    5: 0.1
+}
+
+# Zoom à partir duquel la carte affiche les stations individuellement
+STATION_ZOOM_THRESHOLD = 9
+
+# Fonction pour choisir la résolution de grille adaptée au zoom de la carte
+def grid_level_for_zoom(zoom):
+    # Une carte au zoom z couvre environ 360 / 2^z degrés : on vise une dizaine de cellules en largeur
+    target_size = 360 / (2 ** zoom) / 10
+    return min(GEO_GRID_LEVELS, key=lambda niveau: abs(np.log(GEO_GRID_LEVELS[niveau] / target_size)))
+
+# Fonction pour récupérer les agrégats spatiaux précalculés d'un niveau de grille
+def query_geo_grid(niveau):
+    return run_query(QUERY_GEO_GRID, {'niveau': niveau}, query_class="geo")
+
+# Fonction pour obtenir l'empreinte de dim_geographique (change dès que la dimension est modifiée)
+def get_geo_dimension_version():
+    df = run_query(QUERY_GEO_DIMENSION_VERSION, query_class="geo")
+    return df.iloc[0, 0] if not df.empty else None
+
+# Index spatial des stations, reconstruit uniquement quand l'empreinte de la dimension change
+@st.cache_resource(max_entries=1)
+def build_station_index(version):
+    stations = run_query(QUERY_STATIONS, query_class="geo")
+    if stations.empty:
+        stations = pd.DataFrame(columns=['id_geographique', 'pays', 'region', 'commune', 'latitude', 'longitude'])
+    return StationIndex(stations)
+
+def get_station_index():
+    return build_station_index(get_geo_dimension_version())
+
+# Fonction pour ajouter au cube les faits d'une requête (lecture en flux sur PostgreSQL, clés décodées par bloc)
+def feed_olap_cube(olap_cube, query, params=None):
+    lookups, reloaded = get_dimension_lookups("analyse"), set()
+    if backend_for("analyse") == "duckdb":
+        olap_cube.add_chunk(decode_with_current_dimensions(duckdb_backend.read_query(query, params), "analyse", lookups, reloaded))
+    else:
+        for chunk in stream_query_chunks(query, params):
+            olap_cube.add_chunk(decode_with_current_dimensions(chunk, "analyse", lookups, reloaded))
+
+# Cube OLAP région × source × mois construit une fois par lecture en flux des faits (résumés et sketches KLL par mesure)
+@st.cache_resource(ttl=max(CACHE_TTL, 3600), max_entries=1)
+def build_olap_cube():
+    start = time.perf_counter()
+    olap_cube = OlapCube(MEASURE_COLUMNS)
+    # Erreur levée hors du cache : un cube partiel n'est jamais conservé
+    feed_olap_cube(olap_cube, QUERY_CUBE_SOURCE)
+    record_perf("cube.construction_s", time.perf_counter() - start)
+    return olap_cube
+
+# Fonction pour obtenir le cube, complété des faits insérés depuis la dernière notification (sans reconstruction)
+def get_olap_cube():
+    try:
+        olap_cube = build_olap_cube()
+    except Exception as e:
+        st.error(f"Erreur lors de la construction du cube: {e}")
+        return OlapCube(MEASURE_COLUMNS)
+    listener = get_change_listener() if NOTIFICATIONS_ENABLED else None
+    if listener is not None:
+        with listener["lock"]:
+            pending, listener["cube_a_completer"] = listener["cube_a_completer"], False
+        if pending:
+            start = time.perf_counter()
+            try:
+                with olap_cube.lock:
+                    feed_olap_cube(olap_cube, QUERY_CUBE_INCREMENT, {'dernier_id': olap_cube.last_id})
+            except Exception as e:
+                st.error(f"Erreur lors de la mise à jour du cube: {e}")
+            record_perf("cube.increment_ms", (time.perf_counter() - start) * 1000)
+    return olap_cube
+
+# Fragment des distributions d'une mesure : boîtes à moustaches par région et bande de percentiles par mois
+@timed_fragment("distributions")
+def show_distribution_panel(measures, regions=None, sources=None, geo_ids=None):
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">📦 Distributions par Région et par Mois</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    olap_cube = get_olap_cube()
+    measure = st.selectbox("Mesure", measures, key="distribution_measure")
+    
+    start = time.perf_counter()
+    df_regions = olap_cube.quantile_table(measure, by=("region",), regions=regions, sources=sources)
+    df_months = olap_cube.quantile_table(measure, by=("mois",), regions=regions, sources=sources)
+    record_perf("cube.fusion_ms", (time.perf_counter() - start) * 1000)
+    
+    if df_regions.empty:
+        st.info("Aucune donnée pour cette mesure")
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_box = figures.fig_boxplot_quantiles(df_regions, f"Distribution par région — {measure}", measure)
+        st.plotly_chart(fig_box, use_container_width=True)
+    
+    with col2:
+        fig_band = figures.fig_percentile_band(df_months, f"Percentiles mensuels — {measure}", measure)
+        st.plotly_chart(fig_band, use_container_width=True)
+    
+    # Le cube est agrégé par région : le filtre de zone ne s'y applique pas
+    note = " (filtre de zone non appliqué)" if geo_ids is not None else ""
+    st.caption(f"Quantiles approchés (sketches KLL) fusionnés sur {len(olap_cube.cells):,} cellules du cube{note}")
+
+# Fonction pour afficher le filtre de zone et renvoyer la boîte (lat_min, lat_max, lon_min, lon_max)
+def area_filter(station_index, key):
+    bounds = station_index.bounds()
+    if bounds is None:
+        return None
+    lat_min, lat_max, lon_min, lon_max = bounds
+    with st.expander("🗺️ Restreindre à une zone géographique"):
+        enabled = st.checkbox("Activer le filtre de zone", key=f"{key}_enabled")
+        lat_range = st.slider("Latitude", lat_min - 0.5, lat_max + 0.5, (lat_min, lat_max), step=0.05, key=f"{key}_lat")
+        lon_range = st.slider("Longitude", lon_min - 0.5, lon_max + 0.5, (lon_min, lon_max), step=0.05, key=f"{key}_lon")
+    if not enabled:
+        return None
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+# Fonction pour afficher le panneau des stations proches d'un lieu
+@timed_fragment("stations_proches")
+def show_nearby_stations(station_index, df_geo_detail):
+    if len(station_index) == 0:
+        return
+
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">📍 Stations Proches d'un Lieu</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        communes = sorted(station_index.stations['commune'].dropna().unique())
+        reference = st.selectbox("Lieu de référence", ["📌 Coordonnées personnalisées"] + communes)
+        if reference in communes:
+            station = station_index.stations[station_index.stations['commune'] == reference].iloc[0]
+            latitude, longitude = float(station['latitude']), float(station['longitude'])
+        else:
+            lat_col, lon_col = st.columns(2)
+            with lat_col:
+                latitude = st.number_input("Latitude", value=14.69, format="%.4f")
+            with lon_col:
+                longitude = st.number_input("Longitude", value=-17.44, format="%.4f")
+
+    with col2:
+        k = st.slider("Nombre de stations", min_value=1, max_value=min(20, len(station_index)), value=min(5, len(station_index)))
+
+    nearby = station_index.nearest(latitude, longitude, k=k)
+    nearby = nearby.merge(
+        df_geo_detail[['id_geographique', 'nb_mesures', 'temp_moyenne', 'pluie_moyenne']],
+        on='id_geographique',
+        how='left'
+    )
+    nearby['distance_km'] = nearby['distance_km'].round(1)
+    st.dataframe(
+        nearby[['commune', 'region', 'pays', 'distance_km', 'nb_mesures', 'temp_moyenne', 'pluie_moyenne']],
+        use_container_width=True
+    )
+
+# Taille des blocs lus par le curseur serveur lors des exports
+EXPORT_CHUNK_SIZE = 20000
+
+# Nombre maximal de lignes exportées : st.download_button sert un contenu complet en mémoire
+# (Streamlit ne sert pas de réponse en flux), le plafond borne donc la mémoire de chaque export
+EXPORT_MAX_ROWS = 500000
+
+# Fonction pour lire une requête par blocs (mémoire bornée) sur le moteur de sa classe : curseur côté serveur
+# PostgreSQL ou lecture par vecteurs DuckDB, avec le délai maximal de la classe
+def stream_query_chunks(query, params=None, chunk_size=EXPORT_CHUNK_SIZE, query_class="analyse"):
+    if backend_for(query_class) == "duckdb":
+        yield from duckdb_backend.stream_query(query, params, chunk_size=chunk_size, timeout=timeout_for(query_class))
+        return
+
+    timeout_ms = int(timeout_for(query_class) * 1000)
+    conn = psycopg2.connect(**DB_CONFIG, options=f"-c statement_timeout={timeout_ms}")
+    try:
+        with conn.cursor(name="wascal_export") as cur:
+            cur.itersize = chunk_size
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=[desc[0] for desc in cur.description])
+    finally:
+        conn.close()
+
+# Fonction pour normaliser les types d'un bloc (schéma stable d'un bloc à l'autre)
+def normalize_export_chunk(chunk, cols):
+    chunk = chunk[cols].copy()
+    for col in cols:
+        if col == 'date':
+            chunk[col] = pd.to_datetime(chunk[col])
+        elif DETAIL_COLUMNS[col].startswith('f.'):
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float64')
+        else:
+            chunk[col] = chunk[col].astype('string')
+    return chunk
+
+# Fonction pour écrire les données filtrées en CSV ou Parquet, bloc par bloc (au plus EXPORT_MAX_ROWS lignes)
+def export_filtered_data(cols, export_format, regions=None, sources=None, geo_ids=None):
+    query, params = build_detail_query(cols, regions, sources, page_size=EXPORT_MAX_ROWS + 1, geo_ids=geo_ids)
+    output = io.BytesIO()
+    writer = None
+    nb_rows = 0
+    truncated = False
+
+    try:
+        for chunk in stream_query_chunks(query, params):
+            # La ligne EXPORT_MAX_ROWS + 1 signale seulement que l'export est tronqué
+            if nb_rows + len(chunk) > EXPORT_MAX_ROWS:
+                chunk = chunk.iloc[:EXPORT_MAX_ROWS - nb_rows]
+                truncated = True
+            chunk = normalize_export_chunk(chunk, cols)
+            if export_format == "Parquet":
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                output.write(chunk.to_csv(index=False, header=nb_rows == 0).encode('utf-8'))
+            nb_rows += len(chunk)
+            if truncated:
+                break
+    except Exception:
+        output.close()
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if export_format == "CSV" and nb_rows == 0:
+        output.write((",".join(cols) + "\n").encode('utf-8'))
+    return output, nb_rows, truncated
+
+# Fonction pour libérer le fichier d'export de la session (après téléchargement, nouvel export ou changement de filtres)
+def close_export_file():
+    export_file = st.session_state.get('export_file')
+    if export_file is not None:
+        export_file[0].close()
+    st.session_state.export_file = None
+
+# Fonction pour afficher le panneau d'export des données filtrées
+@timed_fragment("export")
+def show_export_panel(cols, regions=None, sources=None, geo_ids=None):
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">📥 Export des Données Filtrées</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    formats = ["CSV", "Parquet"] if pa is not None else ["CSV"]
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        export_format = st.radio("Format", formats, horizontal=True, key="export_format")
+
+    signature = (tuple(cols), tuple(regions or []), tuple(sources or []), None if geo_ids is None else tuple(geo_ids), export_format)
+    if st.session_state.get('export_signature') != signature:
+        st.session_state.export_signature = signature
+        close_export_file()
+
+    with col2:
+        st.caption(f"Export limité à {EXPORT_MAX_ROWS:,} lignes (fichier préparé sur le serveur avant téléchargement)")
+        if st.button("⚙️ Préparer l'export", use_container_width=True):
+            close_export_file()
+            with st.spinner("Export en cours..."):
+                try:
+                    st.session_state.export_file = export_filtered_data(cols, export_format, regions, sources, geo_ids)
+                except Exception as e:
+                    report_query_error(e, "analyse")
+
+        if st.session_state.export_file is not None:
+            output, nb_rows, truncated = st.session_state.export_file
+            extension = "parquet" if export_format == "Parquet" else "csv"
+            if truncated:
+                st.warning(f"⚠️ Export tronqué aux {EXPORT_MAX_ROWS:,} lignes les plus récentes : affinez les filtres pour exporter le reste")
+            # Le fichier est libéré dès le téléchargement (le contenu est déjà servi par Streamlit)
+            st.download_button(
+                f"💾 Télécharger {nb_rows:,} lignes ({export_format})",
+                data=output.getvalue(),
+                file_name=f"wascal_export_{datetime.now():%Y%m%d_%H%M}.{extension}",
+                mime="application/octet-stream" if extension == "parquet" else "text/csv",
+                on_click=close_export_file,
+                use_container_width=True
+            )
+
+# Fonction pour récupérer une page du tableau détaillé
+def query_detail_page(cols, regions=None, sources=None, cursor=None, page_size=DETAIL_PAGE_SIZE, geo_ids=None):
+    query, params = build_detail_query(cols, regions, sources, cursor, page_size, geo_ids)
+    return run_query(query, params, query_class="analyse")
+
+# Fonction pour estimer le nombre total de lignes à partir du plan PostgreSQL (sans COUNT(*))
+def estimate_detail_count(cols, regions=None, sources=None, geo_ids=None):
+    query, params = build_detail_query(cols, regions, sources, page_size=None, geo_ids=geo_ids)
+    plan = run_query(f"EXPLAIN (FORMAT JSON) {query}", params, query_class="catalogue")
+    try:
+        plan_json = plan.iloc[0, 0]
+        if isinstance(plan_json, str):
+            plan_json = json.loads(plan_json)
+        # Le noeud racine est le LIMIT : on lit l'estimation de son noeud enfant
+        root = plan_json[0]['Plan']
+        node = root['Plans'][0] if root.get('Node Type') == 'Limit' and root.get('Plans') else root
+        return int(node['Plan Rows'])
+    except Exception:
+        return None
+
+# Fonction pour convertir la dernière ligne d'une page en curseur de pagination
+def detail_cursor_from_row(row):
+    cursor_date = row['date']
+    if hasattr(cursor_date, 'to_pydatetime'):
+        cursor_date = cursor_date.to_pydatetime()
+    return cursor_date, int(row['id_fait'])
+
+# Fonction pour afficher le tableau détaillé paginé
+@timed_fragment("tableau_detaille")
+def show_detail_table(cols, regions=None, sources=None, geo_ids=None):
+    # Réinitialiser la pagination quand les filtres ou les colonnes changent
+    signature = (tuple(cols), tuple(regions or []), tuple(sources or []), None if geo_ids is None else tuple(geo_ids))
+    if st.session_state.get('detail_signature') != signature:
+        st.session_state.detail_signature = signature
+        st.session_state.detail_cursors = [None]
+        st.session_state.detail_page_index = 0
+
+    page_index = st.session_state.detail_page_index
+    cursor = st.session_state.detail_cursors[page_index]
+    df_page = query_detail_page(cols, regions, sources, cursor, geo_ids=geo_ids)
+
+    if df_page.empty:
+        st.info("Aucune donnée détaillée pour les filtres sélectionnés")
+        return
+
+    has_next = len(df_page) == DETAIL_PAGE_SIZE
+
+    def go_next():
+        cursors = st.session_state.detail_cursors[:page_index + 1]
+        cursors.append(detail_cursor_from_row(df_page.iloc[-1]))
+        st.session_state.detail_cursors = cursors
+        st.session_state.detail_page_index = page_index + 1
+
+    def go_previous():
+        st.session_state.detail_page_index = max(page_index - 1, 0)
+
+    st.dataframe(
+        df_page[[col for col in cols if col in df_page.columns]],
+        use_container_width=True
+    )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+
+    with col1:
+        st.button("⬅️ Précédent", on_click=go_previous, disabled=page_index == 0, use_container_width=True)
+
+    with col2:
+        first_row = page_index * DETAIL_PAGE_SIZE + 1
+        page_label = f"Page {page_index + 1} — lignes {first_row:,} à {first_row + len(df_page) - 1:,}"
+        if st.checkbox("Afficher une estimation du nombre total de lignes", key="detail_show_estimate"):
+            estimate = estimate_detail_count(cols, regions, sources, geo_ids)
+            if estimate is not None:
+                page_label += f" sur environ {estimate:,}"
+        st.caption(page_label)
+
+    with col3:
+        st.button("Suivant ➡️", on_click=go_next, disabled=not has_next, use_container_width=True)
+
+# Fonction pour changer de page (rerun complet : le contenu principal est hors du fragment de la barre latérale)
+def change_page(page):
+    if st.session_state.page != page:
+        st.session_state.page = page
+        st.rerun()
+
+# SIDEBAR AVEC NAVIGATION (fragment : ses reruns ne touchent pas le contenu de la page)
+@timed_fragment("sidebar")
+def show_sidebar():
+    # Test de connexion (résultat mis en cache)
+    if connection_status():
+        st.markdown("""
         <div class="status-success">
             ✅ Connexion PostgreSQL OK
         </div>
         """, unsafe_allow_html=True)
     else:
-        st.sidebar.markdown("""
+        st.markdown("""
         <div class="status-error">
             ❌ Problème de connexion PostgreSQL
         </div>
         """, unsafe_allow_html=True)
     
     # Informations utilisateur dans sidebar
-    st.sidebar.markdown(f"""
+    st.markdown(f"""
     <div class="connection-info">
         <h4>👤 {st.session_state.username}</h4>
         <p>Session active</p>
@@ -703,727 +1751,864 @@ else:
     """, unsafe_allow_html=True)
     
     # Navigation par boutons fixes
-    if st.sidebar.button("🏠 Dashboard Principal", use_container_width=True):
-        st.session_state.page = "dashboard"
-    if st.sidebar.button("📊 Analyse par Type de Données", use_container_width=True):
-        st.session_state.page = "analyse"
-    if st.sidebar.button("🌍 Vue Géographique", use_container_width=True):
-        st.session_state.page = "geo"
-    if st.sidebar.button("📈 Tendances Temporelles", use_container_width=True):
-        st.session_state.page = "tendances"
-    if st.sidebar.button("📋 Sources de Données", use_container_width=True):
-        st.session_state.page = "sources"
-    if st.sidebar.button("🔌 Connexion", use_container_width=True):
-        st.session_state.page = "connexion"
+    if st.button("🏠 Dashboard Principal", use_container_width=True):
+        change_page("dashboard")
+    if st.button("📊 Analyse par Type de Données", use_container_width=True):
+        change_page("analyse")
+    if st.button("🌍 Vue Géographique", use_container_width=True):
+        change_page("geo")
+    if st.button("📈 Tendances Temporelles", use_container_width=True):
+        change_page("tendances")
+    if st.button("📋 Sources de Données", use_container_width=True):
+        change_page("sources")
+    if st.button("🔌 Connexion", use_container_width=True):
+        change_page("connexion")
 
-    page = st.session_state.page
+# Fragment des KPI du dashboard (bascule approximatif / exact)
+@timed_fragment("kpi")
+def show_kpi_strip():
+    # Métriques principales (mode approximatif : catalogue + HyperLogLog)
+    approx_requested = st.toggle("⚡ KPI approximatifs", value=True, help="Estimations rapides vérifiées périodiquement contre les valeurs exactes")
+    # Sans la migration sql/02 ou sans PostgreSQL (routage DuckDB), repli sur les requêtes exactes
+    approx_kpi = approx_requested and approximate_kpi_available()
+    if approx_requested and not approx_kpi:
+        st.caption("KPI approximatifs indisponibles (extension hll ou sketches absents) : valeurs exactes affichées")
+    # En mode exact, le total des mesures vient de la requête de répartition ci-dessous
+    metrics = get_main_metrics(approximate=approx_kpi, skip=() if approx_kpi else ("total_mesures",))
+    
+    # Total général tiré de la requête de répartition (même requête en cache que les graphiques)
+    _, _, total_mesures = split_dashboard_breakdown(run_query(QUERY_DASHBOARD_BREAKDOWN, query_class="dashboard"))
+    
+    # En mode exact, le total général remplace le COUNT(*) séparé
+    if not approx_kpi and total_mesures is not None:
+        metrics['total_mesures'] = total_mesures
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            label="📊 Total Mesures",
+            value=f"{metrics.get('total_mesures', 0):,}",
+            delta="Depuis le début"
+        )
+        st.caption(kpi_accuracy_label("total_mesures", approx_kpi))
+    
+    with col2:
+        st.metric(
+            label="🏢 Sources Actives",
+            value=f"{metrics.get('sources_actives', 0)}",
+            delta="ANACIM, ANSD, DAPSA..."
+        )
+        st.caption(kpi_accuracy_label("sources_actives", approx_kpi))
+    
+    with col3:
+        st.metric(
+            label="🌍 Régions Couvertes",
+            value=f"{metrics.get('regions_couvertes', 0)}",
+            delta="Zones géographiques"
+        )
+        st.caption(kpi_accuracy_label("regions_couvertes", approx_kpi))
+    
+    with col4:
+        st.metric(
+            label="📅 Dernière MAJ",
+            value=str(metrics.get('derniere_maj', 'N/A'))[:10] if metrics.get('derniere_maj') else 'N/A',
+            delta="Date la plus récente"
+        )
+        st.caption(kpi_accuracy_label("derniere_maj", approx_kpi))
 
-    # CONTENU DES PAGES
-    if page == "connexion":
-        show_connection_info()
+# Fragment de la page d'analyse : type d'analyse, filtres et graphiques.
+# Un changement de filtre ne réexécute que ce fragment (ni la barre latérale, ni le CSS, ni l'en-tête).
+@timed_fragment("analyse")
+def show_analyse_panel(analyse_shared):
+    # Sélection du type d'analyse
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">📊 Choisissez le type d'analyse</div>
+    </div>
+    """, unsafe_allow_html=True)
     
-    elif page == "dashboard":
-        # En-tête principal SEULEMENT sur dashboard
-        st.markdown("""
-        <div class="main-header">
-            <div class="main-title">🌍 WASCAL Data Warehouse</div>
-            <div class="main-subtitle">
-                Système de Reporting Intelligent pour les Données Climatiques et Agricoles d'Afrique de l'Ouest
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Container pour les métriques principales
-        st.markdown("""
-        <div class="metrics-container">
-            <div class="metrics-title">📈 Vue d'ensemble du Data Warehouse WASCAL</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Métriques principales
-        metrics = get_main_metrics()
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric(
-                label="📊 Total Mesures",
-                value=f"{metrics.get('total_mesures', 0):,}",
-                delta="Depuis le début"
+    analyse_type = st.selectbox(
+        "Type de données à analyser",
+        ["🌡️ Données Climatiques", "🌾 Données Agricoles", "💰 Données Économiques", "💧 Données Hydrologiques", "📊 Vue d'ensemble"]
+    )
+    
+    # Filtres
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">🔍 Filtres</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        regions_available = sorted(analyse_shared["index"]["region"])
+        if regions_available:
+            regions_selected = st.multiselect(
+                "Sélectionnez les régions",
+                options=regions_available,
+                default=regions_available
             )
-        
-        with col2:
-            st.metric(
-                label="🏢 Sources Actives",
-                value=f"{metrics.get('sources_actives', 0)}",
-                delta="ANACIM, ANSD, DAPSA..."
-            )
-        
-        with col3:
-            st.metric(
-                label="🌍 Régions Couvertes",
-                value=f"{metrics.get('regions_couvertes', 0)}",
-                delta="Zones géographiques"
-            )
-        
-        with col4:
-            st.metric(
-                label="📅 Dernière MAJ",
-                value=str(metrics.get('derniere_maj', 'N/A'))[:10] if metrics.get('derniere_maj') else 'N/A',
-                delta="Date la plus récente"
+        else:
+            st.warning("Aucune région disponible")
+            regions_selected = []
+    
+    with col2:
+        sources_available = sorted(analyse_shared["index"]["source"])
+        if sources_available:
+            sources_selected = st.multiselect(
+                "Sélectionnez les sources",
+                options=sources_available,
+                default=sources_available
             )
+        else:
+            st.warning("Aucune source disponible")
+            sources_selected = []
+    
+    # Filtres (mêmes filtres transmis aux requêtes de synthèse)
+    if regions_selected and sources_selected:
+        filter_regions, filter_sources = regions_selected, sources_selected
+    else:
+        filter_regions, filter_sources = None, None
+    
+    # Restriction optionnelle à une zone (index spatial des stations)
+    station_index = get_station_index()
+    zone = area_filter(station_index, key="analyse_zone")
+    if zone is not None:
+        filter_geo_ids = station_index.within_box(*zone)['id_geographique'].tolist()
+    else:
+        filter_geo_ids = None
+    
+    # Filtrage des données par l'index inversé (sélection mémorisée par signature de filtre)
+    df_filtered = select_shared_rows(analyse_shared, {
+        "region": filter_regions,
+        "source": filter_sources,
+        "id_geographique": filter_geo_ids
+    })
+    
+    if not df_filtered.empty:
         
-        # Container pour les graphiques de synthèse
-        st.markdown("""
-        <div class="section-container">
-            <div class="section-header">
-                <div class="section-title">📊 Analyses de Synthèse</div>
-                <div class="section-subtitle">Répartition des données par source et géographie</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Graphiques de synthèse avec BORDURES COLORÉES
-        col1, col2 = st.columns(2)
-        
-        with col1:
+        # DONNÉES CLIMATIQUES
+        if analyse_type == "🌡️ Données Climatiques":
             st.markdown("""
-            <div class="data-card">
+            <div class="section-container">
+                <div class="section-header">
+                    <div class="section-title">🌡️ Analyse des Données Climatiques</div>
+                </div>
+            </div>
             """, unsafe_allow_html=True)
             
-            st.subheader("📊 Répartition par Source de Données")
-            
-            query_sources = """
-            SELECT 
-                s.acronyme,
-                s.nom_source,
-                COUNT(*) as nb_mesures
-            FROM wascal.table_des_faits f
-            JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
-            GROUP BY s.acronyme, s.nom_source
-            ORDER BY nb_mesures DESC
-            """
-            df_sources = run_query(query_sources)
+            climat_cols = DOMAIN_MEASURES['Climatique']
+            # Lignes du domaine lues dans l'indicateur précalculé (pas de dropna sur tout l'extrait)
+            climat_data = df_filtered.loc[df_filtered[DOMAIN_FLAGS['Climatique']].to_numpy(), ['date', 'region', 'masque_mesures'] + climat_cols]
             
-            if not df_sources.empty:
-                fig_sources = px.pie(
-                    df_sources, 
-                    values='nb_mesures', 
-                    names='acronyme',
-                    title="Distribution des mesures par organisme",
-                    color_discrete_sequence=px.colors.qualitative.Set3
-                )
-                fig_sources.update_traces(textposition='inside', textinfo='percent+label')
-                fig_sources.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='#2c3e50'
+            if not climat_data.empty:
+                # Graphiques climatiques
+                fig_climat = make_subplots(
+                    rows=2, cols=2,
+                    subplot_titles=('Température (°C)', 'Pluviométrie (mm)', 'Humidité (%)', 'Vitesse du Vent (km/h)'),
+                    specs=[[{"secondary_y": False}, {"secondary_y": False}],
+                           [{"secondary_y": False}, {"secondary_y": False}]]
                 )
-                st.plotly_chart(fig_sources, use_container_width=True)
-            else:
-                st.info("Aucune donnée de source disponible")
                 
-            st.markdown("</div>", unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="data-card">
-            """, unsafe_allow_html=True)
-            
-            st.subheader("🌍 Répartition Géographique")
-            
-            query_geo = """
-            SELECT 
-                g.region,
-                COUNT(*) as nb_mesures
-            FROM wascal.table_des_faits f
-            JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
-            GROUP BY g.region
-            ORDER BY nb_mesures DESC
-            """
-            df_geo = run_query(query_geo)
-            
-            if not df_geo.empty:
-                fig_geo = px.bar(
-                    df_geo,
-                    x='region',
-                    y='nb_mesures',
-                    title="Nombre de mesures par région",
-                    color='nb_mesures',
-                    color_continuous_scale='viridis'
-                )
-                fig_geo.update_layout(
-                    xaxis_tickangle=-45,
+                # Température
+                temp_data = climat_data[has_measures(climat_data, ['temperature_celsius'])]
+                if not temp_data.empty:
+                    for region in temp_data['region'].unique():
+                        if pd.notna(region):
+                            region_data = temp_data[temp_data['region'] == region]
+                            fig_climat.add_trace(
+                                go.Scatter(x=region_data['date'], y=region_data['temperature_celsius'],
+                                         mode='lines+markers', name=f'{region}'),
+                                row=1, col=1
+                            )
+                
+                # Pluviométrie
+                pluie_data = climat_data[has_measures(climat_data, ['pluviometri_mm'])]
+                if not pluie_data.empty:
+                    for region in pluie_data['region'].unique():
+                        if pd.notna(region):
+                            region_data = pluie_data[pluie_data['region'] == region]
+                            fig_climat.add_trace(
+                                go.Bar(x=region_data['date'], y=region_data['pluviometri_mm'],
+                                      name=f'{region}', showlegend=False),
+                                row=1, col=2
+                            )
+                
+                # Humidité
+                humidite_data = climat_data[has_measures(climat_data, ['humidite_pourcentage'])]
+                if not humidite_data.empty:
+                    for region in humidite_data['region'].unique():
+                        if pd.notna(region):
+                            region_data = humidite_data[humidite_data['region'] == region]
+                            fig_climat.add_trace(
+                                go.Scatter(x=region_data['date'], y=region_data['humidite_pourcentage'],
+                                         mode='lines+markers', name=f'{region}', showlegend=False),
+                                row=2, col=1
+                            )
+                
+                # Vitesse du vent
+                vent_data = climat_data[has_measures(climat_data, ['vitesse_vent_kmh'])]
+                if not vent_data.empty:
+                    for region in vent_data['region'].unique():
+                        if pd.notna(region):
+                            region_data = vent_data[vent_data['region'] == region]
+                            fig_climat.add_trace(
+                                go.Scatter(x=region_data['date'], y=region_data['vitesse_vent_kmh'],
+                                         mode='lines+markers', name=f'{region}', showlegend=False),
+                                row=2, col=2
+                            )
+                
+                fig_climat.update_layout(
+                    height=600, 
+                    title_text="Analyse Climatique par Région",
                     plot_bgcolor='rgba(0,0,0,0)',
                     paper_bgcolor='rgba(0,0,0,0)',
                     font_color='#2c3e50'
                 )
-                st.plotly_chart(fig_geo, use_container_width=True)
-            else:
-                st.info("Aucune donnée géographique disponible")
+                st.plotly_chart(fig_climat, use_container_width=True)
                 
-            st.markdown("</div>", unsafe_allow_html=True)
-
-    # Sections conditionnelles basées sur les boutons
-    elif page == "analyse":
-        st.markdown("""
-        <div class="section-container">
-            <div class="section-header">
-                <div class="section-title">📊 Analyse des Données par Type</div>
-                <div class="section-subtitle">Exploration détaillée par catégorie de données</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Requête principale
-        query_data = """
-        SELECT 
-            t.date,
-            g.region,
-            g.commune,
-            g.pays,
-            f.temperature_celsius,
-            f.pluviometri_mm,
-            f.humidite_pourcentage,
-            f.vitesse_vent_kmh,
-            f.pib_regional_fcfa,
-            f.population_totale,
-            f.taux_chomage_pourcentage,
-            f.production_tonnes,
-            f.surface_cultivee_hectares,
-            f.rendement_tonne_par_hectare,
-            f.niveau_eau_metres,
-            f.debit_m3par_seconde,
-            f.qualite_eau_ph,
-            s.acronyme as source,
-            s.type_source,
-            td.categorie,
-            td.sous_categorie
-        FROM wascal.table_des_faits f
-        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
-        JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
-        JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
-        JOIN wascal.dim_type_donnees td ON f.id_type_donnees = td.id_type_donnees
-        ORDER BY t.date DESC
-        """
-        
-        df_data = run_query(query_data)
+                # Statistiques climatiques
+                st.markdown("""
+                <div class="chart-container">
+                    <div class="chart-title">📈 Statistiques Climatiques</div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    if not temp_data.empty:
+                        temp_stats = query_region_stats('temperature_celsius', ['mean', 'min', 'max'], filter_regions, filter_sources, filter_geo_ids).set_index('region').round(2)
+                        st.write("**Températures par région:**")
+                        st.dataframe(temp_stats)
+                
+                with col2:
+                    if not pluie_data.empty:
+                        pluie_stats = query_region_stats('pluviometri_mm', ['sum', 'mean'], filter_regions, filter_sources, filter_geo_ids).set_index('region').round(2)
+                        st.write("**Pluviométrie par région:**")
+                        st.dataframe(pluie_stats)
+                
+                # Anomalies de la sélection par rapport aux normales région × mois
+                df_anomalies = compute_anomalies(monthly_region_means(climat_data), get_climatology())
+                show_anomaly_charts(df_anomalies, key="analyse_anomalies")
+                
+                # Distributions par région et par mois (fusion des sketches du cube OLAP)
+                show_distribution_panel(climat_cols, filter_regions, filter_sources, filter_geo_ids)
+            else:
+                st.info("Aucune donnée climatique disponible pour les filtres sélectionnés")
         
-        if not df_data.empty:
-            # Sélection du type d'analyse
+        # DONNÉES AGRICOLES
+        elif analyse_type == "🌾 Données Agricoles":
             st.markdown("""
-            <div class="chart-container">
-                <div class="chart-title">📊 Choisissez le type d'analyse</div>
+            <div class="section-container">
+                <div class="section-header">
+                    <div class="section-title">🌾 Analyse des Données Agricoles</div>
+                </div>
             </div>
             """, unsafe_allow_html=True)
             
-            analyse_type = st.selectbox(
-                "Type de données à analyser",
-                ["🌡️ Données Climatiques", "🌾 Données Agricoles", "💰 Données Économiques", "💧 Données Hydrologiques", "📊 Vue d'ensemble"]
-            )
+            agricole_cols = DOMAIN_MEASURES['Agricole']
+            agricole_data = df_filtered.loc[df_filtered[DOMAIN_FLAGS['Agricole']].to_numpy(), ['date', 'region', 'masque_mesures'] + agricole_cols]
             
-            # Filtres
+            if not agricole_data.empty:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.markdown("""
+                    <div class="chart-container">
+                        <div class="chart-title">🌾 Production Agricole</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # Production agricole
+                    production_data = agricole_data[has_measures(agricole_data, ['production_tonnes'])]
+                    if not production_data.empty:
+                        production_sum = query_region_stats('production_tonnes', ['sum'], filter_regions, filter_sources, filter_geo_ids).rename(columns={'sum': 'production_tonnes'})
+                        fig_production = px.bar(
+                            production_sum,
+                            x='region',
+                            y='production_tonnes',
+                            title="Production Agricole Totale par Région (tonnes)",
+                            color='production_tonnes',
+                            color_continuous_scale='Greens'
+                        )
+                        fig_production.update_layout(
+                            xaxis_tickangle=-45,
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font_color='#2c3e50'
+                        )
+                        st.plotly_chart(fig_production, use_container_width=True)
+                
+                with col2:
+                    st.markdown("""
+                    <div class="chart-container">
+                        <div class="chart-title">🌾 Surface Cultivée</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # Surface cultivée
+                    surface_data = agricole_data[has_measures(agricole_data, ['surface_cultivee_hectares'])]
+                    if not surface_data.empty:
+                        surface_sum = query_region_stats('surface_cultivee_hectares', ['sum'], filter_regions, filter_sources, filter_geo_ids).rename(columns={'sum': 'surface_cultivee_hectares'})
+                        fig_surface = px.pie(
+                            surface_sum,
+                            values='surface_cultivee_hectares',
+                            names='region',
+                            title="Répartition des Surfaces Cultivées (hectares)"
+                        )
+                        fig_surface.update_layout(
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font_color='#2c3e50'
+                        )
+                        st.plotly_chart(fig_surface, use_container_width=True)
+                
+                # Rendement agricole
+                rendement_data = agricole_data[has_measures(agricole_data, ['rendement_tonne_par_hectare'])]
+                if not rendement_data.empty:
+                    st.markdown("""
+                    <div class="chart-container">
+                        <div class="chart-title">📊 Évolution du Rendement Agricole</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    fig_rendement = px.line(
+                        rendement_data,
+                        x='date',
+                        y='rendement_tonne_par_hectare',
+                        color='region',
+                        title="Rendement Agricole par Région (tonnes/hectare)"
+                    )
+                    fig_rendement.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font_color='#2c3e50'
+                    )
+                    st.plotly_chart(fig_rendement, use_container_width=True)
+            else:
+                st.info("Aucune donnée agricole disponible pour les filtres sélectionnés")
+        
+        # DONNÉES ÉCONOMIQUES
+        elif analyse_type == "💰 Données Économiques":
             st.markdown("""
-            <div class="chart-container">
-                <div class="chart-title">🔍 Filtres</div>
+            <div class="section-container">
+                <div class="section-header">
+                    <div class="section-title">💰 Analyse des Données Économiques</div>
+                </div>
             </div>
             """, unsafe_allow_html=True)
             
-            col1, col2 = st.columns(2)
+            economique_cols = DOMAIN_MEASURES['Économique']
+            economique_data = df_filtered.loc[df_filtered[DOMAIN_FLAGS['Économique']].to_numpy(), ['date', 'region', 'masque_mesures'] + economique_cols]
             
-            with col1:
-                regions_available = sorted([r for r in df_data['region'].dropna().unique() if pd.notna(r)])
-                if regions_available:
-                    regions_selected = st.multiselect(
-                        "Sélectionnez les régions",
-                        options=regions_available,
-                        default=regions_available
-                    )
-                else:
-                    st.warning("Aucune région disponible")
-                    regions_selected = []
-            
-            with col2:
-                sources_available = sorted([s for s in df_data['source'].dropna().unique() if pd.notna(s)])
-                if sources_available:
-                    sources_selected = st.multiselect(
-                        "Sélectionnez les sources",
-                        options=sources_available,
-                        default=sources_available
-                    )
-                else:
-                    st.warning("Aucune source disponible")
-                    sources_selected = []
-            
-            # Filtrage des données
-            if regions_selected and sources_selected:
-                df_filtered = df_data[
-                    (df_data['region'].isin(regions_selected)) &
-                    (df_data['source'].isin(sources_selected))
-                ]
-            else:
-                df_filtered = df_data
-            
-            if not df_filtered.empty:
+            if not economique_data.empty:
+                col1, col2 = st.columns(2)
                 
-                # DONNÉES CLIMATIQUES
-                if analyse_type == "🌡️ Données Climatiques":
+                with col1:
                     st.markdown("""
-                    <div class="section-container">
-                        <div class="section-header">
-                            <div class="section-title">🌡️ Analyse des Données Climatiques</div>
-                        </div>
+                    <div class="chart-container">
+                        <div class="chart-title">👥 Population</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    climat_cols = ['temperature_celsius', 'pluviometri_mm', 'humidite_pourcentage', 'vitesse_vent_kmh']
-                    climat_data = df_filtered[['date', 'region'] + climat_cols].copy()
-                    climat_data = climat_data.dropna(subset=climat_cols, how='all')
-                    
-                    if not climat_data.empty:
-                        # Graphiques climatiques
-                        fig_climat = make_subplots(
-                            rows=2, cols=2,
-                            subplot_titles=('Température (°C)', 'Pluviométrie (mm)', 'Humidité (%)', 'Vitesse du Vent (km/h)'),
-                            specs=[[{"secondary_y": False}, {"secondary_y": False}],
-                                   [{"secondary_y": False}, {"secondary_y": False}]]
+                    # Population
+                    pop_data = economique_data[has_measures(economique_data, ['population_totale'])]
+                    if not pop_data.empty:
+                        pop_recent = query_region_latest('population_totale', filter_regions, filter_sources, filter_geo_ids)
+                        fig_pop = px.bar(
+                            pop_recent,
+                            x='region',
+                            y='population_totale',
+                            title="Population Totale par Région",
+                            color='population_totale',
+                            color_continuous_scale='Blues'
                         )
-                        
-                        # Température
-                        temp_data = climat_data.dropna(subset=['temperature_celsius'])
-                        if not temp_data.empty:
-                            for region in temp_data['region'].unique():
-                                if pd.notna(region):
-                                    region_data = temp_data[temp_data['region'] == region]
-                                    fig_climat.add_trace(
-                                        go.Scatter(x=region_data['date'], y=region_data['temperature_celsius'],
-                                                 mode='lines+markers', name=f'{region}'),
-                                        row=1, col=1
-                                    )
-                        
-                        # Pluviométrie
-                        pluie_data = climat_data.dropna(subset=['pluviometri_mm'])
-                        if not pluie_data.empty:
-                            for region in pluie_data['region'].unique():
-                                if pd.notna(region):
-                                    region_data = pluie_data[pluie_data['region'] == region]
-                                    fig_climat.add_trace(
-                                        go.Bar(x=region_data['date'], y=region_data['pluviometri_mm'],
-                                              name=f'{region}', showlegend=False),
-                                        row=1, col=2
-                                    )
-                        
-                        # Humidité
-                        humidite_data = climat_data.dropna(subset=['humidite_pourcentage'])
-                        if not humidite_data.empty:
-                            for region in humidite_data['region'].unique():
-                                if pd.notna(region):
-                                    region_data = humidite_data[humidite_data['region'] == region]
-                                    fig_climat.add_trace(
-                                        go.Scatter(x=region_data['date'], y=region_data['humidite_pourcentage'],
-                                                 mode='lines+markers', name=f'{region}', showlegend=False),
-                                        row=2, col=1
-                                    )
-                        
-                        # Vitesse du vent
-                        vent_data = climat_data.dropna(subset=['vitesse_vent_kmh'])
-                        if not vent_data.empty:
-                            for region in vent_data['region'].unique():
-                                if pd.notna(region):
-                                    region_data = vent_data[vent_data['region'] == region]
-                                    fig_climat.add_trace(
-                                        go.Scatter(x=region_data['date'], y=region_data['vitesse_vent_kmh'],
-                                                 mode='lines+markers', name=f'{region}', showlegend=False),
-                                        row=2, col=2
-                                    )
-                        
-                        fig_climat.update_layout(
-                            height=600, 
-                            title_text="Analyse Climatique par Région",
+                        fig_pop.update_layout(
+                            xaxis_tickangle=-45,
                             plot_bgcolor='rgba(0,0,0,0)',
                             paper_bgcolor='rgba(0,0,0,0)',
                             font_color='#2c3e50'
                         )
-                        st.plotly_chart(fig_climat, use_container_width=True)
-                        
-                        # Statistiques climatiques
-                        st.markdown("""
-                        <div class="chart-container">
-                            <div class="chart-title">📈 Statistiques Climatiques</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            if not temp_data.empty:
-                                temp_stats = temp_data.groupby('region')['temperature_celsius'].agg(['mean', 'min', 'max']).round(2)
-                                st.write("**Températures par région:**")
-                                st.dataframe(temp_stats)
-                        
-                        with col2:
-                            if not pluie_data.empty:
-                                pluie_stats = pluie_data.groupby('region')['pluviometri_mm'].agg(['sum', 'mean']).round(2)
-                                st.write("**Pluviométrie par région:**")
-                                st.dataframe(pluie_stats)
-                    else:
-                        st.info("Aucune donnée climatique disponible pour les filtres sélectionnés")
+                        st.plotly_chart(fig_pop, use_container_width=True)
                 
-                # DONNÉES AGRICOLES
-                elif analyse_type == "🌾 Données Agricoles":
+                with col2:
                     st.markdown("""
-                    <div class="section-container">
-                        <div class="section-header">
-                            <div class="section-title">🌾 Analyse des Données Agricoles</div>
-                        </div>
+                    <div class="chart-container">
+                        <div class="chart-title">💰 PIB Régional</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    agricole_cols = ['production_tonnes', 'surface_cultivee_hectares', 'rendement_tonne_par_hectare']
-                    agricole_data = df_filtered[['date', 'region'] + agricole_cols].copy()
-                    agricole_data = agricole_data.dropna(subset=agricole_cols, how='all')
-                    
-                    if not agricole_data.empty:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">🌾 Production Agricole</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Production agricole
-                            production_data = agricole_data.dropna(subset=['production_tonnes'])
-                            if not production_data.empty:
-                                production_sum = production_data.groupby('region')['production_tonnes'].sum().reset_index()
-                                fig_production = px.bar(
-                                    production_sum,
-                                    x='region',
-                                    y='production_tonnes',
-                                    title="Production Agricole Totale par Région (tonnes)",
-                                    color='production_tonnes',
-                                    color_continuous_scale='Greens'
-                                )
-                                fig_production.update_layout(
-                                    xaxis_tickangle=-45,
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_production, use_container_width=True)
-                        
-                        with col2:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">🌾 Surface Cultivée</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Surface cultivée
-                            surface_data = agricole_data.dropna(subset=['surface_cultivee_hectares'])
-                            if not surface_data.empty:
-                                surface_sum = surface_data.groupby('region')['surface_cultivee_hectares'].sum().reset_index()
-                                fig_surface = px.pie(
-                                    surface_sum,
-                                    values='surface_cultivee_hectares',
-                                    names='region',
-                                    title="Répartition des Surfaces Cultivées (hectares)"
-                                )
-                                fig_surface.update_layout(
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_surface, use_container_width=True)
-                        
-                        # Rendement agricole
-                        rendement_data = agricole_data.dropna(subset=['rendement_tonne_par_hectare'])
-                        if not rendement_data.empty:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">📊 Évolution du Rendement Agricole</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            fig_rendement = px.line(
-                                rendement_data,
-                                x='date',
-                                y='rendement_tonne_par_hectare',
-                                color='region',
-                                title="Rendement Agricole par Région (tonnes/hectare)"
-                            )
-                            fig_rendement.update_layout(
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                font_color='#2c3e50'
-                            )
-                            st.plotly_chart(fig_rendement, use_container_width=True)
-                    else:
-                        st.info("Aucune donnée agricole disponible pour les filtres sélectionnés")
+                    # PIB régional
+                    pib_data = economique_data[has_measures(economique_data, ['pib_regional_fcfa'])]
+                    if not pib_data.empty:
+                        pib_recent = query_region_latest('pib_regional_fcfa', filter_regions, filter_sources, filter_geo_ids)
+                        fig_pib = px.bar(
+                            pib_recent,
+                            x='region',
+                            y='pib_regional_fcfa',
+                            title="PIB Régional (FCFA)",
+                            color='pib_regional_fcfa',
+                            color_continuous_scale='Oranges'
+                        )
+                        fig_pib.update_layout(
+                            xaxis_tickangle=-45,
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font_color='#2c3e50'
+                        )
+                        st.plotly_chart(fig_pib, use_container_width=True)
                 
-                # DONNÉES ÉCONOMIQUES
-                elif analyse_type == "💰 Données Économiques":
+                # Taux de chômage
+                chomage_data = economique_data[has_measures(economique_data, ['taux_chomage_pourcentage'])]
+                if not chomage_data.empty:
                     st.markdown("""
-                    <div class="section-container">
-                        <div class="section-header">
-                            <div class="section-title">💰 Analyse des Données Économiques</div>
-                        </div>
+                    <div class="chart-container">
+                        <div class="chart-title">📈 Évolution du Taux de Chômage</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    economique_cols = ['population_totale', 'pib_regional_fcfa', 'taux_chomage_pourcentage']
-                    economique_data = df_filtered[['date', 'region'] + economique_cols].copy()
-                    economique_data = economique_data.dropna(subset=economique_cols, how='all')
-                    
-                    if not economique_data.empty:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">👥 Population</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Population
-                            pop_data = economique_data.dropna(subset=['population_totale'])
-                            if not pop_data.empty:
-                                pop_recent = pop_data.groupby('region')['population_totale'].last().reset_index()
-                                fig_pop = px.bar(
-                                    pop_recent,
-                                    x='region',
-                                    y='population_totale',
-                                    title="Population Totale par Région",
-                                    color='population_totale',
-                                    color_continuous_scale='Blues'
-                                )
-                                fig_pop.update_layout(
-                                    xaxis_tickangle=-45,
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_pop, use_container_width=True)
-                        
-                        with col2:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">💰 PIB Régional</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # PIB régional
-                            pib_data = economique_data.dropna(subset=['pib_regional_fcfa'])
-                            if not pib_data.empty:
-                                pib_recent = pib_data.groupby('region')['pib_regional_fcfa'].last().reset_index()
-                                fig_pib = px.bar(
-                                    pib_recent,
-                                    x='region',
-                                    y='pib_regional_fcfa',
-                                    title="PIB Régional (FCFA)",
-                                    color='pib_regional_fcfa',
-                                    color_continuous_scale='Oranges'
-                                )
-                                fig_pib.update_layout(
-                                    xaxis_tickangle=-45,
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_pib, use_container_width=True)
-                        
-                        # Taux de chômage
-                        chomage_data = economique_data.dropna(subset=['taux_chomage_pourcentage'])
-                        if not chomage_data.empty:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">📈 Évolution du Taux de Chômage</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            fig_chomage = px.line(
-                                chomage_data,
-                                x='date',
-                                y='taux_chomage_pourcentage',
-                                color='region',
-                                title="Taux de Chômage par Région (%)"
-                            )
-                            fig_chomage.update_layout(
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                font_color='#2c3e50'
-                            )
-                            st.plotly_chart(fig_chomage, use_container_width=True)
-                    else:
-                        st.info("Aucune donnée économique disponible pour les filtres sélectionnés")
+                    fig_chomage = px.line(
+                        chomage_data,
+                        x='date',
+                        y='taux_chomage_pourcentage',
+                        color='region',
+                        title="Taux de Chômage par Région (%)"
+                    )
+                    fig_chomage.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font_color='#2c3e50'
+                    )
+                    st.plotly_chart(fig_chomage, use_container_width=True)
+            else:
+                st.info("Aucune donnée économique disponible pour les filtres sélectionnés")
+        
+        # DONNÉES HYDROLOGIQUES
+        elif analyse_type == "💧 Données Hydrologiques":
+            st.markdown("""
+            <div class="section-container">
+                <div class="section-header">
+                    <div class="section-title">💧 Analyse des Données Hydrologiques</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            hydro_cols = DOMAIN_MEASURES['Hydrologique']
+            hydro_data = df_filtered.loc[df_filtered[DOMAIN_FLAGS['Hydrologique']].to_numpy(), ['date', 'region', 'masque_mesures'] + hydro_cols]
+            
+            if not hydro_data.empty:
+                col1, col2 = st.columns(2)
                 
-                # DONNÉES HYDROLOGIQUES
-                elif analyse_type == "💧 Données Hydrologiques":
+                with col1:
                     st.markdown("""
-                    <div class="section-container">
-                        <div class="section-header">
-                            <div class="section-title">💧 Analyse des Données Hydrologiques</div>
-                        </div>
+                    <div class="chart-container">
+                        <div class="chart-title">🌊 Niveau d'Eau</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    hydro_cols = ['niveau_eau_metres', 'debit_m3par_seconde', 'qualite_eau_ph']
-                    hydro_data = df_filtered[['date', 'region'] + hydro_cols].copy()
-                    hydro_data = hydro_data.dropna(subset=hydro_cols, how='all')
-                    
-                    if not hydro_data.empty:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">🌊 Niveau d'Eau</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Niveau d'eau
-                            niveau_data = hydro_data.dropna(subset=['niveau_eau_metres'])
-                            if not niveau_data.empty:
-                                fig_niveau = px.line(
-                                    niveau_data,
-                                    x='date',
-                                    y='niveau_eau_metres',
-                                    color='region',
-                                    title="Évolution du Niveau d'Eau (mètres)"
-                                )
-                                fig_niveau.update_layout(
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_niveau, use_container_width=True)
-                        
-                        with col2:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">🌊 Débit d'Eau</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Débit d'eau
-                            debit_data = hydro_data.dropna(subset=['debit_m3par_seconde'])
-                            if not debit_data.empty:
-                                fig_debit = px.line(
-                                    debit_data,
-                                    x='date',
-                                    y='debit_m3par_seconde',
-                                    color='region',
-                                    title="Débit d'Eau (m³/seconde)"
-                                )
-                                fig_debit.update_layout(
-                                    plot_bgcolor='rgba(0,0,0,0)',
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    font_color='#2c3e50'
-                                )
-                                st.plotly_chart(fig_debit, use_container_width=True)
-                        
-                        # Qualité de l'eau
-                        qualite_data = hydro_data.dropna(subset=['qualite_eau_ph'])
-                        if not qualite_data.empty:
-                            st.markdown("""
-                            <div class="chart-container">
-                                <div class="chart-title">🧪 Qualité de l'Eau (pH)</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            fig_qualite = px.scatter(
-                                qualite_data,
-                                x='date',
-                                y='qualite_eau_ph',
-                                color='region',
-                                title="Évolution du pH de l'Eau par Région"
-                            )
-                            fig_qualite.update_layout(
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                font_color='#2c3e50'
-                            )
-                            st.plotly_chart(fig_qualite, use_container_width=True)
-                    else:
-                        st.info("Aucune donnée hydrologique disponible pour les filtres sélectionnés")
+                    # Niveau d'eau
+                    niveau_data = hydro_data[has_measures(hydro_data, ['niveau_eau_metres'])]
+                    if not niveau_data.empty:
+                        fig_niveau = px.line(
+                            niveau_data,
+                            x='date',
+                            y='niveau_eau_metres',
+                            color='region',
+                            title="Évolution du Niveau d'Eau (mètres)"
+                        )
+                        fig_niveau.update_layout(
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font_color='#2c3e50'
+                        )
+                        st.plotly_chart(fig_niveau, use_container_width=True)
                 
-                # VUE D'ENSEMBLE
-                elif analyse_type == "📊 Vue d'ensemble":
+                with col2:
                     st.markdown("""
-                    <div class="section-container">
-                        <div class="section-header">
-                            <div class="section-title">📊 Vue d'ensemble de toutes les données</div>
-                        </div>
+                    <div class="chart-container">
+                        <div class="chart-title">🌊 Débit d'Eau</div>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    # Comptage des données disponibles par type
-                    data_counts = {
-                        'Climatique': len(df_filtered.dropna(subset=['temperature_celsius', 'pluviometri_mm', 'humidite_pourcentage', 'vitesse_vent_kmh'], how='all')),
-                        'Agricole': len(df_filtered.dropna(subset=['production_tonnes', 'surface_cultivee_hectares', 'rendement_tonne_par_hectare'], how='all')),
-                        'Économique': len(df_filtered.dropna(subset=['population_totale', 'pib_regional_fcfa', 'taux_chomage_pourcentage'], how='all')),
-                        'Hydrologique': len(df_filtered.dropna(subset=['niveau_eau_metres', 'debit_m3par_seconde', 'qualite_eau_ph'], how='all'))
-                    }
-                    
-                    # Graphique de répartition
-                    df_counts = pd.DataFrame(list(data_counts.items()), columns=['Type', 'Nombre_mesures'])
-                    df_counts = df_counts[df_counts['Nombre_mesures'] > 0]
-                    
-                    if not df_counts.empty:
-                        fig_overview = px.pie(
-                            df_counts,
-                            values='Nombre_mesures',
-                            names='Type',
-                            title="Répartition des Mesures par Type de Données"
+                    # Débit d'eau
+                    debit_data = hydro_data[has_measures(hydro_data, ['debit_m3par_seconde'])]
+                    if not debit_data.empty:
+                        fig_debit = px.line(
+                            debit_data,
+                            x='date',
+                            y='debit_m3par_seconde',
+                            color='region',
+                            title="Débit d'Eau (m³/seconde)"
                         )
-                        fig_overview.update_layout(
+                        fig_debit.update_layout(
                             plot_bgcolor='rgba(0,0,0,0)',
                             paper_bgcolor='rgba(0,0,0,0)',
                             font_color='#2c3e50'
                         )
-                        st.plotly_chart(fig_overview, use_container_width=True)
-                        
-                        # Tableau récapitulatif
-                        st.markdown("""
-                        <div class="chart-container">
-                            <div class="chart-title">📋 Récapitulatif des données</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        st.dataframe(df_counts, use_container_width=True)
-                    else:
-                        st.info("Aucune donnée disponible pour créer la vue d'ensemble")
+                        st.plotly_chart(fig_debit, use_container_width=True)
                 
-                # Tableau des données détaillées
-                st.markdown("""
-                <div class="section-container">
-                    <div class="section-header">
-                        <div class="section-title">📋 Données Détaillées </div>
+                # Qualité de l'eau
+                qualite_data = hydro_data[has_measures(hydro_data, ['qualite_eau_ph'])]
+                if not qualite_data.empty:
+                    st.markdown("""
+                    <div class="chart-container">
+                        <div class="chart-title">🧪 Qualité de l'Eau (pH)</div>
                     </div>
+                    """, unsafe_allow_html=True)
+                    
+                    fig_qualite = px.scatter(
+                        qualite_data,
+                        x='date',
+                        y='qualite_eau_ph',
+                        color='region',
+                        title="Évolution du pH de l'Eau par Région"
+                    )
+                    fig_qualite.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font_color='#2c3e50'
+                    )
+                    st.plotly_chart(fig_qualite, use_container_width=True)
+            else:
+                st.info("Aucune donnée hydrologique disponible pour les filtres sélectionnés")
+        
+        # VUE D'ENSEMBLE
+        elif analyse_type == "📊 Vue d'ensemble":
+            st.markdown("""
+            <div class="section-container">
+                <div class="section-header">
+                    <div class="section-title">📊 Vue d'ensemble de toutes les données</div>
                 </div>
-                """, unsafe_allow_html=True)
-                
-                # Sélectionner les colonnes pertinentes selon le type d'analyse
-                if analyse_type == "🌡️ Données Climatiques":
-                    cols_to_show = ['date', 'region', 'commune', 'source', 'temperature_celsius', 'pluviometri_mm', 'humidite_pourcentage', 'vitesse_vent_kmh']
-                elif analyse_type == "🌾 Données Agricoles":
-                    cols_to_show = ['date', 'region', 'commune', 'source', 'production_tonnes', 'surface_cultivee_hectares', 'rendement_tonne_par_hectare']
-                elif analyse_type == "💰 Données Économiques":
-                    cols_to_show = ['date', 'region', 'commune', 'source', 'population_totale', 'pib_regional_fcfa', 'taux_chomage_pourcentage']
-                elif analyse_type == "💧 Données Hydrologiques":
-                    cols_to_show = ['date', 'region', 'commune', 'source', 'niveau_eau_metres', 'debit_m3par_seconde', 'qualite_eau_ph']
-                else:  # Vue d'ensemble
-                    cols_to_show = ['date', 'region', 'commune', 'source', 'type_source', 'categorie']
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Comptage des données disponibles par type
+            data_counts = {
+                domain: int(df_filtered[flag].sum())
+                for domain, flag in DOMAIN_FLAGS.items()
+            }
+            
+            # Graphique de répartition
+            df_counts = pd.DataFrame(list(data_counts.items()), columns=['Type', 'Nombre_mesures'])
+            df_counts = df_counts[df_counts['Nombre_mesures'] > 0]
+            
+            if not df_counts.empty:
+                fig_overview = px.pie(
+                    df_counts,
+                    values='Nombre_mesures',
+                    names='Type',
+                    title="Répartition des Mesures par Type de Données"
+                )
+                fig_overview.update_layout(
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font_color='#2c3e50'
+                )
+                st.plotly_chart(fig_overview, use_container_width=True)
                 
-                # Filtrer les colonnes existantes
-                cols_to_show = [col for col in cols_to_show if col in df_filtered.columns]
+                # Tableau récapitulatif
+                st.markdown("""
+                <div class="chart-container">
+                    <div class="chart-title">📋 Récapitulatif des données</div>
+                </div>
+                """, unsafe_allow_html=True)
+                st.dataframe(df_counts, use_container_width=True)
+            else:
+                st.info("Aucune donnée disponible pour créer la vue d'ensemble")
+            
+            # Corrélations entre les 13 mesures (calculées dans la base, en cache par jeu de filtres)
+            show_correlation_explorer(filter_regions, filter_sources, filter_geo_ids)
+        
+        # Tableau des données détaillées
+        st.markdown("""
+        <div class="section-container">
+            <div class="section-header">
+                <div class="section-title">📋 Données Détaillées </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Sélectionner les colonnes pertinentes selon le type d'analyse
+        if analyse_type == "🌡️ Données Climatiques":
+            cols_to_show = ['date', 'region', 'commune', 'source', 'temperature_celsius', 'pluviometri_mm', 'humidite_pourcentage', 'vitesse_vent_kmh']
+        elif analyse_type == "🌾 Données Agricoles":
+            cols_to_show = ['date', 'region', 'commune', 'source', 'production_tonnes', 'surface_cultivee_hectares', 'rendement_tonne_par_hectare']
+        elif analyse_type == "💰 Données Économiques":
+            cols_to_show = ['date', 'region', 'commune', 'source', 'population_totale', 'pib_regional_fcfa', 'taux_chomage_pourcentage']
+        elif analyse_type == "💧 Données Hydrologiques":
+            cols_to_show = ['date', 'region', 'commune', 'source', 'niveau_eau_metres', 'debit_m3par_seconde', 'qualite_eau_ph']
+        else:  # Vue d'ensemble
+            cols_to_show = ['date', 'region', 'commune', 'source', 'type_source', 'categorie']
+        
+        # Pagination côté serveur avec les filtres poussés dans la requête
+        show_detail_table(cols_to_show, filter_regions, filter_sources, filter_geo_ids)
+        
+        # Export des données filtrées (lecture par blocs via un curseur serveur)
+        show_export_panel(cols_to_show, filter_regions, filter_sources, filter_geo_ids)
+    else:
+        st.warning("Aucune donnée ne correspond aux filtres sélectionnés")
+
+# Fragment de la carte : agrégats par cellule de grille en dessous du seuil, stations individuelles au-delà
+@timed_fragment("carte")
+def show_geo_map(df_geo_detail, zone):
+    zoom = st.slider("🔍 Niveau de zoom", min_value=3, max_value=12, value=6)
+    niveau = grid_level_for_zoom(zoom)
+    df_grid = query_geo_grid(niveau) if zoom < STATION_ZOOM_THRESHOLD else pd.DataFrame()
+    if zone is not None and not df_grid.empty:
+        lat_min, lat_max, lon_min, lon_max = zone
+        df_grid = df_grid[
+            df_grid['latitude'].between(lat_min, lat_max) &
+            df_grid['longitude'].between(lon_min, lon_max)
+        ]
+    
+    if not df_grid.empty:
+        fig_map = figures.fig_grid_map(df_grid, GEO_GRID_LEVELS[niveau], zoom=zoom)
+    else:
+        fig_map = figures.fig_station_map(df_geo_detail, zoom=zoom)
+    
+    st.plotly_chart(fig_map, use_container_width=True)
+
+# Fragment de l'explorateur de corrélations entre mesures (toutes régions ou une région)
+@timed_fragment("correlations")
+def show_correlation_explorer(regions=None, sources=None, geo_ids=None):
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">🔗 Corrélations entre Mesures</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    query, params = build_correlation_query(regions, sources, geo_ids)
+    df_corr = run_query(query, params, query_class="analyse")
+    if df_corr.empty:
+        st.info("Pas assez de données pour calculer des corrélations")
+        return
+    
+    regions_corr = sorted(df_corr.loc[df_corr['toutes_regions'] == 0, 'region'].dropna())
+    choix = st.selectbox("Périmètre", ["Toutes les régions"] + regions_corr, key="correlation_region")
+    region = None if choix == "Toutes les régions" else choix
+    matrix = correlation_matrix(df_corr, region)
+    
+    if not matrix.empty:
+        fig_corr = figures.fig_correlation_heatmap(matrix, f"Corrélations (moyennes mensuelles par station) — {choix}")
+        st.plotly_chart(fig_corr, use_container_width=True)
+        nb_observations = df_corr.loc[(df_corr['toutes_regions'] == 1) if region is None else (df_corr['region'] == region), 'nb_observations'].iloc[0]
+        st.caption(f"{int(nb_observations):,} observations station × mois ; cases vides : moins de deux observations communes")
+    else:
+        st.info("Aucune corrélation disponible pour ce périmètre")
+
+# Fonction pour obtenir la table des normales climatiques (région × mois), calculée dans la base et mise en cache
+def get_climatology():
+    return run_query(QUERY_CLIMATOLOGY, query_class="tendances")
+
+# Fragment des graphiques d'anomalies (écart à la normale ou score z)
+@timed_fragment("anomalies")
+def show_anomaly_charts(df_anomalies, key):
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">🌡️ Anomalies par Rapport aux Normales Mensuelles</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if df_anomalies.empty:
+        st.info("Pas de normales climatiques disponibles")
+        return
+    
+    mode = st.radio("Afficher", ["Écart à la normale", "Score z"], horizontal=True, key=key)
+    score_z = mode == "Score z"
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        df_temp = df_anomalies.dropna(subset=['temperature_celsius'])
+        if not df_temp.empty:
+            fig_temp = figures.fig_anomalies(df_temp, 'temperature_celsius', "Anomalies de Température (°C)", score_z)
+            st.plotly_chart(fig_temp, use_container_width=True)
+        else:
+            st.info("Pas de données de température disponibles")
+    
+    with col2:
+        df_pluie = df_anomalies.dropna(subset=['pluviometri_mm'])
+        if not df_pluie.empty:
+            fig_pluie = figures.fig_anomalies(df_pluie, 'pluviometri_mm', "Anomalies de Pluviométrie (mm)", score_z)
+            st.plotly_chart(fig_pluie, use_container_width=True)
+        else:
+            st.info("Pas de données de pluviométrie disponibles")
+
+# Fragment de l'évolution temporelle, rééchantillonnée dans la base au pas de temps choisi
+@timed_fragment("evolution")
+def show_evolution_chart():
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">📊 Évolution des Variables Climatiques</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    granularite = st.selectbox(
+        "Pas de temps",
+        list(TEMPORAL_GRANULARITIES),
+        index=list(TEMPORAL_GRANULARITIES).index(TEMPORAL_DEFAULT_GRANULARITY),
+        format_func=lambda key: TEMPORAL_GRANULARITIES[key][0]
+    )
+    # Une requête (et une entrée de cache) par pas de temps
+    df_temporal = run_query(build_temporal_query(granularite), query_class="tendances")
+    
+    if not df_temporal.empty:
+        fig_evolution = figures.fig_evolution(df_temporal, TEMPORAL_GRANULARITIES[granularite][0])
+        st.plotly_chart(fig_evolution, use_container_width=True)
+        st.caption(f"Périodes affichées : {len(df_temporal):,}")
+    else:
+        st.info("Aucune donnée temporelle disponible")
+
+# Panneau qualité des données : scores par source et violations par règle (compteurs de quality.py)
+def show_quality_panel():
+    st.markdown("""
+    <div class="chart-container">
+        <div class="chart-title">🧪 Qualité des Données</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    df_violations = run_query(QUERY_QUALITY_VIOLATIONS, query_class="sources")
+    if df_violations.empty:
+        st.info("Aucune vérification de qualité enregistrée (python quality.py)")
+        return
+    
+    df_scores = quality_scores(df_violations).dropna(subset=['score'])
+    st.plotly_chart(figures.fig_quality_scores(df_scores), use_container_width=True)
+    
+    # Violations par règle et par source (règles sans aucune ligne vérifiée masquées)
+    df_regles = df_violations[df_violations['nb_verifies'] > 0].assign(
+        regle=lambda df: df['regle'].map(QUALITY_LABELS).fillna(df['regle'])
+    )
+    df_regles['taux_violation'] = (100 * df_regles['nb_violations'] / df_regles['nb_verifies']).round(3)
+    st.dataframe(
+        df_regles[['source', 'regle', 'nb_verifies', 'nb_violations', 'taux_violation']].rename(columns={
+            'source': 'Source', 'regle': 'Règle', 'nb_verifies': 'Lignes vérifiées',
+            'nb_violations': 'Violations', 'taux_violation': 'Taux (%)'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"Dernière vérification : {pd.to_datetime(df_violations['verifie_le']).max():%d/%m/%Y %H:%M}")
+
+# Initialiser l'état de session
+if "logged_in" not in st.session_state:
+    st.session_state.logged_in = False
+
+if "page" not in st.session_state:
+    st.session_state.page = "dashboard"
+
+# LOGIQUE PRINCIPALE
+if not st.session_state.logged_in:
+    show_login_page()
+else:
+    # Écoute des notifications de modification (invalidation ciblée des caches)
+    if NOTIFICATIONS_ENABLED:
+        get_change_listener()
+
+    # SIDEBAR AVEC NAVIGATION
+    with st.sidebar:
+        show_sidebar()
+
+    page = st.session_state.page
+
+    # Requêtes d'arrière-plan lancées depuis une autre page : annulées si plus personne ne les attend
+    cancel_stale_queries(page)
+
+    # CONTENU DES PAGES
+    if page == "connexion":
+        show_connection_info()
+    
+    elif page == "dashboard":
+        # En-tête principal SEULEMENT sur dashboard
+        st.markdown("""
+        <div class="main-header">
+            <div class="main-title">🌍 WASCAL Data Warehouse</div>
+            <div class="main-subtitle">
+                Système de Reporting Intelligent pour les Données Climatiques et Agricoles d'Afrique de l'Ouest
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Container pour les métriques principales
+        st.markdown("""
+        <div class="metrics-container">
+            <div class="metrics-title">📈 Vue d'ensemble du Data Warehouse WASCAL</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Métriques principales (fragment : basculer le mode ne réexécute que les KPI)
+        show_kpi_strip()
+        
+        # Répartitions du dashboard (source, région et total) en une seule requête
+        df_sources, df_geo, _ = split_dashboard_breakdown(run_query(QUERY_DASHBOARD_BREAKDOWN, query_class="dashboard"))
+        
+        # Container pour les graphiques de synthèse
+        st.markdown("""
+        <div class="section-container">
+            <div class="section-header">
+                <div class="section-title">📊 Analyses de Synthèse</div>
+                <div class="section-subtitle">Répartition des données par source et géographie</div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Graphiques de synthèse avec BORDURES COLORÉES
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("""
+            <div class="data-card">
+            """, unsafe_allow_html=True)
+            
+            st.subheader("📊 Répartition par Source de Données")
+            
+            if not df_sources.empty:
+                fig_sources = figures.fig_sources_pie(df_sources)
+                st.plotly_chart(fig_sources, use_container_width=True)
+            else:
+                st.info("Aucune donnée de source disponible")
                 
-                st.dataframe(
-                    df_filtered[cols_to_show].head(100),
-                    use_container_width=True
-                )
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown("""
+            <div class="data-card">
+            """, unsafe_allow_html=True)
+            
+            st.subheader("🌍 Répartition Géographique")
+            
+            if not df_geo.empty:
+                fig_geo = figures.fig_geo_bar(df_geo)
+                st.plotly_chart(fig_geo, use_container_width=True)
             else:
-                st.warning("Aucune donnée ne correspond aux filtres sélectionnés")
+                st.info("Aucune donnée géographique disponible")
+                
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    # Sections conditionnelles basées sur les boutons
+    elif page == "analyse":
+        st.markdown("""
+        <div class="section-container">
+            <div class="section-header">
+                <div class="section-title">📊 Analyse des Données par Type</div>
+                <div class="section-subtitle">Exploration détaillée par catégorie de données</div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Requête principale (résultat partagé en lecture seule entre les sessions)
+        analyse_shared = get_shared_result(
+            QUERY_ANALYSE_DATA, query_class="analyse", with_validity=True,
+            index_columns=("region", "source", "id_geographique"), decode_keys=True,
+            background_label="Chargement des données d'analyse"
+        )
+        df_data = analyse_shared["df"]
+        
+        if not df_data.empty:
+            show_analyse_panel(analyse_shared)
         else:
             st.info("Aucune donnée disponible dans la base de données")
 
@@ -1438,23 +2623,14 @@ else:
         """, unsafe_allow_html=True)
         
         # Données géographiques avec coordonnées
-        query_geo_detail = """
-        SELECT 
-            g.pays,
-            g.region,
-            g.commune,
-            g.latitude,
-            g.longitude,
-            COUNT(f.id_geographique) as nb_mesures,
-            AVG(f.temperature_celsius) as temp_moyenne,
-            AVG(f.pluviometri_mm) as pluie_moyenne
-        FROM wascal.dim_geographique g
-        LEFT JOIN wascal.table_des_faits f ON g.id_geographique = f.id_geographique
-        GROUP BY g.pays, g.region, g.commune, g.latitude, g.longitude
-        HAVING COUNT(f.id_geographique) > 0
-        """
+        df_geo_detail = run_query(QUERY_GEO_DETAIL, query_class="geo")
+        station_index = get_station_index()
         
-        df_geo_detail = run_query(query_geo_detail)
+        # Restriction optionnelle à une zone (index spatial des stations)
+        zone = area_filter(station_index, key="geo_zone")
+        if zone is not None and not df_geo_detail.empty:
+            zone_ids = station_index.within_box(*zone)['id_geographique']
+            df_geo_detail = df_geo_detail[df_geo_detail['id_geographique'].isin(zone_ids)]
         
         if not df_geo_detail.empty:
             # Carte interactive
@@ -1464,29 +2640,8 @@ else:
             </div>
             """, unsafe_allow_html=True)
             
-            fig_map = px.scatter_mapbox(
-                df_geo_detail,
-                lat="latitude",
-                lon="longitude",
-                hover_name="commune",
-                hover_data=["region", "nb_mesures", "temp_moyenne", "pluie_moyenne"],
-                color="nb_mesures",
-                size="nb_mesures",
-                color_continuous_scale="viridis",
-                zoom=6,
-                height=500,
-                title="Localisation des Stations de Mesure WASCAL"
-            )
-            
-            fig_map.update_layout(
-                mapbox_style="open-street-map",
-                margin={"r":0,"t":50,"l":0,"b":0},
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='#2c3e50'
-            )
-            
-            st.plotly_chart(fig_map, use_container_width=True)
+            # Carte (fragment : changer le zoom ne réexécute que la carte)
+            show_geo_map(df_geo_detail, zone)
             
             # Statistiques par région
             col1, col2 = st.columns(2)
@@ -1498,17 +2653,7 @@ else:
                 </div>
                 """, unsafe_allow_html=True)
                 
-                fig_region = px.treemap(
-                    df_geo_detail,
-                    path=['region', 'commune'],
-                    values='nb_mesures',
-                    title="Hiérarchie des Mesures par Zone"
-                )
-                fig_region.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='#2c3e50'
-                )
+                fig_region = figures.fig_region_treemap(df_geo_detail)
                 st.plotly_chart(fig_region, use_container_width=True)
             
             with col2:
@@ -1520,23 +2665,13 @@ else:
                 
                 df_temp_clean = df_geo_detail.dropna(subset=['temp_moyenne'])
                 if not df_temp_clean.empty:
-                    fig_temp_map = px.bar(
-                        df_temp_clean,
-                        x='commune',
-                        y='temp_moyenne',
-                        color='temp_moyenne',
-                        title="Température Moyenne par Commune",
-                        color_continuous_scale='RdYlBu_r'
-                    )
-                    fig_temp_map.update_layout(
-                        xaxis_tickangle=-45,
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font_color='#2c3e50'
-                    )
+                    fig_temp_map = figures.fig_commune_temperatures(df_temp_clean)
                     st.plotly_chart(fig_temp_map, use_container_width=True)
                 else:
                     st.info("Pas de données de température disponibles")
+            
+            # Stations proches d'un lieu
+            show_nearby_stations(station_index, df_geo_detail)
         else:
             st.info("Aucune donnée géographique disponible")
 
@@ -1550,68 +2685,14 @@ else:
         </div>
         """, unsafe_allow_html=True)
         
-        # Données temporelles
-        query_temporal = """
-        SELECT 
-            t.date,
-            t.annee,
-            t.mois,
-            t.saison,
-            AVG(f.temperature_celsius) as temp_moyenne,
-            SUM(f.pluviometri_mm) as pluie_totale,
-            AVG(f.humidite_pourcentage) as humidite_moyenne,
-            COUNT(*) as nb_mesures
-        FROM wascal.table_des_faits f
-        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
-        GROUP BY t.date, t.annee, t.mois, t.saison
-        ORDER BY t.date
-        """
-        
-        df_temporal = run_query(query_temporal)
+        # Données temporelles : niveaux saison et année × saison en une seule requête
+        df_grouping = run_query(QUERY_TEMPORAL, query_class="tendances")
         
-        if not df_temporal.empty:
-            # Évolution temporelle
-            st.markdown("""
-            <div class="chart-container">
-                <div class="chart-title">📊 Évolution des Variables Climatiques</div>
-            </div>
-            """, unsafe_allow_html=True)
+        if not df_grouping.empty:
+            df_saison, df_annee_saison = split_temporal_levels(df_grouping)
             
-            fig_evolution = make_subplots(
-                rows=3, cols=1,
-                subplot_titles=('Température Moyenne (°C)', 'Pluviométrie Totale (mm)', 'Humidité Moyenne (%)'),
-                vertical_spacing=0.08
-            )
-            
-            # Température
-            fig_evolution.add_trace(
-                go.Scatter(x=df_temporal['date'], y=df_temporal['temp_moyenne'],
-                         mode='lines+markers', name='Température', line=dict(color='red')),
-                row=1, col=1
-            )
-            
-            # Pluviométrie
-            fig_evolution.add_trace(
-                go.Bar(x=df_temporal['date'], y=df_temporal['pluie_totale'],
-                      name='Pluviométrie', marker_color='blue', showlegend=False),
-                row=2, col=1
-            )
-            
-            # Humidité
-            fig_evolution.add_trace(
-                go.Scatter(x=df_temporal['date'], y=df_temporal['humidite_moyenne'],
-                         mode='lines+markers', name='Humidité', line=dict(color='green'), showlegend=False),
-                row=3, col=1
-            )
-            
-            fig_evolution.update_layout(
-                height=700, 
-                title_text="Évolution Temporelle des Variables Climatiques",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='#2c3e50'
-            )
-            st.plotly_chart(fig_evolution, use_container_width=True)
+            # Évolution temporelle (fragment : changer le pas de temps ne réexécute que ce graphique)
+            show_evolution_chart()
             
             # Analyse saisonnière
             st.markdown("""
@@ -1622,13 +2703,6 @@ else:
             </div>
             """, unsafe_allow_html=True)
             
-            df_saison = df_temporal.groupby('saison').agg({
-                'temp_moyenne': 'mean',
-                'pluie_totale': 'sum',
-                'humidite_moyenne': 'mean',
-                'nb_mesures': 'sum'
-            }).reset_index()
-            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -1638,19 +2712,7 @@ else:
                 </div>
                 """, unsafe_allow_html=True)
                 
-                fig_saison_temp = px.bar(
-                    df_saison,
-                    x='saison',
-                    y='temp_moyenne',
-                    title="Température Moyenne par Saison",
-                    color='temp_moyenne',
-                    color_continuous_scale='RdYlBu_r'
-                )
-                fig_saison_temp.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='#2c3e50'
-                )
+                fig_saison_temp = figures.fig_saison_temperature(df_saison)
                 st.plotly_chart(fig_saison_temp, use_container_width=True)
             
             with col2:
@@ -1660,20 +2722,23 @@ else:
                 </div>
                 """, unsafe_allow_html=True)
                 
-                fig_saison_pluie = px.bar(
-                    df_saison,
-                    x='saison',
-                    y='pluie_totale',
-                    title="Pluviométrie Totale par Saison",
-                    color='pluie_totale',
-                    color_continuous_scale='Blues'
-                )
-                fig_saison_pluie.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='#2c3e50'
-                )
+                fig_saison_pluie = figures.fig_saison_pluie(df_saison)
                 st.plotly_chart(fig_saison_pluie, use_container_width=True)
+            
+            # Anomalies mensuelles par région par rapport aux normales région × mois
+            df_anomalies = compute_anomalies(run_query(QUERY_REGION_MONTHLY, query_class="tendances"), get_climatology())
+            show_anomaly_charts(df_anomalies, key="tendances_anomalies")
+            
+            # Saisons par année
+            if not df_annee_saison.empty:
+                st.markdown("""
+                <div class="chart-container">
+                    <div class="chart-title">📅 Saisons par Année</div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                fig_annee_saison = figures.fig_annee_saison(df_annee_saison)
+                st.plotly_chart(fig_annee_saison, use_container_width=True)
         else:
             st.info("Aucune donnée temporelle disponible")
 
@@ -1688,23 +2753,7 @@ else:
         """, unsafe_allow_html=True)
         
         # Informations sur les sources
-        query_sources_detail = """
-        SELECT 
-            s.nom_source,
-            s.acronyme,
-            s.type_source,
-            s.contact,
-            s.url,
-            s.date_derniere_maj,
-            COUNT(f.id_source) as nb_mesures_total,
-            COUNT(DISTINCT f.id_geographique) as nb_zones_couvertes
-        FROM wascal.dim_source_donnees s
-        LEFT JOIN wascal.table_des_faits f ON s.id_source = f.id_source
-        GROUP BY s.id_source, s.nom_source, s.acronyme, s.type_source, s.contact, s.url, s.date_derniere_maj
-        ORDER BY nb_mesures_total DESC
-        """
-        
-        df_sources_detail = run_query(query_sources_detail)
+        df_sources_detail = run_heavy_query(QUERY_SOURCES_DETAIL, query_class="sources", label="Chargement des sources")
         
         if not df_sources_detail.empty:
             # Vue d'ensemble des sources
@@ -1754,22 +2803,7 @@ else:
             </div>
             """, unsafe_allow_html=True)
             
-            fig_contrib = px.bar(
-                df_sources_detail,
-                x='nb_mesures_total',
-                y='acronyme',
-                orientation='h',
-                title="Nombre de Mesures par Source de Données",
-                color='nb_mesures_total',
-                color_continuous_scale='viridis'
-            )
-            
-            fig_contrib.update_layout(
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='#2c3e50'
-            )
+            fig_contrib = figures.fig_source_contribution(df_sources_detail)
             st.plotly_chart(fig_contrib, use_container_width=True)
             
             # Tableau détaillé
@@ -1786,6 +2820,8 @@ else:
                 ]],
                 use_container_width=True
             )
+            
+            show_quality_panel()
         else:
             st.info("Aucune information sur les sources disponible")
 
@@ -1800,4 +2836,7 @@ else:
             <p class="footer-text">🎓 Projet académique - Université de recherche WASCAL</p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+    
+    # Durée de l'exécution complète (à comparer aux reruns de fragments, page Connexion)
+    record_perf(f"rerun.{page}_ms", (time.perf_counter() - rerun_start) * 1000)
\ No newline at end of file
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+
+import plotly.io as pio
+
+import figures
+from warehouse import (
+    db_config_from_env, read_query, load_query_routes, QUERY_DASHBOARD_BREAKDOWN, QUERY_GEO_DETAIL, QUERY_TEMPORAL,
+    QUERY_SOURCES_DETAIL, TEMPORAL_GRANULARITIES, TEMPORAL_DEFAULT_GRANULARITY, build_temporal_query,
+    split_dashboard_breakdown, split_temporal_levels
+)
+
+# Rapport hebdomadaire sans Streamlit : mêmes requêtes et mêmes graphiques que app.py,
+# une page par processus, écrit sous forme de fichiers HTML et JSON statiques.
+#
+#   WASCAL_DB_PASSWORD=... python batch_report.py --output rapports/2024-S12
+#   python batch_report.py --routes "*=duckdb"   (hors ligne, sur la base DuckDB locale)
+
+PAGE_TITLES = {
+    "dashboard": "🏠 Dashboard Principal",
+    "geo": "🌍 Vue Géographique",
+    "tendances": "📈 Tendances Temporelles",
+    "sources": "📋 Sources de Données"
+}
+
+
+# Fonction pour construire les graphiques et tableaux du dashboard
+def build_dashboard(query):
+    df_sources, df_geo, total_mesures = split_dashboard_breakdown(query(QUERY_DASHBOARD_BREAKDOWN, query_class="dashboard"))
+    figs = {}
+    if not df_sources.empty:
+        figs["repartition_sources"] = figures.fig_sources_pie(df_sources)
+    if not df_geo.empty:
+        figs["repartition_regions"] = figures.fig_geo_bar(df_geo)
+    tables = {
+        "total_mesures": None if total_mesures is None else int(total_mesures),
+        "sources": df_sources,
+        "regions": df_geo
+    }
+    return figs, tables
+
+
+# Fonction pour construire les graphiques de la vue géographique
+def build_geo(query):
+    df_geo_detail = query(QUERY_GEO_DETAIL, query_class="geo")
+    figs = {}
+    if not df_geo_detail.empty:
+        figs["carte_stations"] = figures.fig_station_map(df_geo_detail)
+        figs["mesures_par_zone"] = figures.fig_region_treemap(df_geo_detail)
+        df_temp_clean = df_geo_detail.dropna(subset=['temp_moyenne'])
+        if not df_temp_clean.empty:
+            figs["temperatures_communes"] = figures.fig_commune_temperatures(df_temp_clean)
+    return figs, {"stations": df_geo_detail}
+
+
+# Fonction pour construire les graphiques des tendances temporelles
+def build_tendances(query):
+    df_grouping = query(QUERY_TEMPORAL, query_class="tendances")
+    if df_grouping.empty:
+        return {}, {}
+    df_saison, df_annee_saison = split_temporal_levels(df_grouping)
+    df_temporal = query(build_temporal_query(TEMPORAL_DEFAULT_GRANULARITY), query_class="tendances")
+    figs = {
+        "evolution": figures.fig_evolution(df_temporal, TEMPORAL_GRANULARITIES[TEMPORAL_DEFAULT_GRANULARITY][0]),
+        "temperature_saison": figures.fig_saison_temperature(df_saison),
+        "pluie_saison": figures.fig_saison_pluie(df_saison)
+    }
+    if not df_annee_saison.empty:
+        figs["saisons_par_annee"] = figures.fig_annee_saison(df_annee_saison)
+    return figs, {"saisons": df_saison, "annees_saisons": df_annee_saison}
+
+
+# Fonction pour construire les graphiques des sources de données
+def build_sources(query):
+    df_sources_detail = query(QUERY_SOURCES_DETAIL, query_class="sources")
+    figs = {}
+    if not df_sources_detail.empty:
+        figs["contribution_sources"] = figures.fig_source_contribution(df_sources_detail)
+    return figs, {"sources": df_sources_detail}
+
+
+PAGE_BUILDERS = {
+    "dashboard": build_dashboard,
+    "geo": build_geo,
+    "tendances": build_tendances,
+    "sources": build_sources
+}
+
+
+# Fonction exécutée dans un processus du pool : requêtes + graphiques d'une page, sérialisés en JSON
+def render_page(page, query):
+    start = time.perf_counter()
+    figs, tables = PAGE_BUILDERS[page](query)
+    return {
+        "page": page,
+        "figures": {name: fig.to_json() for name, fig in figs.items()},
+        "tables": {
+            name: json.loads(table.to_json(orient="records", date_format="iso")) if hasattr(table, "to_json") else table
+            for name, table in tables.items()
+        },
+        "duree_s": round(time.perf_counter() - start, 3)
+    }
+
+
+# Fonction pour écrire la page HTML d'un rapport (plotly.js chargé depuis le CDN)
+def write_page_html(result, output_dir):
+    parts = [f"<h1>{PAGE_TITLES[result['page']]}</h1>"]
+    for name, fig_json in result["figures"].items():
+        fig = pio.from_json(fig_json)
+        parts.append(pio.to_html(fig, full_html=False, include_plotlyjs="cdn", div_id=f"{result['page']}_{name}"))
+    html = "<html><head><meta charset='utf-8'><title>WASCAL - {}</title></head><body>{}</body></html>".format(
+        PAGE_TITLES[result["page"]], "\n".join(parts)
+    )
+    with open(os.path.join(output_dir, f"{result['page']}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+# Fonction pour écrire l'index du rapport
+def write_index(results, errors, output_dir, generated_at):
+    links = "\n".join(
+        f"<li><a href='{page}.html'>{PAGE_TITLES[page]}</a> ({results[page]['duree_s']} s)</li>"
+        for page in PAGE_TITLES if page in results
+    )
+    failures = "\n".join(f"<li>{PAGE_TITLES[page]} : {error}</li>" for page, error in errors.items())
+    html = (
+        "<html><head><meta charset='utf-8'><title>Rapport WASCAL</title></head><body>"
+        f"<h1>🌍 Rapport WASCAL Data Warehouse</h1><p>Généré le {generated_at:%d/%m/%Y %H:%M}</p>"
+        f"<ul>{links}</ul>"
+        + (f"<h2>Erreurs</h2><ul>{failures}</ul>" if failures else "")
+        + "</body></html>"
+    )
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def generate_report(output_dir, pages=None, workers=None, db_config=None, routes=None):
+    pages = pages or list(PAGE_BUILDERS)
+    routes = routes or load_query_routes()
+    if db_config is None and "postgres" in routes.values():
+        db_config = db_config_from_env()
+    # partial d'une fonction de module : sérialisable vers les processus du pool
+    query = partial(read_query, db_config=db_config, routes=routes)
+    os.makedirs(output_dir, exist_ok=True)
+    generated_at = datetime.now()
+    results, errors = {}, {}
+
+    with ProcessPoolExecutor(max_workers=workers or len(pages)) as pool:
+        futures = {pool.submit(render_page, page, query): page for page in pages}
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                results[page] = future.result()
+            except Exception as e:
+                errors[page] = str(e)
+
+    for result in results.values():
+        write_page_html(result, output_dir)
+        with open(os.path.join(output_dir, f"{result['page']}.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+
+    write_index(results, errors, output_dir, generated_at)
+    with open(os.path.join(output_dir, "rapport.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "genere_le": generated_at.isoformat(),
+            "pages": {page: result["duree_s"] for page, result in results.items()},
+            "erreurs": errors
+        }, f, ensure_ascii=False, indent=2)
+
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère le rapport statique HTML/JSON du Data Warehouse WASCAL")
+    parser.add_argument("--output", default=f"rapports/{datetime.now():%Y-%m-%d}", help="dossier de sortie du rapport")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGE_BUILDERS), help="pages à générer (toutes par défaut)")
+    parser.add_argument("--workers", type=int, help="nombre de processus (une page par processus par défaut)")
+    parser.add_argument("--routes", help="routage des classes de requêtes, ex. \"*=duckdb\" (défaut : WASCAL_QUERY_ROUTES)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    routes = load_query_routes(args.routes) if args.routes is not None else None
+    results, errors = generate_report(args.output, args.pages, args.workers, routes=routes)
+    for page, result in results.items():
+        print(f"✅ {page} : {len(result['figures'])} graphiques en {result['duree_s']} s")
+    for page, error in errors.items():
+        print(f"❌ {page} : {error}")
+    print(f"Rapport écrit dans {args.output} en {time.perf_counter() - start:.1f} s")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
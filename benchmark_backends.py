@@ -0,0 +1,93 @@
+import argparse
+import statistics
+import time
+
+from warehouse import (
+    db_config_from_env, read_query, QUERY_CLASSES, QUERY_DASHBOARD_BREAKDOWN, QUERY_GEO_DETAIL, QUERY_TEMPORAL,
+    QUERY_SOURCES_DETAIL, QUERY_ANALYSE_DATA, QUERY_GEO_GRID, QUERY_STATIONS, QUERY_GROUP_PARTIALS, EXACT_METRIC_QUERIES,
+    TEMPORAL_GRANULARITIES, QUERY_CLIMATOLOGY, QUERY_REGION_MONTHLY, build_detail_query, build_region_stats_query, build_region_latest_query,
+    build_group_latest_query, build_temporal_query, build_correlation_query
+)
+
+# Comparaison PostgreSQL / DuckDB de toutes les requêtes des pages, à données identiques
+# (la base DuckDB doit provenir d'une extraction récente : python duckdb_backend.py extract)
+#
+#   WASCAL_DB_PASSWORD=... python benchmark_backends.py --repetitions 5
+
+
+# Fonction pour lister les requêtes des pages : (nom, classe, requête, paramètres)
+def page_queries():
+    queries = [
+        (f"kpi.{key}", "kpi", query, None) for key, query in EXACT_METRIC_QUERIES.items()
+    ]
+    queries += [
+        ("dashboard.repartitions", "dashboard", QUERY_DASHBOARD_BREAKDOWN, None),
+        ("analyse.donnees", "analyse", QUERY_ANALYSE_DATA, None),
+        ("analyse.page_detail", "analyse") + build_detail_query(['date', 'region', 'commune', 'source', 'temperature_celsius']),
+        ("analyse.stats_temperature", "analyse") + build_region_stats_query('temperature_celsius', ['mean', 'min', 'max']),
+        ("analyse.stats_pluie", "analyse") + build_region_stats_query('pluviometri_mm', ['sum', 'mean']),
+        ("analyse.production", "analyse") + build_region_stats_query('production_tonnes', ['sum']),
+        ("analyse.surface", "analyse") + build_region_stats_query('surface_cultivee_hectares', ['sum']),
+        ("analyse.population_recente", "analyse") + build_region_latest_query('population_totale'),
+        ("analyse.pib_recent", "analyse") + build_region_latest_query('pib_regional_fcfa'),
+        ("analyse.partiels", "analyse", QUERY_GROUP_PARTIALS, None),
+        ("analyse.partiels_population", "analyse") + build_group_latest_query('population_totale'),
+        ("analyse.partiels_pib", "analyse") + build_group_latest_query('pib_regional_fcfa'),
+        ("analyse.correlations", "analyse") + build_correlation_query(),
+        ("geo.stations", "geo", QUERY_GEO_DETAIL, None),
+        ("geo.grille", "geo", QUERY_GEO_GRID, {'niveau': 3}),
+        ("geo.index_spatial", "geo", QUERY_STATIONS, None),
+        ("tendances.grouping_sets", "tendances", QUERY_TEMPORAL, None),
+        ("tendances.climatologie", "tendances", QUERY_CLIMATOLOGY, None),
+        ("tendances.mensuel_regions", "tendances", QUERY_REGION_MONTHLY, None),
+        ("sources.detail", "sources", QUERY_SOURCES_DETAIL, None)
+    ]
+    queries += [
+        (f"tendances.evolution_{granularite}", "tendances", build_temporal_query(granularite), None)
+        for granularite in TEMPORAL_GRANULARITIES
+    ]
+    return queries
+
+
+# Fonction pour mesurer le temps médian d'une requête sur un moteur
+def time_query(query, params, query_class, backend, db_config, repetitions):
+    routes = {name: backend for name in QUERY_CLASSES}
+    durations = []
+    nb_rows = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        df = read_query(query, params, db_config=db_config, query_class=query_class, routes=routes)
+        durations.append(time.perf_counter() - start)
+        nb_rows = len(df)
+    return statistics.median(durations), nb_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PostgreSQL / DuckDB des requêtes des pages")
+    parser.add_argument("--repetitions", type=int, default=3, help="exécutions par requête et par moteur")
+    parser.add_argument("--classes", nargs="+", choices=QUERY_CLASSES, help="classes de requêtes à mesurer")
+    args = parser.parse_args()
+
+    db_config = db_config_from_env()
+    print(f"{'requête':<30} {'postgres (ms)':>14} {'duckdb (ms)':>12} {'gain':>7}  lignes")
+    for name, query_class, query, params in page_queries():
+        if args.classes and query_class not in args.classes:
+            continue
+        results = {}
+        for backend in ("postgres", "duckdb"):
+            try:
+                results[backend] = time_query(query, params, query_class, backend, db_config, args.repetitions)
+            except Exception as e:
+                results[backend] = (None, f"erreur : {e}")
+
+        pg_time, pg_rows = results["postgres"]
+        duck_time, duck_rows = results["duckdb"]
+        pg_ms = f"{pg_time * 1000:.1f}" if pg_time is not None else "—"
+        duck_ms = f"{duck_time * 1000:.1f}" if duck_time is not None else "—"
+        gain = f"x{pg_time / duck_time:.1f}" if pg_time and duck_time else ""
+        rows = f"{pg_rows}" if pg_rows == duck_rows else f"{pg_rows} ≠ {duck_rows}"
+        print(f"{name:<30} {pg_ms:>14} {duck_ms:>12} {gain:>7}  {rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Précision par défaut des sketches KLL (erreur de rang ~ 1.7 / k)
+KLL_K = 128
+
+# Dimensions d'une cellule du cube
+CUBE_DIMENSIONS = ("region", "source", "mois")
+
+
+# Sketch de quantiles KLL fusionnable : niveaux de compacteurs, un élément du niveau h pèse 2^h
+class KLLSketch:
+    __slots__ = ("k", "levels", "rng")
+
+    def __init__(self, k=KLL_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return sum(len(level) << h for h, level in enumerate(self.levels))
+
+    # Capacité d'un niveau : décroissance géométrique (2/3) depuis le niveau le plus haut
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _retained(self):
+        return sum(len(level) for level in self.levels)
+
+    def _max_retained(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    # Compaction : on trie le premier niveau plein et on promeut un élément sur deux (décalage aléatoire)
+    def _compress(self):
+        while self._retained() > self._max_retained():
+            for h, level in enumerate(self.levels):
+                if len(level) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.empty(0))
+                    level = np.sort(level)
+                    # Un élément isolé (taille impaire) reste au niveau courant
+                    keep = level[-1:] if len(level) % 2 else level[:0]
+                    pairs = level[:len(level) - len(keep)]
+                    offset = int(self.rng.integers(2))
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], pairs[offset::2]])
+                    self.levels[h] = keep
+                    break
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+        return self
+
+    def copy(self):
+        sketch = KLLSketch(self.k)
+        sketch.levels = [level.copy() for level in self.levels]
+        return sketch
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs, dtype=float) * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+
+# Résumé fusionnable d'une mesure : effectif, somme, min/max, moments (Welford / Chan) et sketch KLL
+class MeasureSummary:
+    __slots__ = ("count", "total", "minimum", "maximum", "mean", "m2", "sketch")
+
+    def __init__(self, k=KLL_K):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = KLLSketch(k)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        batch = MeasureSummary.__new__(MeasureSummary)
+        batch.count = len(values)
+        batch.total = float(values.sum())
+        batch.minimum = float(values.min())
+        batch.maximum = float(values.max())
+        batch.mean = batch.total / batch.count
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.sketch = KLLSketch(self.sketch.k).update(values)
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def copy(self):
+        summary = MeasureSummary.__new__(MeasureSummary)
+        for name in ("count", "total", "minimum", "maximum", "mean", "m2"):
+            setattr(summary, name, getattr(self, name))
+        summary.sketch = self.sketch.copy()
+        return summary
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    def quantiles(self, qs):
+        return self.sketch.quantiles(qs)
+
+
+# Cube OLAP en mémoire : cellules région × source × mois, un résumé fusionnable par mesure.
+# Partagé entre sessions : les ajouts incrémentaux et les lectures passent par le même verrou.
+class OlapCube:
+    def __init__(self, measures, k=KLL_K):
+        self.measures = list(measures)
+        self.k = k
+        self.cells = {}
+        self.nb_rows = 0
+        # Plus grand id_fait intégré (point de reprise des ajouts incrémentaux)
+        self.last_id = 0
+        self.lock = threading.RLock()
+
+    # Ajout d'un bloc de faits (colonnes region, source, date et mesures) : une mise à jour par cellule et par mesure
+    def add_chunk(self, chunk):
+        if chunk.empty:
+            return self
+        dates = pd.to_datetime(chunk["date"])
+        keys = [chunk["region"], chunk["source"], dates.dt.to_period("M").rename("mois")]
+        with self.lock:
+            for key, group in chunk[self.measures].groupby(keys, sort=False, observed=True):
+                cell = self.cells.setdefault(key, {})
+                for measure in self.measures:
+                    values = group[measure].to_numpy(dtype=float, na_value=np.nan)
+                    if np.isnan(values).all():
+                        continue
+                    cell.setdefault(measure, MeasureSummary(self.k)).update(values)
+            self.nb_rows += len(chunk)
+            if "id_fait" in chunk:
+                self.last_id = max(self.last_id, int(chunk["id_fait"].max()))
+        return self
+
+    # Fusion des cellules retenues par les filtres, regroupées selon les dimensions demandées
+    def rollup(self, measure, by=("region",), regions=None, sources=None, months=None):
+        positions = [CUBE_DIMENSIONS.index(dimension) for dimension in by]
+        regions = set(regions) if regions else None
+        sources = set(sources) if sources else None
+        merged = {}
+        with self.lock:
+            for key, cell in self.cells.items():
+                summary = cell.get(measure)
+                if summary is None:
+                    continue
+                region, source, mois = key
+                if (regions is not None and region not in regions) or (sources is not None and source not in sources):
+                    continue
+                if months is not None and mois not in months:
+                    continue
+                group = tuple(key[position] for position in positions)
+                if group in merged:
+                    merged[group].merge(summary)
+                else:
+                    merged[group] = summary.copy()
+        return merged
+
+    # Statistiques de boîte à moustaches par groupe (quartiles et déciles issus des sketches)
+    def quantile_table(self, measure, by=("region",), regions=None, sources=None, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        rows = []
+        for group, summary in self.rollup(measure, by, regions, sources).items():
+            row = dict(zip(by, group))
+            row.update({
+                "nb": summary.count,
+                "moyenne": summary.mean,
+                "ecart_type": np.sqrt(summary.variance()),
+                "min": summary.minimum,
+                "max": summary.maximum
+            })
+            row.update({f"p{int(q * 100)}": value for q, value in zip(quantiles, summary.quantiles(quantiles))})
+            rows.append(row)
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values(list(by)).reset_index(drop=True)
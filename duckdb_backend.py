@@ -0,0 +1,322 @@
+import argparse
+import contextlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+# DuckDB est optionnel : sans lui, toutes les requêtes restent sur PostgreSQL
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Base DuckDB construite à partir des extractions périodiques du schéma wascal
+DUCKDB_PATH = os.environ.get("WASCAL_DUCKDB_PATH", "extracts/wascal.duckdb")
+
+# Tables extraites (la vue matérialisée geo_grille est copiée comme une table, cf. sql/03 et sql/06)
+EXTRACT_TABLES = [
+    "dim_temps",
+    "dim_geographique",
+    "dim_source_donnees",
+    "dim_type_donnees",
+    "table_des_faits",
+    "geo_grille",
+    "qualite_violations"
+]
+
+EXTRACT_CHUNK_SIZE = 50000
+
+# Types DuckDB des colonnes extraites, d'après le type PostgreSQL (les types absents sont extraits en texte).
+# Sans types explicites, une colonne entièrement nulle dans le premier bloc serait créée en INTEGER.
+PG_DUCKDB_TYPES = {
+    "smallint": "SMALLINT",
+    "integer": "INTEGER",
+    "bigint": "BIGINT",
+    "real": "REAL",
+    "double precision": "DOUBLE",
+    "numeric": "DOUBLE",
+    "boolean": "BOOLEAN",
+    "date": "DATE",
+    "timestamp without time zone": "TIMESTAMP",
+    "timestamp with time zone": "TIMESTAMPTZ",
+    "text": "VARCHAR",
+    "character varying": "VARCHAR",
+    "character": "VARCHAR",
+    "bytea": "BLOB"
+}
+
+# Colonnes d'une table ou d'une vue matérialisée (absente de information_schema.columns, d'où pg_attribute)
+QUERY_TABLE_COLUMNS = """
+SELECT a.attname, format_type(a.atttypid, NULL)
+FROM pg_attribute a
+WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attnum
+"""
+
+
+def is_available():
+    return duckdb is not None
+
+
+# Fonction pour traduire les paramètres psycopg2 (%(nom)s) en paramètres DuckDB ($nom)
+def translate_query(query):
+    return re.sub(r"%\((\w+)\)s", r"$\1", query)
+
+
+# Fonction pour ouvrir une base DuckDB sous le catalogue "entrepot" : ouvert directement, un fichier
+# wascal.duckdb deviendrait un catalogue "wascal" homonyme du schéma (références wascal.table ambiguës)
+def connect(path=None, read_only=True):
+    con = duckdb.connect()
+    path = (path or DUCKDB_PATH).replace("'", "''")
+    con.execute(f"ATTACH '{path}' AS entrepot{' (READ_ONLY)' if read_only else ''}")
+    con.execute("USE entrepot")
+    return con
+
+
+# Lignes d'un vecteur DuckDB (unité des blocs lus par fetch_df_chunk)
+VECTOR_SIZE = 2048
+
+
+# Délai maximal d'une requête DuckDB (secondes), équivalent du statement_timeout des connexions PostgreSQL :
+# la connexion est interrompue à l'échéance et l'interruption remonte en TimeoutError
+@contextlib.contextmanager
+def query_timeout(con, timeout=None):
+    expired = threading.Event()
+
+    def interrupt():
+        expired.set()
+        con.interrupt()
+
+    timer = threading.Timer(timeout, interrupt) if timeout else None
+    if timer is not None:
+        timer.start()
+    try:
+        yield
+    except duckdb.InterruptException as e:
+        # Une annulation explicite (con.interrupt() depuis un autre thread) remonte telle quelle
+        if expired.is_set():
+            raise TimeoutError(f"requête DuckDB interrompue après {timeout:g} s") from e
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+
+# Fonction pour exécuter une requête du schéma en étoile sur la base DuckDB locale
+# (on_connect(con) reçoit la connexion, interrompable par con.interrupt() ; timeout : délai maximal en secondes)
+def read_query(query, params=None, path=None, on_connect=None, timeout=None):
+    if duckdb is None:
+        raise RuntimeError("Le module duckdb n'est pas installé")
+    con = connect(path)
+    try:
+        if on_connect is not None:
+            on_connect(con)
+        with query_timeout(con, timeout):
+            return con.execute(translate_query(query), params or None).df()
+    finally:
+        con.close()
+
+
+# Fonction pour lire une requête par blocs d'environ chunk_size lignes (mémoire bornée, exports).
+# Le délai maximal porte sur toute la lecture.
+def stream_query(query, params=None, path=None, chunk_size=EXTRACT_CHUNK_SIZE, timeout=None):
+    if duckdb is None:
+        raise RuntimeError("Le module duckdb n'est pas installé")
+    con = connect(path)
+    try:
+        with query_timeout(con, timeout):
+            result = con.execute(translate_query(query), params or None)
+            while True:
+                chunk = result.fetch_df_chunk(max(1, chunk_size // VECTOR_SIZE))
+                if chunk.empty:
+                    break
+                yield chunk
+    finally:
+        con.close()
+
+
+# Fonction pour lire les colonnes d'une table wascal et leur type DuckDB
+def duckdb_columns(pg, table):
+    with pg.cursor() as cur:
+        cur.execute(QUERY_TABLE_COLUMNS, (f"wascal.{table}",))
+        return [(name, PG_DUCKDB_TYPES.get(pg_type, "VARCHAR")) for name, pg_type in cur.fetchall()]
+
+
+# Fonction pour copier les tables wascal de PostgreSQL dans un nouveau fichier DuckDB.
+# Le fichier est construit à côté puis remplace l'ancien d'un coup (les lecteurs ne voient jamais d'extraction partielle).
+def extract_tables(db_config, path=None, tables=EXTRACT_TABLES, chunk_size=EXTRACT_CHUNK_SIZE):
+    path = path or DUCKDB_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    con = connect(tmp_path, read_only=False)
+    pg = psycopg2.connect(**db_config)
+    counts = {}
+    try:
+        con.execute("CREATE SCHEMA IF NOT EXISTS wascal")
+        for table in tables:
+            counts[table] = 0
+            columns = duckdb_columns(pg, table)
+            definitions = ", ".join(f'"{name}" {duckdb_type}' for name, duckdb_type in columns)
+            con.execute(f"CREATE TABLE wascal.{table} ({definitions})")
+            names = ", ".join(f'"{name}"' for name, _ in columns)
+            with pg.cursor(name=f"extract_{table}") as cur:
+                cur.itersize = chunk_size
+                cur.execute(f"SELECT {names} FROM wascal.{table}")
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    chunk = pd.DataFrame(rows, columns=[name for name, _ in columns])
+                    con.register("chunk", chunk)
+                    con.execute(f"INSERT INTO wascal.{table} SELECT * FROM chunk")
+                    con.unregister("chunk")
+                    counts[table] += len(rows)
+            pg.commit()
+        con.execute("CREATE TABLE wascal.extraction AS SELECT now() AS extrait_le")
+    finally:
+        pg.close()
+        con.close()
+
+    os.replace(tmp_path, path)
+    return counts
+
+
+# Fonction pour construire une base DuckDB synthétique (même schéma) : fixture hors ligne sans RDS
+def build_fixture(path, nb_jours=120, seed=42):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range("2024-01-01", periods=nb_jours, freq="D")
+    dim_temps = pd.DataFrame({
+        "id_temps": np.arange(1, nb_jours + 1),
+        "date": dates.date,
+        "annee": dates.year,
+        "mois": dates.month,
+        "saison": np.where(dates.month.isin([6, 7, 8, 9, 10]), "Hivernage", "Saison sèche")
+    })
+    dim_geographique = pd.DataFrame({
+        "id_geographique": np.arange(1, 7),
+        "pays": "Sénégal",
+        "region": ["Dakar", "Dakar", "Thiès", "Thiès", "Saint-Louis", "Kaolack"],
+        "commune": ["Dakar-Plateau", "Pikine", "Thiès Nord", "Mbour", "Saint-Louis", "Kaolack"],
+        "latitude": [14.67, 14.75, 14.79, 14.42, 16.03, 14.15],
+        "longitude": [-17.43, -17.39, -16.93, -16.96, -16.49, -16.07]
+    })
+    dim_source_donnees = pd.DataFrame({
+        "id_source": np.arange(1, 6),
+        "nom_source": [
+            "Agence Nationale de l'Aviation Civile et de la Météorologie",
+            "Agence Nationale de la Statistique et de la Démographie",
+            "Direction de l'Analyse, de la Prévision et des Statistiques Agricoles",
+            "Institut Sénégalais de Recherches Agricoles",
+            "Direction de la Gestion et de la Planification des Ressources en Eau"
+        ],
+        "acronyme": ["ANACIM", "ANSD", "DAPSA", "ISRA", "DGPRE"],
+        "type_source": ["Météorologie", "Statistiques", "Agriculture", "Recherche agricole", "Ressources en eau"],
+        # Colonnes texte partiellement renseignées (une colonne entièrement nulle serait typée INTEGER par DuckDB)
+        "contact": ["contact@anacim.sn", None, None, "contact@isra.sn", None],
+        "url": ["https://www.anacim.sn", "https://www.ansd.sn", None, "https://www.isra.sn", None],
+        "date_derniere_maj": pd.Timestamp("2024-05-01")
+    })
+    dim_type_donnees = pd.DataFrame({
+        "id_type_donnees": np.arange(1, 5),
+        "categorie": ["Climatique", "Économique", "Agricole", "Hydrologique"],
+        "sous_categorie": ["Station", "Recensement", "Campagne", "Bassin"]
+    })
+
+    # Une mesure par jour, station et source ; chaque source ne renseigne que ses variables
+    faits = pd.MultiIndex.from_product(
+        [dim_temps["id_temps"], dim_geographique["id_geographique"], dim_source_donnees["id_source"]],
+        names=["id_temps", "id_geographique", "id_source"]
+    ).to_frame(index=False)
+    n = len(faits)
+    source = faits["id_source"].to_numpy()
+
+    def measure(source_id, values):
+        return np.where(source == source_id, values, np.nan)
+
+    # Campagnes agricoles (DAPSA, ISRA) : production, surface et rendement sur la même ligne
+    agricole = np.isin(source, [3, 4])
+    surface = rng.uniform(50, 2000, n)
+    production = surface * rng.uniform(0.5, 3, n)
+
+    table_des_faits = faits.assign(
+        id_fait=np.arange(1, n + 1),
+        id_type_donnees=np.select([source == 1, source == 2, source == 5], [1, 2, 4], default=3),
+        temperature_celsius=measure(1, rng.normal(28, 3, n)),
+        pluviometri_mm=measure(1, rng.gamma(0.6, 8, n)),
+        humidite_pourcentage=measure(1, rng.uniform(30, 95, n)),
+        vitesse_vent_kmh=measure(1, rng.uniform(2, 30, n)),
+        pib_regional_fcfa=measure(2, rng.uniform(5e10, 5e11, n)),
+        population_totale=measure(2, rng.integers(100000, 3000000, n)),
+        taux_chomage_pourcentage=measure(2, rng.uniform(5, 25, n)),
+        production_tonnes=np.where(agricole, production, np.nan),
+        surface_cultivee_hectares=np.where(agricole, surface, np.nan),
+        rendement_tonne_par_hectare=np.where(agricole, production / surface * rng.normal(1, 0.02, n), np.nan),
+        niveau_eau_metres=measure(5, rng.uniform(1, 12, n)),
+        debit_m3par_seconde=measure(5, rng.uniform(10, 800, n)),
+        qualite_eau_ph=measure(5, rng.uniform(6, 8.5, n))
+    )
+    # Quelques valeurs impossibles pour le panneau qualité de la page Sources
+    aberrant = rng.random(n) < 0.002
+    table_des_faits.loc[aberrant & (source == 1), "humidite_pourcentage"] = 104.0
+    table_des_faits.loc[aberrant & (source == 1), "pluviometri_mm"] = -2.5
+    table_des_faits.loc[aberrant & (source == 5), "qualite_eau_ph"] = 14.6
+    table_des_faits.loc[aberrant & agricole, "rendement_tonne_par_hectare"] *= 3
+
+    con = connect(path, read_only=False)
+    try:
+        con.execute("CREATE SCHEMA wascal")
+        for name, df in [
+            ("dim_temps", dim_temps),
+            ("dim_geographique", dim_geographique),
+            ("dim_source_donnees", dim_source_donnees),
+            ("dim_type_donnees", dim_type_donnees),
+            ("table_des_faits", table_des_faits)
+        ]:
+            con.register("frame", df)
+            con.execute(f"CREATE TABLE wascal.{name} AS SELECT * FROM frame")
+            con.unregister("frame")
+        con.execute(open(os.path.join(os.path.dirname(__file__), "sql", "duckdb_geo_grille.sql"), encoding="utf-8").read())
+        # Compteurs de qualité calculés par la même vérification SQL par blocs que sur PostgreSQL
+        from quality import scan_quality
+        qualite_violations = scan_quality(lambda query, params: con.execute(translate_query(query), params).df())
+        qualite_violations["verifie_le"] = pd.Timestamp.now()
+        con.register("frame", qualite_violations)
+        con.execute("CREATE TABLE wascal.qualite_violations AS SELECT * FROM frame")
+        con.unregister("frame")
+        con.execute("CREATE TABLE wascal.extraction AS SELECT now() AS extrait_le")
+    finally:
+        con.close()
+    return len(table_des_faits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Base DuckDB locale du Data Warehouse WASCAL")
+    parser.add_argument("commande", choices=["extract", "fixture"], help="extract : copie depuis PostgreSQL, fixture : données synthétiques")
+    parser.add_argument("--path", default=DUCKDB_PATH, help="fichier DuckDB à écrire")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.commande == "extract":
+        from warehouse import db_config_from_env
+        counts = extract_tables(db_config_from_env(), args.path)
+        for table, count in counts.items():
+            print(f"✅ wascal.{table} : {count:,} lignes")
+    else:
+        count = build_fixture(args.path)
+        print(f"✅ Fixture : {count:,} faits synthétiques")
+    print(f"Base écrite dans {args.path} en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Mise en page commune à tous les graphiques (fond transparent, texte sombre)
+BASE_LAYOUT = {
+    "plot_bgcolor": 'rgba(0,0,0,0)',
+    "paper_bgcolor": 'rgba(0,0,0,0)',
+    "font_color": '#2c3e50'
+}
+
+
+def apply_layout(fig, **layout):
+    fig.update_layout(**BASE_LAYOUT, **layout)
+    return fig
+
+
+# DASHBOARD
+def fig_sources_pie(df_sources):
+    fig = px.pie(
+        df_sources,
+        values='nb_mesures',
+        names='acronyme',
+        title="Distribution des mesures par organisme",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return apply_layout(fig)
+
+
+def fig_geo_bar(df_geo):
+    fig = px.bar(
+        df_geo,
+        x='region',
+        y='nb_mesures',
+        title="Nombre de mesures par région",
+        color='nb_mesures',
+        color_continuous_scale='viridis'
+    )
+    return apply_layout(fig, xaxis_tickangle=-45)
+
+
+# VUE GÉOGRAPHIQUE
+def apply_map_layout(fig):
+    return apply_layout(
+        fig,
+        mapbox_style="open-street-map",
+        margin={"r": 0, "t": 50, "l": 0, "b": 0}
+    )
+
+
+def fig_station_map(df_geo_detail, zoom=6):
+    fig = px.scatter_mapbox(
+        df_geo_detail,
+        lat="latitude",
+        lon="longitude",
+        hover_name="commune",
+        hover_data=["region", "nb_mesures", "temp_moyenne", "pluie_moyenne"],
+        color="nb_mesures",
+        size="nb_mesures",
+        color_continuous_scale="viridis",
+        zoom=zoom,
+        height=500,
+        title="Localisation des Stations de Mesure WASCAL"
+    )
+    return apply_map_layout(fig)
+
+
+def fig_grid_map(df_grid, cell_size, zoom=6):
+    fig = px.scatter_mapbox(
+        df_grid,
+        lat="latitude",
+        lon="longitude",
+        hover_data=["nb_stations", "nb_mesures", "temp_moyenne", "pluie_moyenne"],
+        color="nb_mesures",
+        size="nb_stations",
+        color_continuous_scale="viridis",
+        zoom=zoom,
+        height=500,
+        title=f"Stations de Mesure WASCAL regroupées (cellules de {cell_size}°)"
+    )
+    return apply_map_layout(fig)
+
+
+def fig_region_treemap(df_geo_detail):
+    fig = px.treemap(
+        df_geo_detail,
+        path=['region', 'commune'],
+        values='nb_mesures',
+        title="Hiérarchie des Mesures par Zone"
+    )
+    return apply_layout(fig)
+
+
+def fig_commune_temperatures(df_temp_clean):
+    fig = px.bar(
+        df_temp_clean,
+        x='commune',
+        y='temp_moyenne',
+        color='temp_moyenne',
+        title="Température Moyenne par Commune",
+        color_continuous_scale='RdYlBu_r'
+    )
+    return apply_layout(fig, xaxis_tickangle=-45)
+
+
+# TENDANCES TEMPORELLES
+def fig_evolution(df_temporal, pas_de_temps=None):
+    fig = make_subplots(
+        rows=3, cols=1,
+        subplot_titles=('Température Moyenne (°C)', 'Pluviométrie Totale (mm)', 'Humidité Moyenne (%)'),
+        vertical_spacing=0.08
+    )
+
+    # Température
+    fig.add_trace(
+        go.Scatter(x=df_temporal['date'], y=df_temporal['temp_moyenne'],
+                   mode='lines+markers', name='Température', line=dict(color='red')),
+        row=1, col=1
+    )
+
+    # Pluviométrie
+    fig.add_trace(
+        go.Bar(x=df_temporal['date'], y=df_temporal['pluie_totale'],
+               name='Pluviométrie', marker_color='blue', showlegend=False),
+        row=2, col=1
+    )
+
+    # Humidité
+    fig.add_trace(
+        go.Scatter(x=df_temporal['date'], y=df_temporal['humidite_moyenne'],
+                   mode='lines+markers', name='Humidité', line=dict(color='green'), showlegend=False),
+        row=3, col=1
+    )
+
+    title = "Évolution Temporelle des Variables Climatiques"
+    if pas_de_temps:
+        title += f" (pas : {pas_de_temps.lower()})"
+    return apply_layout(fig, height=700, title_text=title)
+
+
+def fig_saison_temperature(df_saison):
+    fig = px.bar(
+        df_saison,
+        x='saison',
+        y='temp_moyenne',
+        title="Température Moyenne par Saison",
+        color='temp_moyenne',
+        color_continuous_scale='RdYlBu_r'
+    )
+    return apply_layout(fig)
+
+
+def fig_saison_pluie(df_saison):
+    fig = px.bar(
+        df_saison,
+        x='saison',
+        y='pluie_totale',
+        title="Pluviométrie Totale par Saison",
+        color='pluie_totale',
+        color_continuous_scale='Blues'
+    )
+    return apply_layout(fig)
+
+
+def fig_annee_saison(df_annee_saison):
+    df_plot = df_annee_saison.assign(annee=df_annee_saison['annee'].astype('Int64').astype(str))
+    fig = px.bar(
+        df_plot,
+        x='annee',
+        y='temp_moyenne',
+        color='saison',
+        barmode='group',
+        hover_data=['pluie_totale', 'humidite_moyenne', 'nb_mesures'],
+        # Saison sèche de novembre à mai rattachée à l'année où elle se termine
+        labels={'annee': 'Année de saison'},
+        title="Température Moyenne par Année et par Saison"
+    )
+    return apply_layout(fig)
+
+
+def fig_anomalies(df_anomalies, measure, title, score_z=False):
+    column = f"{measure}_z" if score_z else f"{measure}_anomalie"
+    fig = px.line(
+        df_anomalies,
+        x='date',
+        y=column,
+        color='region',
+        markers=True,
+        hover_data={measure: ':.2f', f"{measure}_normale": ':.2f', f"{measure}_z": ':.2f'},
+        labels={column: "Score z" if score_z else "Écart à la normale"},
+        title=title
+    )
+    fig.add_hline(y=0, line_dash='dash', line_color='#7f8c8d')
+    return apply_layout(fig)
+
+
+def fig_correlation_heatmap(matrix, title):
+    fig = px.imshow(
+        matrix,
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu_r',
+        text_auto='.2f',
+        aspect='auto',
+        title=title
+    )
+    return apply_layout(fig, height=650)
+
+
+# Boîtes à moustaches à partir de quantiles précalculés (moustaches : p10 - p90)
+def fig_boxplot_quantiles(df_quantiles, title, label):
+    fig = go.Figure(go.Box(
+        x=df_quantiles['region'],
+        q1=df_quantiles['p25'],
+        median=df_quantiles['p50'],
+        q3=df_quantiles['p75'],
+        lowerfence=df_quantiles['p10'],
+        upperfence=df_quantiles['p90'],
+        mean=df_quantiles['moyenne'],
+        sd=df_quantiles['ecart_type'],
+        name=label,
+        marker_color='#3b82f6'
+    ))
+    return apply_layout(fig, title=title, yaxis_title=label)
+
+
+def fig_percentile_band(df_quantiles, title, label):
+    dates = df_quantiles['mois'].dt.to_timestamp()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=df_quantiles['p90'], mode='lines', line=dict(width=0), name='p90', showlegend=False))
+    fig.add_trace(go.Scatter(
+        x=dates, y=df_quantiles['p10'], mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(59,130,246,0.2)', name='p10 - p90'
+    ))
+    fig.add_trace(go.Scatter(x=dates, y=df_quantiles['p50'], mode='lines+markers', name='Médiane', line=dict(color='#1e3a8a')))
+    return apply_layout(fig, title=title, yaxis_title=label)
+
+
+# SOURCES DE DONNÉES
+def fig_source_contribution(df_sources_detail):
+    fig = px.bar(
+        df_sources_detail,
+        x='nb_mesures_total',
+        y='acronyme',
+        orientation='h',
+        title="Nombre de Mesures par Source de Données",
+        color='nb_mesures_total',
+        color_continuous_scale='viridis'
+    )
+    return apply_layout(fig, height=400)
+
+
+# Score de qualité par source (% de vérifications réussies), échelle resserrée sur les scores observés
+def fig_quality_scores(df_scores):
+    fig = px.bar(
+        df_scores,
+        x='score',
+        y='source',
+        orientation='h',
+        title="Score de Qualité par Source (% de vérifications réussies)",
+        color='score',
+        color_continuous_scale='RdYlGn',
+        text=df_scores['score'].round(2)
+    )
+    fig.update_xaxes(range=[min(df_scores['score'].min() - 1, 95), 100])
+    return apply_layout(fig, height=350)
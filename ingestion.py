@@ -0,0 +1,507 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_values
+
+from warehouse import db_config_from_env, MEASURE_COLUMNS
+from quality import evaluate_rules, QUALITY_LABELS
+from notifications import notify_change
+
+# Chargement en masse des fichiers des sources (CSV ou Excel) dans wascal.table_des_faits.
+# Un processus par source : lecture, résolution des clés de dimension, COPY vers une table de transit,
+# puis fusion par lots dans la table des faits.
+#
+#   WASCAL_DB_PASSWORD=... python ingestion.py ANACIM=donnees/anacim.csv DAPSA=donnees/dapsa.xlsx
+
+# Catégorie de données par défaut de chaque source (si le fichier n'a pas de colonne categorie)
+SOURCE_CATEGORIES = {
+    "ANACIM": "Climatique",
+    "ANSD": "Économique",
+    "DAPSA": "Agricole",
+    "ISRA": "Agricole",
+    "DGPRE": "Hydrologique"
+}
+
+# Colonnes obligatoires des fichiers (en plus d'au moins une mesure)
+REQUIRED_COLUMNS = ["date", "region", "commune"]
+
+# Format des dates de chaque source (format strptime) ; sans format, les dates ISO (aaaa-mm-jj) et
+# jj/mm/aaaa sont reconnues ligne par ligne et toute autre écriture est rejetée
+SOURCE_DATE_FORMATS = {}
+
+ISO_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+DAYFIRST_DATE_PATTERN = r"^\d{1,2}/\d{1,2}/\d{4}$"
+
+# Répertoire des journaux de lignes rejetées (une ligne du fichier source et son motif)
+REJECTS_DIR = "rejets"
+
+# Pays des nouvelles localités quand le fichier n'a pas de colonne pays
+DEFAULT_COUNTRY = "Sénégal"
+
+# Mois de l'hivernage (saison des pluies), les autres mois sont en saison sèche
+RAINY_SEASON_MONTHS = [6, 7, 8, 9, 10]
+
+# Clés de dimension d'un fait (clé naturelle de la fusion)
+FACT_KEYS = ["id_temps", "id_geographique", "id_source", "id_type_donnees"]
+
+# Rafraîchissements des tables dérivées des faits après un chargement (table notifiée, requête)
+QUERY_REFRESH_KPI_HLL = "SELECT wascal.refresh_kpi_hll(%(depuis)s)"
+QUERY_REFRESH_GEO_GRILLE = "REFRESH MATERIALIZED VIEW CONCURRENTLY wascal.geo_grille"
+
+# Lignes par bloc COPY et par lot de fusion (une transaction par lot)
+COPY_CHUNK_SIZE = 50000
+MERGE_BATCH_SIZE = 200000
+
+# Table de transit temporaire (propre à la connexion, non journalisée) : mesures en double precision
+STAGING_DDL = f"""
+CREATE TEMP TABLE IF NOT EXISTS staging_faits (
+    lot integer NOT NULL,
+    {", ".join(f"{key} integer NOT NULL" for key in FACT_KEYS)},
+    {", ".join(f"{measure} double precision" for measure in MEASURE_COLUMNS)}
+)
+"""
+
+# Fusion d'un lot : mise à jour des faits existants (sans effacer une mesure absente du fichier), puis insertion des nouveaux.
+# Le verrou sérialise les fusions des sources parallèles (identifiants id_fait) sans bloquer les lectures.
+QUERY_MERGE_LOCK = "LOCK TABLE wascal.table_des_faits IN SHARE ROW EXCLUSIVE MODE"
+
+QUERY_MERGE_UPDATE = f"""
+UPDATE wascal.table_des_faits f
+SET {", ".join(f"{measure} = COALESCE(s.{measure}, f.{measure})" for measure in MEASURE_COLUMNS)}
+FROM staging_faits s
+WHERE s.lot = %(lot)s
+  AND {" AND ".join(f"f.{key} = s.{key}" for key in FACT_KEYS)}
+"""
+
+
+# Fonction pour construire l'insertion des nouveaux faits d'un lot. Identifiant généré par la base (SERIAL, IDENTITY) :
+# la colonne prend sa valeur par défaut (séquence) ; sinon MAX(id_fait) + rang, sous le verrou de fusion.
+def build_merge_insert(generated_id=False):
+    columns = FACT_KEYS + MEASURE_COLUMNS
+    id_column = "" if generated_id else "id_fait, "
+    id_value = "" if generated_id else "(SELECT COALESCE(MAX(id_fait), 0) FROM wascal.table_des_faits) + row_number() OVER (),\n    "
+    return f"""
+INSERT INTO wascal.table_des_faits ({id_column}{", ".join(columns)})
+SELECT
+    {id_value}{", ".join(f"s.{column}" for column in columns)}
+FROM staging_faits s
+WHERE s.lot = %(lot)s
+  AND NOT EXISTS (
+    SELECT 1 FROM wascal.table_des_faits f
+    WHERE {" AND ".join(f"f.{key} = s.{key}" for key in FACT_KEYS)}
+  )
+"""
+
+
+QUERY_MERGE_INSERT = build_merge_insert()
+QUERY_MERGE_INSERT_GENERATED = build_merge_insert(generated_id=True)
+
+# Identifiants attribués par la base (SERIAL : valeur par défaut nextval, ou IDENTITY) parmi ceux du chargement
+QUERY_GENERATED_IDS = """
+SELECT table_name
+FROM information_schema.columns
+WHERE table_schema = 'wascal'
+  AND (table_name, column_name) IN (('table_des_faits', 'id_fait'), ('dim_temps', 'id_temps'), ('dim_geographique', 'id_geographique'))
+  AND (column_default IS NOT NULL OR is_identity = 'YES')
+"""
+
+
+# Fonction pour lire un fichier source (CSV ou Excel), en-têtes normalisés en minuscules
+def read_source_file(path, sep=",", decimal="."):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xls"):
+        try:
+            df = pd.read_excel(path)
+        except ImportError as e:
+            raise RuntimeError(f"Lecture Excel impossible ({e}) : installer openpyxl ou convertir le fichier en CSV")
+    else:
+        df = pd.read_csv(path, sep=sep, decimal=decimal, low_memory=False)
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    return df
+
+
+# Fonction pour lire les dates d'un fichier : format explicite, ou ISO puis jj/mm/aaaa reconnus ligne par ligne
+# (jamais de dayfirst sur une date ISO). Les dates illisibles valent NaT.
+def parse_dates(values, date_format=None):
+    # Colonne déjà typée (cellules date d'un fichier Excel)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    text = values.astype("string").str.strip()
+    if date_format is not None:
+        return pd.to_datetime(text, format=date_format, errors="coerce").dt.normalize()
+
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    iso = text.str.match(ISO_DATE_PATTERN).fillna(False).to_numpy(dtype=bool)
+    dates[iso] = pd.to_datetime(text[iso].str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    dayfirst = text.str.match(DAYFIRST_DATE_PATTERN).fillna(False).to_numpy(dtype=bool)
+    dates[dayfirst] = pd.to_datetime(text[dayfirst], format="%d/%m/%Y", errors="coerce")
+    return dates
+
+
+# Fonction pour normaliser un fichier source : types des clés et des mesures, catégorie par défaut
+def prepare_source_frame(df, acronyme, date_format=None):
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+    if not any(measure in df.columns for measure in MEASURE_COLUMNS):
+        raise ValueError("Aucune colonne de mesure reconnue")
+
+    frame = pd.DataFrame({
+        "date": parse_dates(df["date"], date_format or SOURCE_DATE_FORMATS.get(acronyme)),
+        "region": df["region"].astype("string").str.strip(),
+        "commune": df["commune"].astype("string").str.strip(),
+        "pays": df["pays"].astype("string").str.strip() if "pays" in df.columns else DEFAULT_COUNTRY,
+        "latitude": pd.to_numeric(df["latitude"], errors="coerce") if "latitude" in df.columns else np.nan,
+        "longitude": pd.to_numeric(df["longitude"], errors="coerce") if "longitude" in df.columns else np.nan,
+        "categorie": df["categorie"].astype("string").str.strip() if "categorie" in df.columns else SOURCE_CATEGORIES.get(acronyme)
+    })
+    for measure in MEASURE_COLUMNS:
+        frame[measure] = pd.to_numeric(df[measure], errors="coerce").astype("float64") if measure in df.columns else np.nan
+    return frame
+
+
+# Fonction pour charger les caches de correspondance clé naturelle -> identifiant des dimensions
+def load_dimension_lookups(cur):
+    def lookup(query, columns):
+        cur.execute(query)
+        df = pd.DataFrame(cur.fetchall(), columns=columns + ["id"])
+        if len(columns) == 1:
+            index = pd.Index(df[columns[0]])
+        else:
+            index = pd.MultiIndex.from_frame(df[columns])
+        series = pd.Series(df["id"].to_numpy(), index=index)
+        return series[~series.index.duplicated()]
+
+    lookups = {
+        "temps": lookup("SELECT date, id_temps FROM wascal.dim_temps", ["date"]),
+        "geographique": lookup("SELECT region, commune, id_geographique FROM wascal.dim_geographique", ["region", "commune"]),
+        "source": lookup("SELECT acronyme, id_source FROM wascal.dim_source_donnees", ["acronyme"]),
+        # Première sous-catégorie de chaque catégorie
+        "type": lookup("SELECT categorie, MIN(id_type_donnees) FROM wascal.dim_type_donnees GROUP BY categorie", ["categorie"])
+    }
+    lookups["temps"].index = pd.to_datetime(lookups["temps"].index)
+    return lookups
+
+
+# Fonction pour lister les tables dont l'identifiant est généré par la base (jamais calculé par MAX + rang :
+# la séquence resterait en retard et les insertions suivantes de l'ETL entreraient en collision)
+def load_generated_ids(cur):
+    cur.execute(QUERY_GENERATED_IDS)
+    return {row[0] for row in cur.fetchall()}
+
+
+# Fonction pour insérer des membres de dimension et renvoyer leurs identifiants dans l'ordre des lignes.
+# Les nb_keys premières colonnes forment la clé naturelle ; identifiant généré par la base : RETURNING,
+# sinon MAX + rang (sous le verrou de la table).
+def insert_members(cur, table, id_column, columns, rows, nb_keys, generated=False):
+    if generated:
+        returned = execute_values(
+            cur, f"INSERT INTO wascal.{table} ({', '.join(columns)}) VALUES %s RETURNING {id_column}, {', '.join(columns[:nb_keys])}",
+            rows, fetch=True
+        )
+        ids = {tuple(row[1:]): row[0] for row in returned}
+        return [ids[row[:nb_keys]] for row in rows]
+    cur.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM wascal.{table}")
+    first_id = cur.fetchone()[0] + 1
+    ids = list(range(first_id, first_id + len(rows)))
+    execute_values(cur, f"INSERT INTO wascal.{table} ({id_column}, {', '.join(columns)}) VALUES %s", [(i,) + row for i, row in zip(ids, rows)])
+    return ids
+
+
+# Fonction pour ajouter les dates et les localités absentes des dimensions (sous verrou : les sources parallèles
+# peuvent découvrir les mêmes membres), puis compléter les caches avec leurs identifiants
+def ensure_dimension_members(conn, lookups, frame, generated=()):
+    dates = pd.DatetimeIndex(frame["date"].dropna().unique())
+    new_dates = dates.difference(lookups["temps"].index)
+    places = frame.loc[frame["region"].notna() & frame["commune"].notna(), ["region", "commune", "pays", "latitude", "longitude"]]
+    places = places.drop_duplicates(["region", "commune"])
+    new_places = places[~pd.MultiIndex.from_frame(places[["region", "commune"]]).isin(lookups["geographique"].index)]
+    if new_dates.empty and new_places.empty:
+        return 0
+
+    added = 0
+    with conn.cursor() as cur:
+        if not new_dates.empty:
+            cur.execute("LOCK TABLE wascal.dim_temps IN SHARE ROW EXCLUSIVE MODE")
+            lookups["temps"] = load_dimension_lookups(cur)["temps"]
+            new_dates = new_dates.difference(lookups["temps"].index)
+            rows = [
+                (date.date(), date.year, date.month, "Hivernage" if date.month in RAINY_SEASON_MONTHS else "Saison sèche")
+                for date in new_dates
+            ]
+            if rows:
+                ids = insert_members(cur, "dim_temps", "id_temps", ["date", "annee", "mois", "saison"], rows, 1, "dim_temps" in generated)
+                lookups["temps"] = pd.concat([lookups["temps"], pd.Series(ids, index=new_dates)])
+                added += len(rows)
+
+        if not new_places.empty:
+            cur.execute("LOCK TABLE wascal.dim_geographique IN SHARE ROW EXCLUSIVE MODE")
+            lookups["geographique"] = load_dimension_lookups(cur)["geographique"]
+            keys = pd.MultiIndex.from_frame(new_places[["region", "commune"]])
+            new_places = new_places[~keys.isin(lookups["geographique"].index)]
+            rows = [
+                (row.region, row.commune, row.pays,
+                 None if pd.isna(row.latitude) else float(row.latitude), None if pd.isna(row.longitude) else float(row.longitude))
+                for row in new_places.itertuples(index=False)
+            ]
+            if rows:
+                ids = insert_members(
+                    cur, "dim_geographique", "id_geographique", ["region", "commune", "pays", "latitude", "longitude"], rows, 2,
+                    "dim_geographique" in generated
+                )
+                keys = pd.MultiIndex.from_frame(new_places[["region", "commune"]])
+                lookups["geographique"] = pd.concat([lookups["geographique"], pd.Series(ids, index=keys)])
+                added += len(rows)
+    conn.commit()
+    return added
+
+
+# Renvoie les faits et le motif de rejet des autres lignes (index du fichier source) : chaque ligne est chargée ou rejetée.
+# Renvoie les faits et le motif de rejet des lignes non résolues (index du fichier source).
+def resolve_keys(frame, lookups, acronyme):
+    if acronyme not in lookups["source"].index:
+        raise ValueError(f"Source inconnue dans dim_source_donnees : {acronyme}")
+    id_temps = lookups["temps"].reindex(frame["date"]).to_numpy(dtype=float)
+    id_geo = lookups["geographique"].reindex(pd.MultiIndex.from_frame(frame[["region", "commune"]])).to_numpy(dtype=float)
+    id_type = lookups["type"].reindex(frame["categorie"]).to_numpy(dtype=float)
+    resolved = ~(np.isnan(id_temps) | np.isnan(id_geo) | np.isnan(id_type))
+
+    # Un seul motif par ligne : le dernier affecté l'emporte
+    reasons = pd.Series(pd.NA, index=frame.index, dtype="string")
+    reasons[np.isnan(id_type)] = "catégorie inconnue"
+    reasons[np.isnan(id_geo)] = "localité manquante"
+    reasons[np.isnan(id_temps)] = "date invalide"
+
+    # Lignes résolues écartées : aucune mesure renseignée, ou clé naturelle répétée plus loin dans le fichier
+    # (la dernière ligne l'emporte)
+    no_measure = resolved & frame[MEASURE_COLUMNS].isna().all(axis=1).to_numpy()
+    reasons[no_measure] = "aucune mesure"
+    resolved &= ~no_measure
+    keys = pd.DataFrame({"id_temps": id_temps, "id_geographique": id_geo, "id_type_donnees": id_type})[resolved]
+    duplicate = np.zeros(len(frame), dtype=bool)
+    duplicate[resolved] = keys.duplicated(keep="last").to_numpy()
+    reasons[duplicate] = "doublon dans le fichier"
+    resolved &= ~duplicate
+
+    facts = pd.DataFrame({
+        "id_temps": id_temps[resolved].astype("int64"),
+        "id_geographique": id_geo[resolved].astype("int64"),
+        "id_source": int(lookups["source"][acronyme]),
+        "id_type_donnees": id_type[resolved].astype("int64")
+    })
+    for measure in MEASURE_COLUMNS:
+        facts[measure] = frame[measure].to_numpy()[resolved]
+    return facts, reasons.dropna()
+
+
+# Fonction pour écrire le journal des lignes rejetées : lignes du fichier source et motif (None sans rejet)
+def write_rejects(df_source, reasons, acronyme, rejects_dir=REJECTS_DIR):
+    if reasons.empty:
+        return None
+    os.makedirs(rejects_dir, exist_ok=True)
+    path = os.path.join(rejects_dir, f"{acronyme}_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    df_source.loc[reasons.index].assign(motif=reasons).to_csv(path, index=False)
+    return path
+
+
+# Fonction pour copier les faits dans la table de transit par blocs CSV (COPY FROM STDIN)
+def copy_to_staging(cur, facts, batch_size=MERGE_BATCH_SIZE, chunk_size=COPY_CHUNK_SIZE):
+    cur.execute(STAGING_DDL)
+    cur.execute("TRUNCATE staging_faits")
+    facts = facts.assign(lot=np.arange(len(facts)) // batch_size)[["lot"] + FACT_KEYS + MEASURE_COLUMNS]
+    copy_sql = f"COPY staging_faits ({', '.join(facts.columns)}) FROM STDIN WITH (FORMAT csv)"
+    for start in range(0, len(facts), chunk_size):
+        buffer = io.StringIO()
+        facts.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False, float_format="%.17g")
+        buffer.seek(0)
+        cur.copy_expert(copy_sql, buffer)
+    cur.execute("ANALYZE staging_faits")
+    return int(facts["lot"].max()) + 1 if len(facts) else 0
+
+
+# Fonction pour fusionner la table de transit dans la table des faits, un lot par transaction
+def merge_staging(conn, nb_lots, generated_id=False):
+    insert_query = QUERY_MERGE_INSERT_GENERATED if generated_id else QUERY_MERGE_INSERT
+    inserted = updated = 0
+    for lot in range(nb_lots):
+        with conn.cursor() as cur:
+            cur.execute(QUERY_MERGE_LOCK)
+            cur.execute(QUERY_MERGE_UPDATE, {"lot": lot})
+            updated += cur.rowcount
+            cur.execute(insert_query, {"lot": lot})
+            inserted += cur.rowcount
+        conn.commit()
+    return inserted, updated
+
+
+# Fonction pour charger un fichier source (exécutée dans un processus dédié) : durées et débits de chaque étape
+def ingest_source(acronyme, path, db_config, sep=",", decimal=".", date_format=None, rejects_dir=REJECTS_DIR):
+    timings = {}
+    start = time.perf_counter()
+    df_source = read_source_file(path, sep, decimal)
+    frame = prepare_source_frame(df_source, acronyme, date_format)
+    timings["lecture_s"] = time.perf_counter() - start
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        step = time.perf_counter()
+        with conn.cursor() as cur:
+            lookups = load_dimension_lookups(cur)
+            generated = load_generated_ids(cur)
+        conn.commit()
+        nouveaux_membres = ensure_dimension_members(conn, lookups, frame, generated)
+        facts, reasons = resolve_keys(frame, lookups, acronyme)
+        timings["dimensions_s"] = time.perf_counter() - step
+        fichier_rejets = write_rejects(df_source, reasons, acronyme, rejects_dir)
+
+        # Règles de qualité évaluées sur les colonnes du fichier avant le chargement
+        step = time.perf_counter()
+        df_quality = evaluate_rules(facts)
+        timings["qualite_s"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        with conn.cursor() as cur:
+            nb_lots = copy_to_staging(cur, facts)
+        conn.commit()
+        timings["copie_s"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        inserted, updated = merge_staging(conn, nb_lots, "table_des_faits" in generated)
+        timings["fusion_s"] = time.perf_counter() - step
+    finally:
+        conn.close()
+
+    duration = time.perf_counter() - start
+    return {
+        "source": acronyme,
+        "fichier": path,
+        "lignes": len(frame),
+        "chargees": len(facts),
+        "inserees": inserted,
+        "mises_a_jour": updated,
+        "rejetees": len(reasons),
+        "fichier_rejets": fichier_rejets,
+        "date_min": frame["date"].min(),
+        "nouveaux_membres": nouveaux_membres,
+        "lots": nb_lots,
+        "violations": dict(zip(df_quality["regle"], df_quality["nb_violations"])),
+        "duree_s": duration,
+        "lignes_par_s": len(frame) / duration if duration else 0.0,
+        **{name: round(value, 3) for name, value in timings.items()}
+    }
+
+
+# Fonction pour rafraîchir les tables dérivées des faits (sketches HLL des mois chargés, grille spatiale),
+# puis notifier l'application. Renvoie table -> durée (s) ou message d'erreur.
+def refresh_derived_tables(db_config, depuis=None):
+    status = {}
+    conn = psycopg2.connect(**db_config)
+    try:
+        conn.set_session(autocommit=True)
+        for table, query in [("kpi_hll_mensuel", QUERY_REFRESH_KPI_HLL), ("geo_grille", QUERY_REFRESH_GEO_GRILLE)]:
+            start = time.perf_counter()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query, {"depuis": depuis})
+                    notify_change(cur, table, "REFRESH")
+                status[table] = time.perf_counter() - start
+            except psycopg2.Error as e:
+                # Script SQL non installé (extension hll absente, vue non créée) : le chargement reste valide
+                status[table] = str(e).strip()
+    finally:
+        conn.close()
+    return status
+
+
+# Fonction pour charger plusieurs sources en parallèle (un processus par source), puis rafraîchir les tables dérivées
+def ingest_sources(files, db_config, workers=None, sep=",", decimal=".", date_formats=None, rejects_dir=REJECTS_DIR):
+    results, errors = {}, {}
+    date_formats = date_formats or {}
+    with ProcessPoolExecutor(max_workers=workers or len(files)) as pool:
+        futures = {
+            pool.submit(ingest_source, acronyme, path, db_config, sep, decimal, date_formats.get(acronyme), rejects_dir): acronyme
+            for acronyme, path in files.items()
+        }
+        for future in as_completed(futures):
+            acronyme = futures[future]
+            try:
+                results[acronyme] = future.result()
+            except Exception as e:
+                errors[acronyme] = str(e)
+
+    refreshed = {}
+    loaded = [r for r in results.values() if r["inserees"] or r["mises_a_jour"]]
+    if loaded:
+        refreshed = refresh_derived_tables(db_config, min(r["date_min"] for r in loaded).date())
+    return results, errors, refreshed
+
+
+# Fonction pour lire les arguments SOURCE=valeur de la ligne de commande (fichiers, formats de date)
+def parse_source_files(values):
+    files = {}
+    for value in values:
+        acronyme, sep, path = value.partition("=")
+        if not sep or not path:
+            raise argparse.ArgumentTypeError(f"Argument invalide (attendu SOURCE=valeur) : {value}")
+        files[acronyme.strip().upper()] = path
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement en masse des fichiers sources dans le Data Warehouse WASCAL")
+    parser.add_argument("fichiers", nargs="+", help="fichiers à charger, sous la forme SOURCE=chemin (ex. ANACIM=anacim.csv)")
+    parser.add_argument("--workers", type=int, help="nombre de processus (une source par processus par défaut)")
+    parser.add_argument("--sep", default=",", help="séparateur des fichiers CSV")
+    parser.add_argument("--decimal", default=".", help="séparateur décimal des fichiers CSV")
+    parser.add_argument(
+        "--format-date", action="append", default=[],
+        help="format des dates d'une source, sous la forme SOURCE=format (ex. ANSD=%%d/%%m/%%Y)"
+    )
+    parser.add_argument("--rejets", default=REJECTS_DIR, help="répertoire des journaux de lignes rejetées")
+    args = parser.parse_args()
+
+    files = parse_source_files(args.fichiers)
+    date_formats = parse_source_files(args.format_date)
+    start = time.perf_counter()
+    results, errors, refreshed = ingest_sources(
+        files, db_config_from_env(), args.workers, args.sep, args.decimal, date_formats, args.rejets
+    )
+
+    print(
+        f"{'source':<8} {'lignes':>10} {'insérées':>10} {'mises à jour':>13} {'rejetées':>9} {'violations':>11} "
+        f"{'durée (s)':>10} {'lignes/s':>10}"
+    )
+    for acronyme in files:
+        if acronyme in results:
+            r = results[acronyme]
+            print(
+                f"{acronyme:<8} {r['lignes']:>10,} {r['inserees']:>10,} {r['mises_a_jour']:>13,} {r['rejetees']:>9,} "
+                f"{sum(r['violations'].values()):>11,} {r['duree_s']:>10.1f} {r['lignes_par_s']:>10,.0f}"
+            )
+            for regle, count in r["violations"].items():
+                if count:
+                    print(f"  ⚠️ {QUALITY_LABELS[regle]} : {count:,}")
+            if r["fichier_rejets"]:
+                print(f"  📄 Lignes rejetées : {r['fichier_rejets']}")
+        else:
+            print(f"❌ {acronyme} : {errors[acronyme]}")
+
+    for table, status in refreshed.items():
+        if isinstance(status, float):
+            print(f"🔄 {table} rafraîchie en {status:.1f} s")
+        else:
+            print(f"❌ Rafraîchissement de {table} : {status}")
+
+    duration = time.perf_counter() - start
+    total = sum(r["lignes"] for r in results.values())
+    print(f"Total : {total:,} lignes en {duration:.1f} s ({total / duration if duration else 0:,.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import select
+import time
+
+import psycopg2
+
+# Canal alimenté par les triggers de sql/04_notifications.sql (charge utile : "table:OPERATION")
+CHANGE_CHANNEL = "wascal_changements"
+
+# Tables du schéma en étoile surveillées par les triggers
+WATCHED_TABLES = [
+    "table_des_faits",
+    "dim_temps",
+    "dim_geographique",
+    "dim_source_donnees",
+    "dim_type_donnees"
+]
+
+# Tables dérivées sans trigger (rafraîchissement de vue matérialisée, recalcul par une fonction ou un script) :
+# le code qui les rafraîchit appelle notify_change (reconcile_kpi_loop, ingestion.py, quality.py)
+DERIVED_TABLES = [
+    "kpi_hll_mensuel",
+    "geo_grille",
+    "qualite_violations"
+]
+
+# Invalidation pilotée par les notifications (WASCAL_NOTIFICATIONS=1) : le TTL n'est plus qu'un filet de sécurité
+NOTIFICATIONS_ENABLED = os.environ.get("WASCAL_NOTIFICATIONS", "0") == "1"
+CACHE_TTL = int(os.environ.get("WASCAL_CACHE_TTL", 86400 if NOTIFICATIONS_ENABLED else 600))
+
+# Attente maximale d'une notification avant de vérifier la demande d'arrêt (secondes)
+LISTEN_TIMEOUT = 5
+
+# Regroupement d'une rafale de notifications (chargement en plusieurs transactions) avant d'invalider
+NOTIFY_DEBOUNCE = 1.0
+
+
+# Fonction pour décoder une charge utile "table:OPERATION" (une charge sans opération vaut UPDATE)
+def parse_payload(payload):
+    table, _, operation = payload.partition(":")
+    return table, operation or "UPDATE"
+
+
+# Fonction pour regrouper les notifications reçues : table -> ensemble des opérations
+def collect_changes(notifies, changes=None):
+    changes = {} if changes is None else changes
+    while notifies:
+        table, operation = parse_payload(notifies.pop(0).payload)
+        changes.setdefault(table, set()).add(operation)
+    return changes
+
+
+# Fonction pour écouter le canal et appeler on_change(changes) après chaque rafale de modifications.
+# S'arrête quand stop_event est positionné ; une erreur de connexion est propagée à l'appelant.
+def listen_changes(db_config, on_change, stop_event=None, timeout=LISTEN_TIMEOUT, debounce=NOTIFY_DEBOUNCE):
+    conn = psycopg2.connect(**db_config)
+    try:
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+        while stop_event is None or not stop_event.is_set():
+            if not select.select([conn], [], [], timeout)[0]:
+                continue
+            conn.poll()
+            changes = collect_changes(conn.notifies)
+            # On continue de lire tant que des notifications arrivent dans le délai de regroupement
+            while select.select([conn], [], [], debounce)[0]:
+                conn.poll()
+                collect_changes(conn.notifies, changes)
+            if changes:
+                on_change(changes)
+    finally:
+        conn.close()
+
+
+# Fonction pour enregistrer les tables dont dépend une clé de cache (dependencies : table -> clés)
+def register_dependencies(dependencies, key, tables):
+    for table in tables:
+        dependencies.setdefault(table, set()).add(key)
+
+
+# Fonction pour retirer et renvoyer les clés de cache qui dépendent des tables modifiées
+def pop_dependents(dependencies, tables):
+    keys = set()
+    for table in tables:
+        keys |= dependencies.pop(table, set())
+    return keys
+
+
+# Fonction pour notifier une modification depuis un chargeur (tables sans trigger, tests)
+def notify_change(cur, table, operation="UPDATE"):
+    cur.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, f"{table}:{operation}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notifications de modification des tables wascal")
+    parser.add_argument("commande", choices=["ecouter", "notifier"], help="ecouter : affiche les rafales reçues, notifier : émet une notification")
+    parser.add_argument("--table", default="table_des_faits", choices=WATCHED_TABLES + DERIVED_TABLES, help="table à notifier")
+    parser.add_argument("--operation", default="INSERT", choices=["INSERT", "UPDATE", "DELETE", "TRUNCATE", "REFRESH"])
+    args = parser.parse_args()
+
+    from warehouse import db_config_from_env
+    db_config = db_config_from_env()
+    if args.commande == "notifier":
+        conn = psycopg2.connect(**db_config)
+        try:
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                notify_change(cur, args.table, args.operation)
+        finally:
+            conn.close()
+        print(f"✅ Notification envoyée sur {CHANGE_CHANNEL} : {args.table}:{args.operation}")
+        return
+
+    def show(changes):
+        details = ", ".join(f"{table} ({'/'.join(sorted(ops))})" for table, ops in sorted(changes.items()))
+        print(f"{time.strftime('%H:%M:%S')}  {details}")
+
+    print(f"Écoute de {CHANGE_CHANNEL} sur {db_config['host']} (Ctrl+C pour arrêter)")
+    try:
+        listen_changes(db_config, show)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
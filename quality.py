@@ -0,0 +1,218 @@
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Règles de qualité des faits, évaluées soit en SQL par blocs d'id_fait (toute la table), soit sur les
+# tableaux NumPy d'un fichier pendant l'ingestion. Chaque règle compte les lignes vérifiées (colonnes
+# renseignées) et les lignes en violation.
+#
+#   WASCAL_DB_PASSWORD=... python quality.py              # recalcule wascal.qualite_violations
+
+# Lignes de faits par bloc de la vérification SQL
+QUALITY_CHUNK_SIZE = 500000
+
+# Écart relatif toléré entre le rendement déclaré et production / surface
+YIELD_TOLERANCE = 0.1
+
+
+# Fonction pour décrire une règle de bornes : violation si la mesure sort de [low, high]
+def bounds_rule(regle, libelle, measure, low=None, high=None):
+    conditions = []
+    if low is not None:
+        conditions.append(f"{measure} < {low}")
+    if high is not None:
+        conditions.append(f"{measure} > {high}")
+
+    def violation(arrays):
+        values = arrays[measure]
+        mask = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            mask |= values < low
+        if high is not None:
+            mask |= values > high
+        return mask
+
+    return {"regle": regle, "libelle": libelle, "colonnes": [measure], "sql": " OR ".join(conditions), "violation": violation}
+
+
+# Fonction pour décrire une règle de cohérence : ratio ≈ numerator / denominator (écart relatif > tolerance).
+# Vérifiée seulement sur les lignes où les trois mesures sont renseignées ; division en virgule flottante
+# (CAST) pour ne pas tronquer le quotient de deux colonnes entières.
+def ratio_rule(regle, libelle, ratio, numerator, denominator, tolerance=YIELD_TOLERANCE):
+    expected = f"CAST({numerator} AS DOUBLE PRECISION) / {denominator}"
+    sql = (
+        f"{denominator} > 0 AND ABS({ratio} - {expected}) > "
+        f"{tolerance} * GREATEST(ABS({ratio}), ABS({expected}))"
+    )
+
+    def violation(arrays):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected_values = arrays[numerator] / arrays[denominator]
+            gap = np.abs(arrays[ratio] - expected_values)
+            scale = np.maximum(np.abs(arrays[ratio]), np.abs(expected_values))
+            return (arrays[denominator] > 0) & (gap > tolerance * scale)
+
+    return {"regle": regle, "libelle": libelle, "colonnes": [ratio, numerator, denominator], "sql": sql, "violation": violation}
+
+
+QUALITY_RULES = [
+    bounds_rule("humidite_hors_bornes", "Humidité hors 0–100 %", "humidite_pourcentage", 0, 100),
+    bounds_rule("ph_hors_bornes", "pH de l'eau hors 0–14", "qualite_eau_ph", 0, 14),
+    bounds_rule("chomage_hors_bornes", "Taux de chômage hors 0–100 %", "taux_chomage_pourcentage", 0, 100),
+    bounds_rule("pluie_negative", "Pluviométrie négative", "pluviometri_mm", low=0),
+    bounds_rule("production_negative", "Production négative", "production_tonnes", low=0),
+    bounds_rule("surface_negative", "Surface cultivée négative", "surface_cultivee_hectares", low=0),
+    bounds_rule("debit_negatif", "Débit négatif", "debit_m3par_seconde", low=0),
+    bounds_rule("rendement_negatif", "Rendement négatif", "rendement_tonne_par_hectare", low=0),
+    ratio_rule(
+        "rendement_incoherent", "Rendement incohérent avec production / surface",
+        "rendement_tonne_par_hectare", "production_tonnes", "surface_cultivee_hectares"
+    )
+]
+
+QUALITY_LABELS = {rule["regle"]: rule["libelle"] for rule in QUALITY_RULES}
+
+
+# Fonction pour construire la requête de vérification d'un bloc d'id_fait : deux compteurs par règle et par source
+def build_quality_query(rules=QUALITY_RULES):
+    counters = []
+    for rule in rules:
+        applies = " AND ".join(f"{col} IS NOT NULL" for col in rule["colonnes"])
+        counters.append(f"    COUNT(*) FILTER (WHERE {applies}) AS {rule['regle']}__verifies")
+        counters.append(f"    COUNT(*) FILTER (WHERE {applies} AND ({rule['sql']})) AS {rule['regle']}__violations")
+    counters = ",\n".join(counters)
+    query = f"""
+SELECT
+    id_source,
+{counters}
+FROM wascal.table_des_faits
+WHERE id_fait > %(debut)s AND id_fait <= %(fin)s
+GROUP BY id_source
+"""
+    return query
+
+
+QUERY_QUALITY_CHUNK = build_quality_query()
+
+QUERY_FACT_ID_RANGE = "SELECT COALESCE(MIN(id_fait), 0) - 1 AS debut, COALESCE(MAX(id_fait), 0) AS fin FROM wascal.table_des_faits"
+
+# Compteurs enregistrés, avec l'acronyme de la source (panneau qualité de la page Sources)
+QUERY_QUALITY_VIOLATIONS = """
+SELECT
+    s.acronyme AS source,
+    q.regle,
+    q.nb_verifies,
+    q.nb_violations,
+    q.verifie_le
+FROM wascal.qualite_violations q
+JOIN wascal.dim_source_donnees s ON q.id_source = s.id_source
+ORDER BY s.acronyme, q.regle
+"""
+
+
+# Fonction pour passer des compteurs larges (<regle>__verifies / __violations) au format long source × règle
+def counts_to_long(df_wide):
+    rows = []
+    for rule in QUALITY_RULES:
+        name = rule["regle"]
+        rows.append(pd.DataFrame({
+            "id_source": df_wide["id_source"].to_numpy(),
+            "regle": name,
+            "nb_verifies": df_wide[f"{name}__verifies"].to_numpy(dtype="int64"),
+            "nb_violations": df_wide[f"{name}__violations"].to_numpy(dtype="int64")
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+
+# Fonction pour vérifier toute la table des faits par blocs d'id_fait (read(query, params) -> DataFrame, PostgreSQL ou DuckDB)
+def scan_quality(read, chunk_size=QUALITY_CHUNK_SIZE):
+    bounds = read(QUERY_FACT_ID_RANGE, None)
+    debut, fin = int(bounds["debut"].iloc[0]), int(bounds["fin"].iloc[0])
+    totals = None
+    for start in range(debut, fin, chunk_size):
+        df_chunk = read(QUERY_QUALITY_CHUNK, {"debut": start, "fin": min(start + chunk_size, fin)})
+        if df_chunk.empty:
+            continue
+        df_chunk = df_chunk.set_index("id_source").astype("int64")
+        totals = df_chunk if totals is None else totals.add(df_chunk, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=["id_source", "regle", "nb_verifies", "nb_violations"])
+    return counts_to_long(totals.astype("int64").reset_index())
+
+
+# Fonction pour évaluer les règles sur les colonnes NumPy d'un bloc de faits (ingestion) : compteurs par règle
+def evaluate_rules(frame, rules=QUALITY_RULES):
+    arrays = {
+        col: frame[col].to_numpy(dtype=float, na_value=np.nan)
+        for rule in rules for col in rule["colonnes"]
+    }
+    rows = []
+    for rule in rules:
+        applies = np.logical_and.reduce([~np.isnan(arrays[col]) for col in rule["colonnes"]])
+        rows.append({
+            "regle": rule["regle"],
+            "nb_verifies": int(applies.sum()),
+            "nb_violations": int((applies & rule["violation"](arrays)).sum())
+        })
+    return pd.DataFrame(rows)
+
+
+# Fonction pour calculer le score de qualité de chaque source (% de vérifications réussies, toutes règles confondues)
+def quality_scores(df_violations):
+    df_scores = df_violations.groupby("source", as_index=False)[["nb_verifies", "nb_violations"]].sum()
+    df_scores["score"] = 100 * (1 - df_scores["nb_violations"] / df_scores["nb_verifies"].where(df_scores["nb_verifies"] > 0))
+    return df_scores.sort_values("score").reset_index(drop=True)
+
+
+# Fonction pour remplacer les compteurs enregistrés (une transaction, puis notification pour les caches de l'application)
+def store_quality(conn, df_counts):
+    from psycopg2.extras import execute_values
+    from notifications import notify_change
+
+    verifie_le = datetime.now()
+    rows = [
+        (int(row.id_source), row.regle, int(row.nb_verifies), int(row.nb_violations), verifie_le)
+        for row in df_counts.itertuples(index=False)
+    ]
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM wascal.qualite_violations")
+        if rows:
+            execute_values(
+                cur,
+                "INSERT INTO wascal.qualite_violations (id_source, regle, nb_verifies, nb_violations, verifie_le) VALUES %s",
+                rows
+            )
+        notify_change(cur, "qualite_violations")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification de la qualité des faits du Data Warehouse WASCAL")
+    parser.add_argument("--chunk-size", type=int, default=QUALITY_CHUNK_SIZE, help="lignes de faits par bloc")
+    parser.add_argument("--sans-enregistrement", action="store_true", help="affiche les compteurs sans les enregistrer")
+    args = parser.parse_args()
+
+    import psycopg2
+    from warehouse import db_config_from_env, read_query
+    db_config = db_config_from_env()
+
+    start = time.perf_counter()
+    df_counts = scan_quality(lambda query, params: read_query(query, params, db_config=db_config), args.chunk_size)
+    for row in df_counts[df_counts["nb_violations"] > 0].itertuples(index=False):
+        print(f"⚠️ source {row.id_source} · {QUALITY_LABELS[row.regle]} : {row.nb_violations:,} / {row.nb_verifies:,}")
+    print(f"Vérification en {time.perf_counter() - start:.1f} s ({df_counts['nb_violations'].sum():,} violations)")
+
+    if not args.sans_enregistrement:
+        conn = psycopg2.connect(**db_config)
+        try:
+            store_quality(conn, df_counts)
+        finally:
+            conn.close()
+        print("✅ Compteurs enregistrés dans wascal.qualite_violations")
+
+
+if __name__ == "__main__":
+    main()
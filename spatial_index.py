@@ -0,0 +1,143 @@
+import heapq
+import numpy as np
+
+# Rayon moyen de la Terre (km)
+EARTH_RADIUS_KM = 6371.0
+
+
+# Noeud d'un KD-tree : boîte englobante, indices des points et sous-arbres
+class _KDNode:
+    __slots__ = ("lo", "hi", "indices", "left", "right")
+
+    def __init__(self, lo, hi, indices, left=None, right=None):
+        self.lo = lo
+        self.hi = hi
+        self.indices = indices
+        self.left = left
+        self.right = right
+
+
+# KD-tree statique avec feuilles groupées : k plus proches voisins et requêtes par boîte
+class KDTree:
+    def __init__(self, points, leaf_size=16):
+        self.points = np.asarray(points, dtype=float)
+        self.leaf_size = leaf_size
+        self.root = self._build(np.arange(len(self.points))) if len(self.points) else None
+
+    def _build(self, indices):
+        coords = self.points[indices]
+        lo, hi = coords.min(axis=0), coords.max(axis=0)
+        if len(indices) <= self.leaf_size:
+            return _KDNode(lo, hi, indices)
+
+        # Coupe sur l'axe le plus étendu, à la médiane
+        axis = int(np.argmax(hi - lo))
+        order = np.argsort(coords[:, axis], kind="stable")
+        middle = len(indices) // 2
+        return _KDNode(
+            lo, hi, indices,
+            self._build(indices[order[:middle]]),
+            self._build(indices[order[middle:]])
+        )
+
+    # Distance minimale entre un point et la boîte englobante d'un noeud
+    @staticmethod
+    def _box_distance(node, point):
+        delta = np.maximum(np.maximum(node.lo - point, point - node.hi), 0.0)
+        return float(np.sqrt(np.dot(delta, delta)))
+
+    def query(self, point, k=1):
+        if self.root is None or k <= 0:
+            return np.empty(0), np.empty(0, dtype=int)
+
+        point = np.asarray(point, dtype=float)
+        best = []  # tas max (distance négative, indice) des k meilleurs candidats
+        to_visit = [(0.0, 0, self.root)]
+        counter = 1
+
+        while to_visit:
+            box_dist, _, node = heapq.heappop(to_visit)
+            if len(best) == k and box_dist > -best[0][0]:
+                break
+
+            if node.left is None:
+                diffs = self.points[node.indices] - point
+                dists = np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
+                for dist, idx in zip(dists, node.indices):
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, int(idx)))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, int(idx)))
+                continue
+
+            for child in (node.left, node.right):
+                heapq.heappush(to_visit, (self._box_distance(child, point), counter, child))
+                counter += 1
+
+        best.sort(key=lambda item: -item[0])
+        return np.array([-d for d, _ in best]), np.array([i for _, i in best], dtype=int)
+
+    def query_box(self, lo, hi):
+        if self.root is None:
+            return np.empty(0, dtype=int)
+
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        found = []
+        stack = [self.root]
+
+        while stack:
+            node = stack.pop()
+            if np.any(node.hi < lo) or np.any(node.lo > hi):
+                continue
+            if np.all(node.lo >= lo) and np.all(node.hi <= hi):
+                found.append(node.indices)
+            elif node.left is None:
+                coords = self.points[node.indices]
+                inside = np.all((coords >= lo) & (coords <= hi), axis=1)
+                found.append(node.indices[inside])
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+
+        return np.sort(np.concatenate(found)) if found else np.empty(0, dtype=int)
+
+
+# Fonction pour projeter des coordonnées (degrés) sur la sphère unité
+def to_unit_vectors(latitudes, longitudes):
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+# Index spatial des stations de dim_geographique
+# - plus proches voisins : KD-tree sur la sphère unité (la corde est monotone avec la distance réelle)
+# - boîtes latitude/longitude : KD-tree sur les coordonnées en degrés
+class StationIndex:
+    def __init__(self, stations):
+        stations = stations.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+        self.stations = stations
+        self._sphere_tree = KDTree(to_unit_vectors(stations["latitude"], stations["longitude"]))
+        self._degree_tree = KDTree(stations[["latitude", "longitude"]].to_numpy(dtype=float))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def bounds(self):
+        if self.stations.empty:
+            return None
+        return (
+            float(self.stations["latitude"].min()), float(self.stations["latitude"].max()),
+            float(self.stations["longitude"].min()), float(self.stations["longitude"].max())
+        )
+
+    def nearest(self, latitude, longitude, k=5):
+        point = to_unit_vectors([latitude], [longitude])[0]
+        chords, positions = self._sphere_tree.query(point, k=min(k, len(self.stations)))
+        result = self.stations.iloc[positions].copy()
+        result["distance_km"] = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chords / 2, 0.0, 1.0))
+        return result.reset_index(drop=True)
+
+    def within_box(self, lat_min, lat_max, lon_min, lon_max):
+        positions = self._degree_tree.query_box((lat_min, lon_min), (lat_max, lon_max))
+        return self.stations.iloc[positions].reset_index(drop=True)
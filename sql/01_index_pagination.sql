@@ -0,0 +1,27 @@
+-- Index pour la pagination par clé (keyset) du tableau "Données Détaillées"
+-- La requête parcourt dim_temps par date décroissante puis lit les faits de chaque
+-- jour dans l'ordre de id_fait : chaque page coûte un parcours d'index de taille page.
+
+-- La borne t.date <= curseur ajoutée par build_detail_query permet au planificateur de démarrer
+-- ce parcours à la date du curseur. Vérification sur une page profonde :
+--   EXPLAIN ANALYZE SELECT f.id_fait FROM wascal.table_des_faits f
+--     JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+--     WHERE t.date <= '2020-01-01' AND (t.date, f.id_fait) < ('2020-01-01', 1000000)
+--     ORDER BY t.date DESC, f.id_fait DESC LIMIT 50;
+--   plan attendu : Index Scan using idx_dim_temps_date, Index Cond: (date <= '2020-01-01')
+
+CREATE INDEX IF NOT EXISTS idx_dim_temps_date
+    ON wascal.dim_temps (date DESC, id_temps);
+
+CREATE INDEX IF NOT EXISTS idx_faits_temps_id_fait
+    ON wascal.table_des_faits (id_temps, id_fait DESC);
+
+-- Index de filtrage par région et par source
+CREATE INDEX IF NOT EXISTS idx_dim_geographique_region
+    ON wascal.dim_geographique (region, id_geographique);
+
+CREATE INDEX IF NOT EXISTS idx_faits_source
+    ON wascal.table_des_faits (id_source);
+
+ANALYZE wascal.dim_temps;
+ANALYZE wascal.table_des_faits;
@@ -0,0 +1,41 @@
+-- Sketches HyperLogLog mensuels pour les KPI approximatifs du dashboard
+-- Nécessite l'extension postgresql-hll (disponible sur AWS RDS)
+
+CREATE EXTENSION IF NOT EXISTS hll;
+
+CREATE TABLE IF NOT EXISTS wascal.kpi_hll_mensuel (
+    mois            date PRIMARY KEY,
+    nb_mesures      bigint NOT NULL,
+    sources         hll NOT NULL,
+    geographies     hll NOT NULL,
+    derniere_date   date,
+    maj_le          timestamptz NOT NULL DEFAULT now()
+);
+
+-- Recalcule les sketches des mois à partir de p_depuis (tous les mois si NULL).
+-- Les sketches de mois différents se fusionnent avec hll_union_agg.
+CREATE OR REPLACE FUNCTION wascal.refresh_kpi_hll(p_depuis date DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO wascal.kpi_hll_mensuel (mois, nb_mesures, sources, geographies, derniere_date, maj_le)
+    SELECT
+        date_trunc('month', t.date)::date AS mois,
+        COUNT(*),
+        hll_add_agg(hll_hash_integer(f.id_source)),
+        hll_add_agg(hll_hash_integer(f.id_geographique)),
+        MAX(t.date),
+        now()
+    FROM wascal.table_des_faits f
+    JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+    WHERE p_depuis IS NULL OR t.date >= date_trunc('month', p_depuis)
+    GROUP BY 1
+    ON CONFLICT (mois) DO UPDATE SET
+        nb_mesures    = EXCLUDED.nb_mesures,
+        sources       = EXCLUDED.sources,
+        geographies   = EXCLUDED.geographies,
+        derniere_date = EXCLUDED.derniere_date,
+        maj_le        = EXCLUDED.maj_le;
+$$;
+
+SELECT wascal.refresh_kpi_hll();
@@ -0,0 +1,53 @@
+-- Agrégation spatiale précalculée de la carte des stations (plusieurs résolutions)
+-- Les tailles de cellule doivent rester alignées avec GEO_GRID_LEVELS dans app.py.
+
+CREATE TABLE IF NOT EXISTS wascal.geo_niveaux (
+    niveau              integer PRIMARY KEY,
+    taille_cellule_deg  double precision NOT NULL
+);
+
+INSERT INTO wascal.geo_niveaux (niveau, taille_cellule_deg) VALUES
+    (1, 2.0),
+    (2, 1.0),
+    (3, 0.5),
+    (4, 0.25),
+    (5, 0.1)
+ON CONFLICT (niveau) DO UPDATE SET taille_cellule_deg = EXCLUDED.taille_cellule_deg;
+
+-- Les faits sont agrégés une seule fois par station, puis regroupés par cellule pour chaque niveau.
+-- Les moyennes sont recalculées à partir des sommes et des effectifs (pondération par mesure).
+CREATE MATERIALIZED VIEW IF NOT EXISTS wascal.geo_grille AS
+WITH stations AS (
+    SELECT
+        g.id_geographique,
+        g.latitude,
+        g.longitude,
+        COUNT(f.id_geographique) AS nb_mesures,
+        SUM(f.temperature_celsius) AS temp_somme,
+        COUNT(f.temperature_celsius) AS temp_nb,
+        SUM(f.pluviometri_mm) AS pluie_somme,
+        COUNT(f.pluviometri_mm) AS pluie_nb
+    FROM wascal.dim_geographique g
+    JOIN wascal.table_des_faits f ON g.id_geographique = f.id_geographique
+    WHERE g.latitude IS NOT NULL AND g.longitude IS NOT NULL
+    GROUP BY g.id_geographique, g.latitude, g.longitude
+)
+SELECT
+    n.niveau,
+    floor(st.latitude / n.taille_cellule_deg)::integer AS cellule_lat,
+    floor(st.longitude / n.taille_cellule_deg)::integer AS cellule_lon,
+    AVG(st.latitude) AS latitude,
+    AVG(st.longitude) AS longitude,
+    COUNT(*) AS nb_stations,
+    SUM(st.nb_mesures) AS nb_mesures,
+    SUM(st.temp_somme) / NULLIF(SUM(st.temp_nb), 0) AS temp_moyenne,
+    SUM(st.pluie_somme) / NULLIF(SUM(st.pluie_nb), 0) AS pluie_moyenne
+FROM stations st
+CROSS JOIN wascal.geo_niveaux n
+GROUP BY n.niveau, cellule_lat, cellule_lon;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_geo_grille_cellule
+    ON wascal.geo_grille (niveau, cellule_lat, cellule_lon);
+
+-- A exécuter après chaque chargement de données
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY wascal.geo_grille;
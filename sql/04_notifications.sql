@@ -0,0 +1,32 @@
+-- Notifications de modification des tables du schéma en étoile (invalidation des caches de l'application)
+-- Le canal doit rester aligné avec CHANGE_CHANNEL dans notifications.py.
+
+-- Triggers au niveau instruction : une notification par instruction et non par ligne.
+-- PostgreSQL fusionne les charges utiles identiques d'une même transaction (un chargement = une notification par table).
+CREATE OR REPLACE FUNCTION wascal.notifier_changement() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('wascal_changements', TG_TABLE_NAME || ':' || TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    nom_table text;
+BEGIN
+    FOREACH nom_table IN ARRAY ARRAY['table_des_faits', 'dim_temps', 'dim_geographique', 'dim_source_donnees', 'dim_type_donnees']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS notifier_changement ON wascal.%I', nom_table);
+        EXECUTE format(
+            'CREATE TRIGGER notifier_changement AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON wascal.%I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION wascal.notifier_changement()',
+            nom_table
+        );
+    END LOOP;
+END;
+$$;
+
+-- Vérification manuelle (deux sessions psql) :
+--   session 1 : LISTEN wascal_changements;
+--   session 2 : UPDATE wascal.dim_source_donnees SET contact = contact WHERE id_source = 1;
+--   session 1 : Asynchronous notification "wascal_changements" with payload "dim_source_donnees:UPDATE" received
@@ -0,0 +1,11 @@
+-- Index de la fusion des chargements en masse (ingestion.py)
+-- La fusion recherche chaque fait de la table de transit par sa clé naturelle (temps, station, source, type).
+
+CREATE INDEX IF NOT EXISTS idx_faits_cle_naturelle
+    ON wascal.table_des_faits (id_temps, id_geographique, id_source, id_type_donnees);
+
+-- Recherche des membres existants des dimensions par clé naturelle
+CREATE INDEX IF NOT EXISTS idx_dim_geographique_commune
+    ON wascal.dim_geographique (region, commune);
+
+ANALYZE wascal.table_des_faits;
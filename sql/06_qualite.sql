@@ -0,0 +1,11 @@
+-- Compteurs de la vérification de qualité des faits (quality.py), un enregistrement par source et par règle
+-- Les noms de règles doivent rester alignés avec QUALITY_RULES dans quality.py.
+
+CREATE TABLE IF NOT EXISTS wascal.qualite_violations (
+    id_source       integer NOT NULL REFERENCES wascal.dim_source_donnees (id_source),
+    regle           text NOT NULL,
+    nb_verifies     bigint NOT NULL,
+    nb_violations   bigint NOT NULL,
+    verifie_le      timestamp NOT NULL,
+    PRIMARY KEY (id_source, regle)
+);
@@ -0,0 +1,34 @@
+-- Équivalent DuckDB de 03_geo_grille.sql, utilisé par la fixture hors ligne (duckdb_backend.py)
+
+CREATE TABLE wascal.geo_niveaux AS
+SELECT * FROM (VALUES (1, 2.0), (2, 1.0), (3, 0.5), (4, 0.25), (5, 0.1)) AS n(niveau, taille_cellule_deg);
+
+CREATE TABLE wascal.geo_grille AS
+WITH stations AS (
+    SELECT
+        g.id_geographique,
+        g.latitude,
+        g.longitude,
+        COUNT(f.id_geographique) AS nb_mesures,
+        SUM(f.temperature_celsius) AS temp_somme,
+        COUNT(f.temperature_celsius) AS temp_nb,
+        SUM(f.pluviometri_mm) AS pluie_somme,
+        COUNT(f.pluviometri_mm) AS pluie_nb
+    FROM wascal.dim_geographique g
+    JOIN wascal.table_des_faits f ON g.id_geographique = f.id_geographique
+    WHERE g.latitude IS NOT NULL AND g.longitude IS NOT NULL
+    GROUP BY g.id_geographique, g.latitude, g.longitude
+)
+SELECT
+    n.niveau,
+    CAST(floor(st.latitude / n.taille_cellule_deg) AS INTEGER) AS cellule_lat,
+    CAST(floor(st.longitude / n.taille_cellule_deg) AS INTEGER) AS cellule_lon,
+    AVG(st.latitude) AS latitude,
+    AVG(st.longitude) AS longitude,
+    COUNT(*) AS nb_stations,
+    SUM(st.nb_mesures) AS nb_mesures,
+    SUM(st.temp_somme) / NULLIF(SUM(st.temp_nb), 0) AS temp_moyenne,
+    SUM(st.pluie_somme) / NULLIF(SUM(st.pluie_nb), 0) AS pluie_moyenne
+FROM stations st
+CROSS JOIN wascal.geo_niveaux n
+GROUP BY n.niveau, cellule_lat, cellule_lon;
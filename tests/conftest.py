@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import duckdb_backend
+
+
+# Base DuckDB synthétique du schéma wascal (duckdb_backend.build_fixture), construite une fois par session
+@pytest.fixture(scope="session")
+def fixture_path(tmp_path_factory):
+    if not duckdb_backend.is_available():
+        pytest.skip("module duckdb non installé")
+    path = str(tmp_path_factory.mktemp("wascal") / "wascal.duckdb")
+    duckdb_backend.build_fixture(path)
+    return path
+
+
+# Connexion en lecture seule à la base de test (expose execute / fetchall comme un curseur psycopg2)
+@pytest.fixture
+def fixture_con(fixture_path):
+    con = duckdb_backend.connect(fixture_path)
+    yield con
+    con.close()
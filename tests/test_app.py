@@ -0,0 +1,64 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+import duckdb_backend
+import warehouse
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+# Application connectée, toutes les classes de requêtes routées vers la base DuckDB de test
+@pytest.fixture
+def app(fixture_path, monkeypatch):
+    monkeypatch.setattr(warehouse, "QUERY_ROUTES", warehouse.load_query_routes("*=duckdb"))
+    monkeypatch.setattr(duckdb_backend, "DUCKDB_PATH", fixture_path)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["postgres_password"] = "test"
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = "admin"
+    return at
+
+
+# Fonction pour trouver un bouton par le début de son libellé
+def find_button(at, prefix):
+    return next(button for button in at.button if button.label.startswith(prefix))
+
+
+@pytest.mark.parametrize("export_format", ["CSV", "Parquet"])
+def test_export_renders_download_button(app, fixture_path, export_format):
+    if export_format == "Parquet":
+        pytest.importorskip("pyarrow")
+    app.session_state["page"] = "analyse"
+    app.run()
+    app.radio(key="export_format").set_value(export_format).run()
+    find_button(app, "⚙️ Préparer l'export").click().run()
+    assert not app.exception
+    assert not app.error
+
+    labels = [element.proto.label for element in app.get("download_button")]
+    assert labels and labels[0].startswith("💾 Télécharger")
+    output, nb_rows, truncated = app.session_state["export_file"]
+    data = io.BytesIO(output.getvalue())
+    df = pd.read_csv(data) if export_format == "CSV" else pd.read_parquet(data)
+    total = duckdb_backend.read_query("SELECT COUNT(*) AS n FROM wascal.table_des_faits", path=fixture_path)["n"].iloc[0]
+    assert len(df) == nb_rows == total and not truncated
+
+
+def test_dashboard_kpis_fall_back_to_exact(app, fixture_path):
+    app.session_state["page"] = "dashboard"
+    app.run()
+    assert not app.exception
+    assert not app.error
+    # Sans extension hll ni sketches (base DuckDB), les KPI exacts sont affichés avec leur légende
+    metrics = {metric.label: metric.value for metric in app.metric}
+    total = duckdb_backend.read_query("SELECT COUNT(*) AS n FROM wascal.table_des_faits", path=fixture_path)["n"].iloc[0]
+    assert metrics["📊 Total Mesures"] == f"{total:,}"
+    assert metrics["📅 Dernière MAJ"] != "N/A"
+    captions = [caption.value for caption in app.caption]
+    assert any(caption.startswith("KPI approximatifs indisponibles") for caption in captions)
+    assert captions.count("Valeur exacte") == 4
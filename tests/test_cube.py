@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import duckdb_backend
+from cube import OlapCube
+from warehouse import DIMENSION_QUERIES, MEASURE_COLUMNS, QUERY_CUBE_SOURCE, build_dimension_lookup, decode_fact_keys
+
+MEASURES = ["temperature_celsius", "production_tonnes", "qualite_eau_ph"]
+
+# Agrégats exacts d'une mesure calculés directement par la base (colonnes de regroupement de la requête)
+GROUP_BY_COLUMNS = {"region": "g.region", "source": "s.acronyme"}
+QUERY_GROUP_BY = """
+SELECT
+    {columns},
+    COUNT(f.{measure}) AS nb,
+    AVG(f.{measure}) AS moyenne,
+    MIN(f.{measure}) AS min,
+    MAX(f.{measure}) AS max,
+    VAR_SAMP(f.{measure}) AS variance
+FROM wascal.table_des_faits f
+JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+WHERE f.{measure} IS NOT NULL
+GROUP BY {groups}
+"""
+
+
+# Cube construit comme l'application : faits lus par blocs, clés décodées par les dimensions en mémoire
+@pytest.fixture(scope="module")
+def olap_cube(fixture_path):
+    read = lambda query: duckdb_backend.read_query(query, path=fixture_path)
+    lookups = {key: build_dimension_lookup(read(query), key) for key, query in DIMENSION_QUERIES.items()}
+    facts = decode_fact_keys(read(QUERY_CUBE_SOURCE), lookups)
+    olap_cube = OlapCube(MEASURE_COLUMNS)
+    for start in range(0, len(facts), 500):
+        olap_cube.add_chunk(facts.iloc[start:start + 500])
+    return olap_cube
+
+
+# Fonction pour lire les agrégats exacts d'une mesure, regroupés selon by (index : tuple des groupes)
+def direct_group_by(fixture_path, measure, by):
+    query = QUERY_GROUP_BY.format(
+        measure=measure,
+        columns=", ".join(f"{GROUP_BY_COLUMNS[col]} AS {col}" for col in by),
+        groups=", ".join(GROUP_BY_COLUMNS[col] for col in by)
+    )
+    df = duckdb_backend.read_query(query, path=fixture_path)
+    df.index = pd.MultiIndex.from_frame(df[list(by)])
+    return df
+
+
+@pytest.mark.parametrize("measure", MEASURES)
+@pytest.mark.parametrize("by", [("region",), ("source",), ("region", "source")])
+def test_rollup_matches_group_by(fixture_path, olap_cube, measure, by):
+    expected = direct_group_by(fixture_path, measure, by)
+    merged = olap_cube.rollup(measure, by=by)
+    assert sorted(merged) == sorted(expected.index)
+    for group, summary in merged.items():
+        row = expected.loc[group]
+        assert summary.count == row["nb"]
+        assert summary.mean == pytest.approx(row["moyenne"])
+        assert summary.minimum == pytest.approx(row["min"]) and summary.maximum == pytest.approx(row["max"])
+        if summary.count > 1:
+            assert summary.variance() == pytest.approx(row["variance"], rel=1e-6)
+
+
+def test_rollup_filters_match_group_by(fixture_path, olap_cube):
+    expected = direct_group_by(fixture_path, "temperature_celsius", ("region", "source"))
+    region = expected.index[0][0]
+    merged = olap_cube.rollup("temperature_celsius", by=("source",), regions=[region])
+    subset = expected[expected["region"] == region]
+    assert {group[0]: summary.count for group, summary in merged.items()} == dict(zip(subset["source"], subset["nb"]))
+
+
+def test_rollup_by_month_covers_all_rows(fixture_path, olap_cube):
+    total = duckdb_backend.read_query(
+        "SELECT COUNT(production_tonnes) AS nb FROM wascal.table_des_faits", path=fixture_path
+    )["nb"].iloc[0]
+    merged = olap_cube.rollup("production_tonnes", by=("mois",))
+    assert sum(summary.count for summary in merged.values()) == total
+    assert all(isinstance(group[0], pd.Period) for group in merged)
+
+
+def test_quantile_table_within_bounds(olap_cube):
+    df = olap_cube.quantile_table("temperature_celsius")
+    assert not df.empty
+    quantiles = df[["min", "p10", "p25", "p50", "p75", "p90", "max"]].to_numpy()
+    assert (np.diff(quantiles, axis=1) >= -1e-9).all()
@@ -0,0 +1,34 @@
+import time
+
+import pandas as pd
+import pytest
+
+import duckdb_backend
+
+SLOW_QUERY = "SELECT COUNT(*) AS n FROM range(3000000000) a WHERE a.range % 7 = 3"
+
+
+def test_read_query_timeout_interrupts(fixture_path):
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        duckdb_backend.read_query(SLOW_QUERY, path=fixture_path, timeout=0.3)
+    assert time.perf_counter() - start < 5
+
+
+def test_read_query_within_timeout(fixture_path):
+    df = duckdb_backend.read_query("SELECT COUNT(*) AS n FROM wascal.dim_source_donnees", path=fixture_path, timeout=30)
+    assert int(df["n"].iloc[0]) > 0
+
+
+def test_stream_query_chunks_match_read_query(fixture_path):
+    query = "SELECT id_fait, id_source FROM wascal.table_des_faits WHERE id_fait > %(depuis)s ORDER BY id_fait"
+    expected = duckdb_backend.read_query(query, {"depuis": 0}, path=fixture_path)
+    chunks = list(duckdb_backend.stream_query(query, {"depuis": 0}, path=fixture_path, chunk_size=100))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= duckdb_backend.VECTOR_SIZE for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+def test_stream_query_timeout_interrupts(fixture_path):
+    with pytest.raises(TimeoutError):
+        list(duckdb_backend.stream_query(SLOW_QUERY, path=fixture_path, timeout=0.3))
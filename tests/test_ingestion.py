@@ -0,0 +1,51 @@
+import pandas as pd
+
+from ingestion import load_dimension_lookups, parse_dates, prepare_source_frame, resolve_keys, write_rejects
+
+
+def test_iso_dates_are_not_read_day_first():
+    dates = parse_dates(pd.Series(["2024-01-05", "2024-02-07", "2024-01-25", "2024-03-04 08:30:00"]))
+    assert list(dates) == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-07"), pd.Timestamp("2024-01-25"), pd.Timestamp("2024-03-04")]
+
+
+def test_day_first_dates_and_unreadable_values():
+    dates = parse_dates(pd.Series(["05/01/2024", "25/12/2023", "2024/01/05", "31/02/2024", None, "hier"]))
+    assert list(dates[:2]) == [pd.Timestamp("2024-01-05"), pd.Timestamp("2023-12-25")]
+    assert dates[2:].isna().all()
+
+
+def test_explicit_source_format():
+    dates = parse_dates(pd.Series(["01-05-2024", "2024-01-05"]), "%m-%d-%Y")
+    assert dates[0] == pd.Timestamp("2024-01-05")
+    assert pd.isna(dates[1])
+
+
+def test_excel_datetime_column_kept():
+    values = pd.Series([pd.Timestamp("2024-01-05 10:00"), pd.Timestamp("2024-02-07")])
+    assert list(parse_dates(values)) == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-07")]
+
+
+def test_unparseable_rows_go_to_rejects_log(fixture_con, tmp_path):
+    df_source = pd.DataFrame({
+        "date": ["2024-01-05", "05/01/2024", "2024-13-45", "n/a", "2024-01-06", "2024-01-07"],
+        "region": ["Dakar", "Dakar", "Thiès", "Dakar", None, "Dakar"],
+        "commune": ["Pikine", "Pikine", "Mbour", "Pikine", "Pikine", "Pikine"],
+        "temperature_celsius": [28.5, 29.0, 30.1, 27.0, 26.0, None]
+    })
+    frame = prepare_source_frame(df_source, "ANACIM")
+    facts, reasons = resolve_keys(frame, load_dimension_lookups(fixture_con), "ANACIM")
+
+    # Les deux écritures du 5 janvier 2024 désignent le même fait : la dernière ligne l'emporte, la première est rejetée
+    assert len(facts) == 1
+    assert facts["temperature_celsius"].iloc[0] == 29.0
+    assert reasons.to_dict() == {
+        0: "doublon dans le fichier", 2: "date invalide", 3: "date invalide", 4: "localité manquante", 5: "aucune mesure"
+    }
+    # Chaque ligne du fichier est soit chargée, soit rejetée avec un motif
+    assert len(facts) + len(reasons) == len(df_source)
+
+    path = write_rejects(df_source, reasons, "ANACIM", str(tmp_path))
+    df_rejects = pd.read_csv(path, keep_default_na=False)
+    assert list(df_rejects["date"]) == ["2024-01-05", "2024-13-45", "n/a", "2024-01-06", "2024-01-07"]
+    assert list(df_rejects["motif"]) == ["doublon dans le fichier", "date invalide", "date invalide", "localité manquante", "aucune mesure"]
+    assert write_rejects(df_source, reasons.iloc[:0], "ANACIM", str(tmp_path)) is None
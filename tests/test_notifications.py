@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from notifications import collect_changes, listen_changes, notify_change, pop_dependents, register_dependencies
+from warehouse import APPROX_METRIC_QUERIES, QUERY_ANALYSE_DATA, QUERY_GEO_GRID, db_config_from_env, query_tables
+
+
+# Registre de dépendances de trois entrées : faits, carte (geo_grille) et KPI approximatif (kpi_hll_mensuel)
+def build_dependencies():
+    dependencies = {}
+    for key, query in [
+        ("analyse", QUERY_ANALYSE_DATA),
+        ("carte", QUERY_GEO_GRID),
+        ("sources_actives", APPROX_METRIC_QUERIES["sources_actives"])
+    ]:
+        register_dependencies(dependencies, key, query_tables(query))
+    return dependencies
+
+
+def test_query_tables_exact_names():
+    assert query_tables(QUERY_GEO_GRID) == {"geo_grille"}
+    assert query_tables(APPROX_METRIC_QUERIES["total_mesures"]) == {"table_des_faits"}
+
+
+def test_derived_table_refresh_evicts_only_its_consumers():
+    dependencies = build_dependencies()
+    changes = collect_changes([SimpleNamespace(payload="geo_grille:REFRESH"), SimpleNamespace(payload="kpi_hll_mensuel")])
+    assert changes == {"geo_grille": {"REFRESH"}, "kpi_hll_mensuel": {"UPDATE"}}
+    assert pop_dependents(dependencies, changes) == {"carte", "sources_actives"}
+    assert pop_dependents(dependencies, {"table_des_faits": {"INSERT"}}) == {"analyse"}
+    assert dependencies == {}
+
+
+# Test sur une base PostgreSQL locale : WASCAL_TEST_POSTGRES=1 et variables WASCAL_DB_* (cf. README)
+@pytest.mark.skipif(os.environ.get("WASCAL_TEST_POSTGRES") != "1", reason="PostgreSQL de test non configuré")
+def test_notify_evicts_cache_entry():
+    import psycopg2
+
+    db_config = db_config_from_env()
+    dependencies = build_dependencies()
+    evicted = set()
+    received = threading.Event()
+    stop_event = threading.Event()
+
+    def on_change(changes):
+        evicted.update(pop_dependents(dependencies, changes))
+        received.set()
+
+    listener = threading.Thread(
+        target=listen_changes, args=(db_config, on_change, stop_event), kwargs={"timeout": 0.2, "debounce": 0.1}, daemon=True
+    )
+    listener.start()
+    conn = psycopg2.connect(**db_config)
+    try:
+        conn.set_session(autocommit=True)
+        # Une notification émise avant le LISTEN est perdue : on réémet jusqu'à la réception
+        deadline = time.time() + 10
+        while not received.is_set() and time.time() < deadline:
+            with conn.cursor() as cur:
+                notify_change(cur, "geo_grille", "REFRESH")
+            received.wait(0.5)
+    finally:
+        conn.close()
+        stop_event.set()
+        listener.join(timeout=5)
+
+    assert evicted == {"carte"}
+    assert "carte" not in dependencies.get("geo_grille", set())
+    assert "analyse" in dependencies["table_des_faits"]
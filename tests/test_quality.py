@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import duckdb_backend
+from quality import QUALITY_RULES, YIELD_TOLERANCE, evaluate_rules, scan_quality
+from warehouse import MEASURE_COLUMNS
+
+
+# Faits de la base de test, une colonne par mesure
+@pytest.fixture
+def facts(fixture_path):
+    return duckdb_backend.read_query(
+        f"SELECT id_fait, id_source, {', '.join(MEASURE_COLUMNS)} FROM wascal.table_des_faits", path=fixture_path
+    )
+
+
+# Fonction pour lancer la vérification SQL sur la base de test
+def scan(fixture_path, chunk_size):
+    df = scan_quality(lambda query, params: duckdb_backend.read_query(query, params, path=fixture_path), chunk_size)
+    return df.sort_values(["id_source", "regle"]).reset_index(drop=True)
+
+
+def test_sql_scan_matches_direct_counts(fixture_path, facts):
+    df_counts = scan(fixture_path, chunk_size=1000).set_index(["id_source", "regle"])
+    # Valeurs aberrantes injectées par la fixture (ANACIM : humidité 104 %, pluie -2,5 mm ; DGPRE : pH 14,6)
+    anacim = facts[facts["id_source"] == 1]
+    assert df_counts.loc[(1, "humidite_hors_bornes"), "nb_violations"] == (anacim["humidite_pourcentage"] > 100).sum() > 0
+    assert df_counts.loc[(1, "pluie_negative"), "nb_violations"] == (anacim["pluviometri_mm"] < 0).sum() > 0
+    assert df_counts.loc[(5, "ph_hors_bornes"), "nb_violations"] == (facts["qualite_eau_ph"] > 14).sum() > 0
+    # Une mesure n'est vérifiée que sur les lignes de la source qui la renseigne
+    assert df_counts.loc[(1, "humidite_hors_bornes"), "nb_verifies"] == anacim["humidite_pourcentage"].notna().sum()
+    assert df_counts.loc[(2, "humidite_hors_bornes"), "nb_verifies"] == 0
+
+
+def test_yield_rule_matches_direct_counts(fixture_path, facts):
+    df_counts = scan(fixture_path, chunk_size=1000).groupby("regle")[["nb_verifies", "nb_violations"]].sum()
+    complete = facts[["rendement_tonne_par_hectare", "production_tonnes", "surface_cultivee_hectares"]].notna().all(axis=1)
+    agricole = facts[complete]
+    expected = agricole["production_tonnes"] / agricole["surface_cultivee_hectares"]
+    gap = (agricole["rendement_tonne_par_hectare"] - expected).abs()
+    violations = gap > YIELD_TOLERANCE * np.maximum(agricole["rendement_tonne_par_hectare"].abs(), expected.abs())
+    assert df_counts.loc["rendement_incoherent", "nb_verifies"] == complete.sum() > 0
+    assert df_counts.loc["rendement_incoherent", "nb_violations"] == violations.sum() > 0
+
+
+def test_yield_rule_on_integer_columns():
+    rule = next(rule for rule in QUALITY_RULES if rule["regle"] == "rendement_incoherent")
+    con = pytest.importorskip("duckdb").connect()
+    # 5 t / 2 ha = 2,5 t/ha : cohérent en division flottante, incohérent si le quotient était tronqué à 2
+    df = con.execute(f"""
+        SELECT COUNT(*) FILTER (WHERE {rule['sql']}) AS nb
+        FROM (VALUES (2.5, 5, 2), (1.0, 5, 2)) t(rendement_tonne_par_hectare, production_tonnes, surface_cultivee_hectares)
+    """).df()
+    assert df["nb"].iloc[0] == 1
+
+
+def test_every_rule_checks_rows(fixture_path):
+    df_counts = scan(fixture_path, chunk_size=1000)
+    verified = df_counts.groupby("regle")["nb_verifies"].sum()
+    assert (verified > 0).all(), verified[verified == 0].index.tolist()
+
+
+def test_chunked_scan_matches_single_chunk(fixture_path):
+    pd.testing.assert_frame_equal(scan(fixture_path, chunk_size=137), scan(fixture_path, chunk_size=10 ** 9))
+
+
+def test_numpy_rules_match_sql_scan(fixture_path, facts):
+    df_sql = scan(fixture_path, chunk_size=1000)
+    for id_source, df_source in facts.groupby("id_source"):
+        expected = df_sql[df_sql["id_source"] == id_source].set_index("regle")[["nb_verifies", "nb_violations"]]
+        got = evaluate_rules(df_source).set_index("regle")
+        pd.testing.assert_frame_equal(got.loc[expected.index], expected, check_dtype=False)
+
+
+def test_rules_on_file_columns():
+    frame = pd.DataFrame({measure: np.nan for measure in MEASURE_COLUMNS}, index=range(4))
+    frame["humidite_pourcentage"] = [50.0, 101.0, -1.0, np.nan]
+    df = evaluate_rules(frame).set_index("regle")
+    assert df.loc["humidite_hors_bornes"].tolist() == [3, 2]
+    assert df["nb_verifies"].drop("humidite_hors_bornes").eq(0).all()
+    assert len(df) == len(QUALITY_RULES)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import duckdb_backend
+from spatial_index import EARTH_RADIUS_KM, KDTree, StationIndex
+from warehouse import QUERY_STATIONS
+
+
+# Points aléatoires reproductibles (petites feuilles : l'arbre a plusieurs niveaux)
+@pytest.fixture(scope="module")
+def tree():
+    points = np.random.default_rng(0).uniform([4.0, -18.0], [16.0, 0.0], size=(500, 2))
+    return KDTree(points, leaf_size=4)
+
+
+@pytest.fixture
+def stations(fixture_path):
+    return duckdb_backend.read_query(QUERY_STATIONS, path=fixture_path)
+
+
+# Fonction pour calculer la distance orthodromique (km) par la formule de haversine
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@pytest.mark.parametrize("box", [((10.0, -15.0), (13.0, -10.0)), ((4.0, -18.0), (16.0, 0.0)), ((20.0, 5.0), (21.0, 6.0))])
+def test_query_box_matches_brute_force(tree, box):
+    lo, hi = np.array(box[0]), np.array(box[1])
+    expected = np.flatnonzero(np.all((tree.points >= lo) & (tree.points <= hi), axis=1))
+    assert np.array_equal(tree.query_box(lo, hi), expected)
+
+
+@pytest.mark.parametrize("k", [1, 7, 500])
+def test_query_matches_brute_force(tree, k):
+    point = np.array([11.2, -7.9])
+    dists, indices = tree.query(point, k=k)
+    expected = np.sort(np.linalg.norm(tree.points - point, axis=1))[:k]
+    assert np.allclose(dists, expected)
+    assert np.allclose(np.linalg.norm(tree.points[indices] - point, axis=1), dists)
+
+
+def test_empty_tree():
+    tree = KDTree(np.empty((0, 2)))
+    assert len(tree.query_box((0, 0), (1, 1))) == 0
+    assert len(tree.query((0, 0), k=3)[1]) == 0
+
+
+def test_station_within_box_matches_filter(stations):
+    index = StationIndex(stations)
+    lat_min, lat_max, lon_min, lon_max = index.bounds()
+    lat_mid, lon_mid = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    selected = index.within_box(lat_min, lat_mid, lon_min, lon_mid)
+    expected = stations[
+        stations["latitude"].between(lat_min, lat_mid) & stations["longitude"].between(lon_min, lon_mid)
+    ]
+    assert sorted(selected["id_geographique"]) == sorted(expected["id_geographique"])
+    assert len(index.within_box(lat_min, lat_max, lon_min, lon_max)) == len(stations.dropna(subset=["latitude", "longitude"]))
+
+
+def test_station_nearest_matches_haversine(stations):
+    index = StationIndex(stations)
+    latitude, longitude = 13.5, -15.0
+    nearest = index.nearest(latitude, longitude, k=3)
+    distances = haversine_km(latitude, longitude, stations["latitude"], stations["longitude"])
+    expected = stations.assign(distance_km=distances).nsmallest(3, "distance_km")
+    assert list(nearest["id_geographique"]) == list(expected["id_geographique"])
+    assert np.allclose(nearest["distance_km"], expected["distance_km"])
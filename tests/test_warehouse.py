@@ -0,0 +1,104 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import duckdb_backend
+from warehouse import QUERY_TEMPORAL, active_index_filters, build_dimension_lookup, build_inverted_index, decode_fact_keys, index_positions
+
+
+# Dimensions réduites : une date, une localité avec coordonnées
+def build_lookups():
+    temps = pd.DataFrame({"id_temps": [1, 2], "date": pd.to_datetime(["2024-01-01", "2024-01-02"])})
+    geo = pd.DataFrame({"id_geographique": [10, 20], "region": ["Centre", "Nord"], "latitude": [12.5, 14.0]})
+    return {"id_temps": build_dimension_lookup(temps, "id_temps"), "id_geographique": build_dimension_lookup(geo, "id_geographique")}
+
+
+def test_decode_fact_keys_known_keys():
+    df = pd.DataFrame({"id_temps": [2, 1], "id_geographique": [20, 10], "valeur": [1.0, 2.0]})
+    attributes = {"id_temps": ["date"], "id_geographique": ["region", "latitude"]}
+    decoded = decode_fact_keys(df, build_lookups(), attributes=attributes)
+    assert list(decoded["date"]) == list(pd.to_datetime(["2024-01-02", "2024-01-01"]))
+    assert list(decoded["region"]) == ["Nord", "Centre"]
+    assert list(decoded["latitude"]) == [14.0, 12.5]
+    assert "id_temps" not in decoded.columns and "id_geographique" in decoded.columns
+
+
+def test_decode_fact_keys_unknown_key_is_missing_not_last_member():
+    df = pd.DataFrame({"id_temps": [1, 3], "id_geographique": [10, 30]})
+    attributes = {"id_temps": ["date"], "id_geographique": ["region", "latitude"]}
+    missing = set()
+    decoded = decode_fact_keys(df, build_lookups(), attributes=attributes, missing=missing)
+    assert missing == {"id_temps", "id_geographique"}
+    assert decoded["date"].iloc[0] == pd.Timestamp("2024-01-01") and pd.isna(decoded["date"].iloc[1])
+    assert decoded["region"].iloc[0] == "Centre" and pd.isna(decoded["region"].iloc[1])
+    assert decoded["latitude"].iloc[0] == 12.5 and np.isnan(decoded["latitude"].iloc[1])
+
+
+def test_decode_fact_keys_null_key_is_not_reported_missing():
+    df = pd.DataFrame({"id_geographique": [10.0, np.nan]})
+    missing = set()
+    decoded = decode_fact_keys(df, build_lookups(), attributes={"id_geographique": ["latitude"]}, missing=missing)
+    assert missing == set()
+    assert pd.isna(decoded["latitude"].iloc[1])
+
+
+# Base de test réduite à trois mesures : novembre 2024 et mars 2025 (même saison sèche), novembre 2025 (suivante)
+@pytest.fixture
+def season_path(fixture_path, tmp_path):
+    path = str(tmp_path / "saisons.duckdb")
+    shutil.copy(fixture_path, path)
+    con = duckdb_backend.connect(path, read_only=False)
+    try:
+        con.execute("DELETE FROM wascal.table_des_faits")
+        con.execute("DELETE FROM wascal.dim_temps")
+        con.execute("""
+            INSERT INTO wascal.dim_temps (id_temps, date, annee, mois, saison) VALUES
+                (1, DATE '2024-11-15', 2024, 11, 'Saison sèche'),
+                (2, DATE '2025-03-15', 2025, 3, 'Saison sèche'),
+                (3, DATE '2025-11-20', 2025, 11, 'Saison sèche')
+        """)
+        con.execute("""
+            INSERT INTO wascal.table_des_faits (id_fait, id_temps, id_geographique, id_source, id_type_donnees, temperature_celsius)
+            SELECT id_temps, id_temps, (SELECT MIN(id_geographique) FROM wascal.dim_geographique),
+                   (SELECT MIN(id_source) FROM wascal.dim_source_donnees),
+                   (SELECT MIN(id_type_donnees) FROM wascal.dim_type_donnees), 20.0 + 10 * id_temps
+            FROM wascal.dim_temps
+        """)
+    finally:
+        con.close()
+    return path
+
+
+def test_temporal_query_groups_dry_season_by_season_year(season_path):
+    df = duckdb_backend.read_query(QUERY_TEMPORAL, path=season_path)
+    by_year = df[df["niveau"] == "annee_saison"].set_index("annee")
+    # Novembre 2024 et mars 2025 forment une seule saison sèche, rattachée à 2025 ; novembre 2025 ouvre celle de 2026
+    assert list(by_year.index) == [2025, 2026]
+    assert by_year.loc[2025, "nb_mesures"] == 2
+    assert by_year.loc[2025, "temp_moyenne"] == pytest.approx(35.0)
+    assert by_year.loc[2026, "nb_mesures"] == 1
+    assert df.loc[df["niveau"] == "saison", "nb_mesures"].tolist() == [3]
+
+
+# Sélection par l'index inversé, comparée au filtre isin (lignes à région nulle comprises)
+@pytest.mark.parametrize("regions", [["Dakar", "Thiès", "Kaolack"], ["Dakar"], ["Kaolack", "Inconnue"]])
+def test_index_selection_matches_isin(regions):
+    df = pd.DataFrame({
+        "region": ["Dakar", None, "Thiès", "Dakar", "Kaolack", None, "Thiès"],
+        "source": ["ANACIM", "ANSD", "ANACIM", "DAPSA", "ANACIM", "ANACIM", "DAPSA"]
+    })
+    indexes = {col: build_inverted_index(df[col]) for col in df.columns}
+    filters = {"region": regions, "source": ["ANACIM", "DAPSA"]}
+    active = active_index_filters(indexes, filters, len(df))
+    positions = index_positions(indexes, active) if active else np.arange(len(df))
+    expected = df["region"].isin(regions) & df["source"].isin(filters["source"])
+    assert list(positions) == list(np.flatnonzero(expected))
+
+
+def test_index_filter_skipped_when_it_keeps_every_row():
+    df = pd.DataFrame({"region": ["Dakar", "Thiès", "Dakar"]})
+    indexes = {"region": build_inverted_index(df["region"])}
+    assert active_index_filters(indexes, {"region": ["Thiès", "Dakar"]}, len(df)) == []
+    assert active_index_filters(indexes, {"region": None}, len(df)) == []
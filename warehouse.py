@@ -0,0 +1,857 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import psycopg2
+import duckdb_backend
+
+
+# Paramètres de connexion PostgreSQL (le mot de passe est fourni par l'appelant).
+# Les variables WASCAL_DB_* permettent de viser une base PostgreSQL locale.
+DB_HOST = os.environ.get("WASCAL_DB_HOST", "wascal-datawarehouse.ce5k6qqm8o1c.us-east-1.rds.amazonaws.com")
+DB_PORT = os.environ.get("WASCAL_DB_PORT", "5432")
+DB_NAME = os.environ.get("WASCAL_DB_NAME", "postgres")
+DB_USER = os.environ.get("WASCAL_DB_USER", "wascal_admin")
+
+
+# Fonction pour construire la configuration de connexion PostgreSQL
+def make_db_config(password):
+    return {
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "database": DB_NAME,
+        "user": DB_USER,
+        "password": password
+    }
+
+
+# Configuration hors Streamlit : variable d'environnement, sinon secrets.toml de Streamlit
+def db_config_from_env():
+    password = os.environ.get("WASCAL_DB_PASSWORD")
+    if password is None:
+        import streamlit as st
+        password = st.secrets["postgres_password"]
+    return make_db_config(password)
+
+
+# Classes de requêtes routables vers PostgreSQL ou vers la base DuckDB locale
+QUERY_CLASSES = ["kpi", "dashboard", "analyse", "geo", "tendances", "sources"]
+
+# Requêtes sur le catalogue ou les extensions PostgreSQL (EXPLAIN, pg_class, hll) : jamais routées vers DuckDB
+POSTGRES_ONLY_CLASSES = {"catalogue"}
+
+
+# Fonction pour lire le routage des classes de requêtes, ex. WASCAL_QUERY_ROUTES="geo=duckdb,tendances=duckdb" ou "*=duckdb"
+def load_query_routes(spec=None):
+    if spec is None:
+        spec = os.environ.get("WASCAL_QUERY_ROUTES", "")
+    routes = {query_class: "postgres" for query_class in QUERY_CLASSES}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        query_class, _, backend = item.partition("=")
+        if backend not in ("postgres", "duckdb"):
+            raise ValueError(f"Moteur inconnu pour la classe {query_class!r} : {backend!r}")
+        for target in (QUERY_CLASSES if query_class == "*" else [query_class]):
+            routes[target] = backend
+    return routes
+
+
+QUERY_ROUTES = load_query_routes()
+
+# Délai maximal d'exécution côté PostgreSQL par classe de requêtes (secondes, statement_timeout)
+DEFAULT_QUERY_TIMEOUTS = {
+    "kpi": 15,
+    "dashboard": 60,
+    "analyse": 180,
+    "geo": 60,
+    "tendances": 120,
+    "sources": 60,
+    "catalogue": 15
+}
+
+# Délai des requêtes sans classe (scripts hors ligne)
+DEFAULT_QUERY_TIMEOUT = 600
+
+
+# Fonction pour lire les délais des classes de requêtes, ex. WASCAL_QUERY_TIMEOUTS="analyse=300,sources=90"
+def load_query_timeouts(spec=None):
+    if spec is None:
+        spec = os.environ.get("WASCAL_QUERY_TIMEOUTS", "")
+    timeouts = dict(DEFAULT_QUERY_TIMEOUTS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        query_class, _, seconds = item.partition("=")
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            raise ValueError(f"Délai invalide pour la classe {query_class!r} : {seconds!r}")
+        for target in (list(timeouts) if query_class == "*" else [query_class]):
+            timeouts[target] = seconds
+    return timeouts
+
+
+QUERY_TIMEOUTS = load_query_timeouts()
+
+
+# Fonction pour obtenir le délai d'une classe de requêtes (secondes)
+def timeout_for(query_class):
+    return QUERY_TIMEOUTS.get(query_class, DEFAULT_QUERY_TIMEOUT)
+
+
+# Fonction pour choisir le moteur d'une classe de requêtes
+def backend_for(query_class, routes=None):
+    if query_class in POSTGRES_ONLY_CLASSES:
+        return "postgres"
+    backend = (routes or QUERY_ROUTES).get(query_class, "postgres")
+    if backend == "duckdb" and not duckdb_backend.is_available():
+        return "postgres"
+    return backend
+
+
+# Fonction pour exécuter une requête sans cache (les erreurs sont remontées à l'appelant).
+# on_connect(conn) reçoit la connexion ouverte, par exemple pour annuler la requête depuis un autre thread.
+def read_query(query, params=None, db_config=None, query_class=None, routes=None, on_connect=None):
+    if backend_for(query_class, routes) == "duckdb":
+        return duckdb_backend.read_query(query, params, on_connect=on_connect, timeout=timeout_for(query_class))
+
+    timeout_ms = int(timeout_for(query_class) * 1000)
+    conn = psycopg2.connect(**(db_config or db_config_from_env()), options=f"-c statement_timeout={timeout_ms}")
+    try:
+        if on_connect is not None:
+            on_connect(conn)
+        conn.set_session(autocommit=True)
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+# Fonction pour normaliser le texte d'une requête (espaces hors chaînes littérales) : même requête, même clé
+def normalize_query(query):
+    return re.sub(r"('(?:[^']|'')*')|\s+", lambda m: m.group(1) or " ", query).strip()
+
+
+# DASHBOARD : toutes les répartitions en une seule requête (source, région et total)
+QUERY_DASHBOARD_BREAKDOWN = """
+SELECT
+    GROUPING(s.acronyme, g.region) as niveau,
+    s.acronyme,
+    s.nom_source,
+    g.region,
+    COUNT(*) as nb_mesures
+FROM wascal.table_des_faits f
+JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+GROUP BY GROUPING SETS (
+    (s.acronyme, s.nom_source),
+    (g.region),
+    ()
+)
+ORDER BY niveau, nb_mesures DESC
+"""
+
+
+# VUE GÉOGRAPHIQUE : mesures et moyennes par station
+QUERY_GEO_DETAIL = """
+SELECT
+    g.id_geographique,
+    g.pays,
+    g.region,
+    g.commune,
+    g.latitude,
+    g.longitude,
+    COUNT(f.id_geographique) as nb_mesures,
+    AVG(f.temperature_celsius) as temp_moyenne,
+    AVG(f.pluviometri_mm) as pluie_moyenne
+FROM wascal.dim_geographique g
+LEFT JOIN wascal.table_des_faits f ON g.id_geographique = f.id_geographique
+GROUP BY g.id_geographique, g.pays, g.region, g.commune, g.latitude, g.longitude
+HAVING COUNT(f.id_geographique) > 0
+"""
+
+
+# Année de saison : la saison sèche (novembre à mai) est rattachée à l'année où elle se termine,
+# pour ne pas fusionner la fin d'une saison sèche (janvier-mai) et le début de la suivante (novembre-décembre)
+SEASON_YEAR_EXPR = "CASE WHEN t.mois >= 11 THEN t.annee + 1 ELSE t.annee END"
+
+# TENDANCES : niveau saison et niveau année de saison × saison en un seul passage.
+# Chaque moyenne est calculée sur les mesures brutes de son groupe (pondération correcte).
+QUERY_TEMPORAL = f"""
+SELECT
+    CASE
+        WHEN GROUPING({SEASON_YEAR_EXPR}) = 0 THEN 'annee_saison'
+        ELSE 'saison'
+    END as niveau,
+    {SEASON_YEAR_EXPR} as annee,
+    t.saison,
+    SUM(f.temperature_celsius) / NULLIF(COUNT(f.temperature_celsius), 0) as temp_moyenne,
+    SUM(f.pluviometri_mm) as pluie_totale,
+    SUM(f.humidite_pourcentage) / NULLIF(COUNT(f.humidite_pourcentage), 0) as humidite_moyenne,
+    COUNT(*) as nb_mesures
+FROM wascal.table_des_faits f
+JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+GROUP BY GROUPING SETS (
+    ({SEASON_YEAR_EXPR}, t.saison),
+    (t.saison)
+)
+ORDER BY niveau, annee, t.saison
+"""
+
+
+# TENDANCES : pas de temps de l'évolution (libellé, regroupement, date représentant chaque période)
+TEMPORAL_GRANULARITIES = {
+    'jour': ("Jour", "t.date", "t.date"),
+    'semaine': ("Semaine", "CAST(date_trunc('week', t.date) AS DATE)", "CAST(date_trunc('week', t.date) AS DATE)"),
+    'mois': ("Mois", "t.annee, t.mois", "make_date(t.annee, t.mois, 1)"),
+    'saison': ("Saison", f"{SEASON_YEAR_EXPR}, t.saison", "MIN(t.date)"),
+    'annee': ("Année", "t.annee", "make_date(t.annee, 1, 1)")
+}
+
+TEMPORAL_DEFAULT_GRANULARITY = 'mois'
+
+
+# Fonction pour construire l'évolution temporelle rééchantillonnée dans la base.
+# Les moyennes sont SUM / COUNT sur les mesures brutes (pondérées par le nombre de mesures de chaque période).
+def build_temporal_query(granularite=TEMPORAL_DEFAULT_GRANULARITY):
+    _, group_by, date_expr = TEMPORAL_GRANULARITIES[granularite]
+    return f"""
+        SELECT
+            {date_expr} AS date,
+            SUM(f.temperature_celsius) / NULLIF(COUNT(f.temperature_celsius), 0) as temp_moyenne,
+            SUM(f.pluviometri_mm) as pluie_totale,
+            SUM(f.humidite_pourcentage) / NULLIF(COUNT(f.humidite_pourcentage), 0) as humidite_moyenne,
+            COUNT(*) as nb_mesures
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+        GROUP BY {group_by}
+        ORDER BY date
+        """
+
+
+# CLIMATOLOGIE : mesures suivies en anomalies par rapport à la normale région × mois calendaire
+CLIMATOLOGY_MEASURES = ['temperature_celsius', 'pluviometri_mm']
+
+
+# Fonction pour construire la table des normales (moyenne, écart-type, effectif) par région et mois, en un seul parcours
+def build_climatology_query(measures=CLIMATOLOGY_MEASURES):
+    select_stats = ",\n            ".join(
+        f"AVG(f.{measure}) AS {measure}_normale,\n            "
+        f"STDDEV_SAMP(f.{measure}) AS {measure}_ecart_type,\n            "
+        f"COUNT(f.{measure}) AS {measure}_nb"
+        for measure in measures
+    )
+    return f"""
+        SELECT
+            g.region,
+            t.mois,
+            {select_stats}
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+        JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+        GROUP BY g.region, t.mois
+        ORDER BY g.region, t.mois
+        """
+
+
+QUERY_CLIMATOLOGY = build_climatology_query()
+
+
+# TENDANCES : moyennes mensuelles par région des mesures suivies en anomalies
+QUERY_REGION_MONTHLY = """
+SELECT
+    g.region,
+    t.annee,
+    t.mois,
+    make_date(t.annee, t.mois, 1) AS date,
+    AVG(f.temperature_celsius) AS temperature_celsius,
+    AVG(f.pluviometri_mm) AS pluviometri_mm
+FROM wascal.table_des_faits f
+JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+GROUP BY g.region, t.annee, t.mois
+ORDER BY g.region, date
+"""
+
+
+# Fonction pour calculer les moyennes mensuelles par région d'un extrait de faits déjà filtré
+def monthly_region_means(df, measures=CLIMATOLOGY_MEASURES):
+    dates = pd.to_datetime(df['date'])
+    keys = [df['region'], dates.dt.year.rename('annee'), dates.dt.month.rename('mois')]
+    monthly = df[measures].groupby(keys, observed=True).mean().reset_index()
+    monthly['date'] = pd.to_datetime(pd.DataFrame({'year': monthly['annee'], 'month': monthly['mois'], 'day': 1}))
+    return monthly
+
+
+# Fonction pour calculer anomalies et scores z par jointure sur la table des normales (région, mois)
+def compute_anomalies(df_series, df_climatology, measures=CLIMATOLOGY_MEASURES):
+    if df_series.empty or df_climatology.empty:
+        return pd.DataFrame()
+    merged = df_series.merge(df_climatology, on=['region', 'mois'], how='left')
+    for measure in measures:
+        # NUMERIC PostgreSQL -> Decimal : conversion avant les opérations vectorisées
+        for col in (measure, f"{measure}_normale", f"{measure}_ecart_type"):
+            merged[col] = merged[col].astype('float64')
+        merged[f"{measure}_anomalie"] = merged[measure] - merged[f"{measure}_normale"]
+        merged[f"{measure}_z"] = merged[f"{measure}_anomalie"] / merged[f"{measure}_ecart_type"].where(merged[f"{measure}_ecart_type"] > 0)
+    return merged
+
+
+# SOURCES : informations et couverture de chaque source
+QUERY_SOURCES_DETAIL = """
+SELECT
+    s.nom_source,
+    s.acronyme,
+    s.type_source,
+    s.contact,
+    s.url,
+    s.date_derniere_maj,
+    COUNT(f.id_source) as nb_mesures_total,
+    COUNT(DISTINCT f.id_geographique) as nb_zones_couvertes
+FROM wascal.dim_source_donnees s
+LEFT JOIN wascal.table_des_faits f ON s.id_source = f.id_source
+GROUP BY s.id_source, s.nom_source, s.acronyme, s.type_source, s.contact, s.url, s.date_derniere_maj
+ORDER BY nb_mesures_total DESC
+"""
+
+
+# Fonction pour découper le résultat du dashboard par niveau de GROUPING()
+# niveau = 1 : par source, 2 : par région, 3 : total général
+def split_dashboard_breakdown(df_breakdown):
+    if df_breakdown.empty:
+        return pd.DataFrame(), pd.DataFrame(), None
+    df_sources = df_breakdown[df_breakdown['niveau'] == 1][['acronyme', 'nom_source', 'nb_mesures']].reset_index(drop=True)
+    df_geo = df_breakdown[df_breakdown['niveau'] == 2][['region', 'nb_mesures']].reset_index(drop=True)
+    df_total = df_breakdown[df_breakdown['niveau'] == 3]
+    total = df_total['nb_mesures'].iloc[0] if not df_total.empty else None
+    return df_sources, df_geo, total
+
+
+# Fonction pour découper le résultat des tendances par niveau d'agrégation
+def split_temporal_levels(df_grouping):
+    df_saison = df_grouping[df_grouping['niveau'] == 'saison'].reset_index(drop=True)
+    df_annee_saison = df_grouping[df_grouping['niveau'] == 'annee_saison'].reset_index(drop=True)
+    return df_saison, df_annee_saison
+
+
+# ANALYSE : faits détaillés avec leurs dimensions
+QUERY_ANALYSE_DATA = """
+SELECT 
+    f.id_temps,
+    f.id_geographique,
+    f.id_source,
+    f.id_type_donnees,
+    f.temperature_celsius,
+    f.pluviometri_mm,
+    f.humidite_pourcentage,
+    f.vitesse_vent_kmh,
+    f.pib_regional_fcfa,
+    f.population_totale,
+    f.taux_chomage_pourcentage,
+    f.production_tonnes,
+    f.surface_cultivee_hectares,
+    f.rendement_tonne_par_hectare,
+    f.niveau_eau_metres,
+    f.debit_m3par_seconde,
+    f.qualite_eau_ph
+FROM wascal.table_des_faits f
+"""
+
+
+# Dimensions chargées une fois en mémoire : les requêtes de faits ne renvoient que les clés entières
+DIMENSION_QUERIES = {
+    "id_temps": "SELECT id_temps, date, annee, mois, saison FROM wascal.dim_temps",
+    "id_geographique": "SELECT id_geographique, pays, region, commune, latitude, longitude FROM wascal.dim_geographique",
+    "id_source": "SELECT id_source, acronyme AS source, nom_source, type_source FROM wascal.dim_source_donnees",
+    "id_type_donnees": "SELECT id_type_donnees, categorie, sous_categorie FROM wascal.dim_type_donnees"
+}
+
+# Attributs ajoutés au décodage de chaque clé (mêmes noms de colonnes que les anciennes jointures)
+FACT_KEY_ATTRIBUTES = {
+    "id_temps": ["date"],
+    "id_geographique": ["region", "commune", "pays"],
+    "id_source": ["source", "type_source"],
+    "id_type_donnees": ["categorie", "sous_categorie"]
+}
+
+
+# Fonction pour préparer une dimension au décodage : index des clés, attributs texte factorisés (catégories triées)
+def build_dimension_lookup(df_dim, key):
+    if df_dim.empty:
+        df_dim = pd.DataFrame(columns=[key])
+    attributes = {}
+    for col in df_dim.columns.drop(key):
+        values = df_dim[col]
+        if pd.api.types.is_string_dtype(values):
+            codes, categories = pd.factorize(values, sort=True)
+            attributes[col] = (codes, pd.CategoricalDtype(categories))
+        else:
+            attributes[col] = (pd.Index(values), None)
+    return {"cles": pd.Index(df_dim[key]), "attributs": attributes}
+
+
+# Fonction pour décoder les clés entières d'un résultat de faits : positions des clés dans chaque dimension
+# (recherche vectorisée), puis attributs texte en catégories. Les clés décodées sont retirées sauf keep_keys.
+# Une clé absente de la dimension donne une valeur manquante et son nom est ajouté à missing s'il est fourni.
+def decode_fact_keys(df, lookups, attributes=FACT_KEY_ATTRIBUTES, keep_keys=("id_geographique",), missing=None):
+    decoded = {}
+    for key, names in attributes.items():
+        if key not in df.columns:
+            continue
+        positions = lookups[key]["cles"].get_indexer(df[key])
+        if missing is not None and ((positions < 0) & df[key].notna().to_numpy()).any():
+            missing.add(key)
+        for name in names:
+            values, dtype = lookups[key]["attributs"][name]
+            if dtype is not None:
+                codes = np.where(positions >= 0, values[positions], -1) if len(values) else np.full(len(df), -1)
+                decoded[name] = pd.Categorical.from_codes(codes, dtype=dtype)
+            else:
+                # take sur le tableau sous-jacent : la position -1 donne NaN/NaT et non le dernier membre
+                decoded[name] = values.array.take(positions, allow_fill=True)
+    dropped = [key for key in attributes if key in df.columns and key not in keep_keys]
+    return pd.concat([pd.DataFrame(decoded, index=df.index), df.drop(columns=dropped)], axis=1)
+
+
+# Fonction pour lister les requêtes de dimension dont dépend le décodage d'une requête de faits
+def dimension_dependencies(query):
+    return "\n".join(dim_query for key, dim_query in DIMENSION_QUERIES.items() if f"f.{key}" in query)
+
+
+# Fonction pour lister les tables du schéma wascal lues par une requête (noms exacts, sans le schéma)
+def query_tables(query):
+    return set(re.findall(r"\bwascal\.(\w+)", query))
+
+
+# Mesures de la table des faits, dans l'ordre des bits du masque de validité
+MEASURE_COLUMNS = [
+    'temperature_celsius',
+    'pluviometri_mm',
+    'humidite_pourcentage',
+    'vitesse_vent_kmh',
+    'pib_regional_fcfa',
+    'population_totale',
+    'taux_chomage_pourcentage',
+    'production_tonnes',
+    'surface_cultivee_hectares',
+    'rendement_tonne_par_hectare',
+    'niveau_eau_metres',
+    'debit_m3par_seconde',
+    'qualite_eau_ph'
+]
+
+# Lecture des faits pour le cube OLAP en mémoire (région × source × mois), parcourue par blocs, clés décodées par l'application
+QUERY_CUBE_SOURCE = """
+SELECT
+    f.id_fait,
+    f.id_temps,
+    f.id_geographique,
+    f.id_source,
+    f.temperature_celsius,
+    f.pluviometri_mm,
+    f.humidite_pourcentage,
+    f.vitesse_vent_kmh,
+    f.pib_regional_fcfa,
+    f.population_totale,
+    f.taux_chomage_pourcentage,
+    f.production_tonnes,
+    f.surface_cultivee_hectares,
+    f.rendement_tonne_par_hectare,
+    f.niveau_eau_metres,
+    f.debit_m3par_seconde,
+    f.qualite_eau_ph
+FROM wascal.table_des_faits f
+"""
+
+# Faits insérés depuis la dernière lecture du cube (mise à jour incrémentale après une notification INSERT)
+QUERY_CUBE_INCREMENT = QUERY_CUBE_SOURCE + "WHERE f.id_fait > %(dernier_id)s\n"
+
+# Mesures par domaine d'analyse et colonne indiquant qu'une ligne a au moins une mesure du domaine
+DOMAIN_MEASURES = {
+    'Climatique': ['temperature_celsius', 'pluviometri_mm', 'humidite_pourcentage', 'vitesse_vent_kmh'],
+    'Agricole': ['production_tonnes', 'surface_cultivee_hectares', 'rendement_tonne_par_hectare'],
+    'Économique': ['population_totale', 'pib_regional_fcfa', 'taux_chomage_pourcentage'],
+    'Hydrologique': ['niveau_eau_metres', 'debit_m3par_seconde', 'qualite_eau_ph']
+}
+DOMAIN_FLAGS = {
+    'Climatique': 'avec_climatique',
+    'Agricole': 'avec_agricole',
+    'Économique': 'avec_economique',
+    'Hydrologique': 'avec_hydrologique'
+}
+
+
+# Fonction pour calculer le masque des mesures d'un ensemble de colonnes
+def measure_bits(measures):
+    bits = 0
+    for measure in measures:
+        bits |= 1 << MEASURE_COLUMNS.index(measure)
+    return bits
+
+
+# Fonction pour ajouter le masque de validité (bit i = mesure i renseignée) et les indicateurs par domaine
+def add_validity_columns(df):
+    mask = np.zeros(len(df), dtype=np.uint16)
+    for bit, measure in enumerate(MEASURE_COLUMNS):
+        mask |= df[measure].notna().to_numpy().astype(np.uint16) << np.uint16(bit)
+    flags = {
+        flag: (mask & measure_bits(DOMAIN_MEASURES[domain])) != 0
+        for domain, flag in DOMAIN_FLAGS.items()
+    }
+    return df.assign(masque_mesures=mask, **flags)
+
+
+# Fonction pour sélectionner les lignes ayant une (how="any") ou toutes (how="all") les mesures demandées
+def has_measures(df, measures, how="any"):
+    bits = measure_bits(measures)
+    mask = df['masque_mesures'].to_numpy() & bits
+    return mask == bits if how == "all" else mask != 0
+
+
+# Fonction pour construire l'index inversé d'une colonne : valeur -> positions triées des lignes
+def build_inverted_index(values):
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind="stable")
+    # Les valeurs nulles (code -1) sont en tête après le tri et ne sont pas indexées
+    order = order[np.count_nonzero(codes < 0):]
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    index = {}
+    for value, positions in zip(uniques, np.split(order, np.cumsum(counts)[:-1])):
+        positions.flags.writeable = False
+        index[value] = positions
+    return index
+
+
+# Fonction pour garder les filtres qui retirent des lignes : liste (colonne, valeurs retenues triées).
+# filters : colonne -> valeurs retenues (None = pas de filtre). Une colonne dont toutes les valeurs sont retenues
+# ne filtre rien, sauf si des lignes y sont nulles : non indexées, elles sont exclues comme par isin.
+def active_index_filters(indexes, filters, nb_rows):
+    active = []
+    for col, values in filters.items():
+        if values is None:
+            continue
+        index = indexes[col]
+        kept = sorted(value for value in set(values) if value in index)
+        if len(kept) == len(index) and sum(len(positions) for positions in index.values()) == nb_rows:
+            continue
+        active.append((col, tuple(kept)))
+    return active
+
+
+# Fonction pour intersecter les positions des filtres actifs (colonne la plus sélective d'abord)
+def index_positions(indexes, active):
+    positions = None
+    for col, kept in sorted(active, key=lambda item: sum(len(indexes[item[0]][v]) for v in item[1])):
+        parts = [indexes[col][value] for value in kept]
+        col_positions = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        positions = col_positions if positions is None else np.intersect1d(positions, col_positions, assume_unique=True)
+    return positions
+
+
+# VUE GÉOGRAPHIQUE : agrégats précalculés d'un niveau de grille (sql/03_geo_grille.sql)
+QUERY_GEO_GRID = """
+SELECT
+    latitude,
+    longitude,
+    nb_stations,
+    nb_mesures,
+    temp_moyenne,
+    pluie_moyenne
+FROM wascal.geo_grille
+WHERE niveau = %(niveau)s
+"""
+
+
+# Empreinte de dim_geographique (change dès que la dimension est modifiée)
+QUERY_GEO_DIMENSION_VERSION = """
+SELECT md5(string_agg(concat_ws(':', id_geographique, latitude, longitude), ',' ORDER BY id_geographique))
+FROM wascal.dim_geographique
+"""
+
+
+# Coordonnées des stations pour l'index spatial
+QUERY_STATIONS = """
+SELECT id_geographique, pays, region, commune, latitude, longitude
+FROM wascal.dim_geographique
+"""
+
+
+# Requêtes exactes des métriques principales
+EXACT_METRIC_QUERIES = {
+    "total_mesures": "SELECT COUNT(*) FROM wascal.table_des_faits;",
+    "sources_actives": "SELECT COUNT(DISTINCT id_source) FROM wascal.table_des_faits;",
+    "regions_couvertes": "SELECT COUNT(DISTINCT id_geographique) FROM wascal.table_des_faits;",
+    "derniere_maj": "SELECT MAX(date) FROM wascal.dim_temps dt JOIN wascal.table_des_faits tf ON dt.id_temps = tf.id_temps;"
+}
+
+
+# Requêtes approximatives : statistiques du catalogue et sketches HyperLogLog (sql/02_kpi_hll.sql)
+APPROX_METRIC_QUERIES = {
+    "total_mesures": """
+        SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+        FROM pg_class c
+        WHERE c.oid = 'wascal.table_des_faits'::regclass
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'wascal.table_des_faits'::regclass);
+    """,
+    "sources_actives": "SELECT hll_cardinality(hll_union_agg(sources))::bigint FROM wascal.kpi_hll_mensuel;",
+    "regions_couvertes": "SELECT hll_cardinality(hll_union_agg(geographies))::bigint FROM wascal.kpi_hll_mensuel;",
+    "derniere_maj": "SELECT MAX(derniere_date) FROM wascal.kpi_hll_mensuel;"
+}
+
+
+# Colonnes disponibles pour le tableau détaillé (alias -> expression SQL)
+DETAIL_COLUMNS = {
+    'date': 't.date',
+    'region': 'g.region',
+    'commune': 'g.commune',
+    'pays': 'g.pays',
+    'source': 's.acronyme',
+    'type_source': 's.type_source',
+    'categorie': 'td.categorie',
+    'sous_categorie': 'td.sous_categorie',
+    'temperature_celsius': 'f.temperature_celsius',
+    'pluviometri_mm': 'f.pluviometri_mm',
+    'humidite_pourcentage': 'f.humidite_pourcentage',
+    'vitesse_vent_kmh': 'f.vitesse_vent_kmh',
+    'pib_regional_fcfa': 'f.pib_regional_fcfa',
+    'population_totale': 'f.population_totale',
+    'taux_chomage_pourcentage': 'f.taux_chomage_pourcentage',
+    'production_tonnes': 'f.production_tonnes',
+    'surface_cultivee_hectares': 'f.surface_cultivee_hectares',
+    'rendement_tonne_par_hectare': 'f.rendement_tonne_par_hectare',
+    'niveau_eau_metres': 'f.niveau_eau_metres',
+    'debit_m3par_seconde': 'f.debit_m3par_seconde',
+    'qualite_eau_ph': 'f.qualite_eau_ph'
+}
+
+DETAIL_PAGE_SIZE = 100
+
+
+# Fonction pour construire les filtres région/source côté SQL
+def build_filters(regions=None, sources=None, geo_ids=None):
+    conditions = []
+    params = {}
+    if regions:
+        conditions.append("g.region = ANY(%(regions)s)")
+        params['regions'] = list(regions)
+    if sources:
+        conditions.append("s.acronyme = ANY(%(sources)s)")
+        params['sources'] = list(sources)
+    if geo_ids is not None:
+        conditions.append("f.id_geographique = ANY(%(geo_ids)s)")
+        params['geo_ids'] = [int(geo_id) for geo_id in geo_ids]
+    return conditions, params
+
+
+# Fonction pour construire la requête paginée du tableau détaillé
+def build_detail_query(cols, regions=None, sources=None, cursor=None, page_size=DETAIL_PAGE_SIZE, geo_ids=None):
+    select_cols = ",\n            ".join(f"{DETAIL_COLUMNS[col]} AS {col}" for col in cols)
+    conditions, params = build_filters(regions, sources, geo_ids)
+
+    # Pagination par clé (keyset) sur (date DESC, id_fait DESC) : pas d'OFFSET.
+    # La borne t.date <= cursor_date (redondante) sert de borne au parcours de idx_dim_temps_date,
+    # la comparaison de tuples départage les faits de la date du curseur.
+    if cursor is not None:
+        conditions.append("t.date <= %(cursor_date)s")
+        conditions.append("(t.date, f.id_fait) < (%(cursor_date)s, %(cursor_id)s)")
+        params['cursor_date'], params['cursor_id'] = cursor
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    params['page_size'] = page_size
+
+    query = f"""
+        SELECT
+            {select_cols},
+            f.id_fait
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+        JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+        JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+        JOIN wascal.dim_type_donnees td ON f.id_type_donnees = td.id_type_donnees
+        {where_clause}
+        ORDER BY t.date DESC, f.id_fait DESC
+        LIMIT %(page_size)s
+        """
+    return query, params
+
+
+# Agrégats SQL disponibles pour les tableaux de synthèse par région
+REGION_AGGREGATES = {
+    'mean': 'AVG',
+    'min': 'MIN',
+    'max': 'MAX',
+    'sum': 'SUM'
+}
+
+
+# Fonction pour construire les agrégats d'une mesure par région
+def build_region_stats_query(measure, aggregates, regions=None, sources=None, geo_ids=None):
+    conditions, params = build_filters(regions, sources, geo_ids)
+    conditions.append(f"f.{measure} IS NOT NULL")
+    select_aggs = ",\n            ".join(f"{REGION_AGGREGATES[agg]}(f.{measure}) AS {agg}" for agg in aggregates)
+    query = f"""
+        SELECT
+            g.region,
+            {select_aggs}
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+        JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+        WHERE {' AND '.join(conditions)}
+        GROUP BY g.region
+        ORDER BY g.region
+        """
+    return query, params
+
+
+# Fonction pour construire la requête de la valeur la plus récente par région (date puis id_fait)
+def build_region_latest_query(measure, regions=None, sources=None, geo_ids=None):
+    conditions, params = build_filters(regions, sources, geo_ids)
+    conditions.append(f"f.{measure} IS NOT NULL")
+    query = f"""
+        SELECT DISTINCT ON (g.region)
+            g.region,
+            f.{measure},
+            t.date
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+        JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+        JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+        WHERE {' AND '.join(conditions)}
+        ORDER BY g.region, t.date DESC, f.id_fait DESC
+        """
+    return query, params
+
+
+# Agrégats partiels par station × source : combinables quel que soit le filtre (la moyenne vient de sum / count)
+PARTIAL_AGGREGATES = {
+    'sum': 'SUM',
+    'count': 'COUNT',
+    'min': 'MIN',
+    'max': 'MAX'
+}
+
+
+# Fonction pour construire la requête des agrégats partiels de toutes les mesures, en un seul parcours
+def build_group_partials_query(measures=MEASURE_COLUMNS):
+    select_aggs = ",\n            ".join(
+        f"{function}(f.{measure}) AS {measure}_{agg}"
+        for measure in measures for agg, function in PARTIAL_AGGREGATES.items()
+    )
+    return f"""
+        SELECT
+            f.id_geographique,
+            f.id_source,
+            {select_aggs}
+        FROM wascal.table_des_faits f
+        GROUP BY f.id_geographique, f.id_source
+        """
+
+
+QUERY_GROUP_PARTIALS = build_group_partials_query()
+
+
+# Fonction pour construire la requête de la valeur la plus récente par station × source (date puis id_fait)
+def build_group_latest_query(measure):
+    query = f"""
+        SELECT DISTINCT ON (f.id_geographique, f.id_source)
+            f.id_geographique,
+            f.id_source,
+            f.{measure},
+            t.date,
+            f.id_fait
+        FROM wascal.table_des_faits f
+        JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+        WHERE f.{measure} IS NOT NULL
+        ORDER BY f.id_geographique, f.id_source, t.date DESC, f.id_fait DESC
+        """
+    return query, None
+
+
+# Fonction pour garder les groupes station × source correspondant aux filtres
+def filter_partials(df_partials, regions=None, sources=None, geo_ids=None):
+    keep = np.ones(len(df_partials), dtype=bool)
+    if regions:
+        keep &= df_partials['region'].isin(regions).to_numpy()
+    if sources:
+        keep &= df_partials['source'].isin(sources).to_numpy()
+    if geo_ids is not None:
+        keep &= df_partials['id_geographique'].isin(geo_ids).to_numpy()
+    return df_partials[keep]
+
+
+# Fonction pour fusionner les partiels en agrégats par région (même résultat que build_region_stats_query)
+def merge_region_stats(df_partials, measure, aggregates, regions=None, sources=None, geo_ids=None):
+    if df_partials.empty:
+        return pd.DataFrame(columns=['region'] + list(aggregates))
+    groups = filter_partials(df_partials, regions, sources, geo_ids)
+    groups = groups[groups[f"{measure}_count"] > 0]
+    merged = groups.groupby('region', sort=True, observed=True).agg(
+        sum=(f"{measure}_sum", 'sum'),
+        count=(f"{measure}_count", 'sum'),
+        min=(f"{measure}_min", 'min'),
+        max=(f"{measure}_max", 'max')
+    )
+    merged['mean'] = merged['sum'] / merged['count']
+    return merged.reset_index()[['region'] + list(aggregates)]
+
+
+# Fonction pour fusionner les valeurs récentes par région (même résultat que build_region_latest_query)
+def merge_region_latest(df_latest, measure, regions=None, sources=None, geo_ids=None):
+    if df_latest.empty:
+        return pd.DataFrame(columns=['region', measure, 'date'])
+    groups = filter_partials(df_latest, regions, sources, geo_ids)
+    latest = groups.sort_values(['date', 'id_fait'], ascending=False).drop_duplicates('region')
+    return latest.sort_values('region')[['region', measure, 'date']].reset_index(drop=True)
+
+
+# Fonction pour construire la matrice de corrélation des mesures, par région et toutes régions confondues.
+# Les mesures de domaines différents sont sur des lignes de faits différentes : elles sont d'abord
+# ramenées à des moyennes par station × mois, puis corrélées par corr() dans la base (aucune ligne brute lue).
+def build_correlation_query(regions=None, sources=None, geo_ids=None, measures=MEASURE_COLUMNS):
+    conditions, params = build_filters(regions, sources, geo_ids)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    select_means = ",\n                ".join(f"AVG(f.{measure}) AS {measure}" for measure in measures)
+    select_corr = ",\n            ".join(
+        f"corr({first}, {second}) AS {first}__{second}"
+        for i, first in enumerate(measures) for second in measures[i + 1:]
+    )
+    query = f"""
+        WITH mensuel AS (
+            SELECT
+                g.region,
+                f.id_geographique,
+                t.annee,
+                t.mois,
+                {select_means}
+            FROM wascal.table_des_faits f
+            JOIN wascal.dim_temps t ON f.id_temps = t.id_temps
+            JOIN wascal.dim_geographique g ON f.id_geographique = g.id_geographique
+            JOIN wascal.dim_source_donnees s ON f.id_source = s.id_source
+            {where_clause}
+            GROUP BY g.region, f.id_geographique, t.annee, t.mois
+        )
+        SELECT
+            GROUPING(region) AS toutes_regions,
+            region,
+            COUNT(*) AS nb_observations,
+            {select_corr}
+        FROM mensuel
+        GROUP BY GROUPING SETS ((region), ())
+        ORDER BY toutes_regions DESC, region
+        """
+    return query, params
+
+
+# Fonction pour remettre une ligne du résultat de corrélation sous forme de matrice carrée
+def correlation_matrix(df_corr, region=None, measures=MEASURE_COLUMNS):
+    if region is None:
+        rows = df_corr[df_corr['toutes_regions'] == 1]
+    else:
+        rows = df_corr[(df_corr['toutes_regions'] == 0) & (df_corr['region'] == region)]
+    if rows.empty:
+        return pd.DataFrame()
+    row = rows.iloc[0]
+    matrix = pd.DataFrame(np.eye(len(measures)), index=measures, columns=measures)
+    for i, first in enumerate(measures):
+        for second in measures[i + 1:]:
+            value = row[f"{first}__{second}"]
+            value = np.nan if value is None else float(value)
+            matrix.loc[first, second] = value
+            matrix.loc[second, first] = value
+    return matrix